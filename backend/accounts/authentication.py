@@ -1,7 +1,10 @@
 """Supabase JWT Authentication for Django REST Framework."""
+import hmac
+
 import jwt
 from django.conf import settings
 from rest_framework import authentication, exceptions
+from .tokens import verify_token
 
 
 class SupabaseUser:
@@ -33,13 +36,8 @@ class SupabaseAuthentication(authentication.BaseAuthentication):
         token = auth_header.split(' ')[1]
         
         try:
-            # Decode JWT without verification for development
-            # In production, verify with SUPABASE_JWT_SECRET
-            payload = jwt.decode(
-                token,
-                options={"verify_signature": False},
-                algorithms=['HS256']
-            )
+            # Verified once per token, shared with SupabaseAuthMiddleware
+            payload = verify_token(token)
             
             user = SupabaseUser(payload)
             return (user, token)
@@ -51,3 +49,38 @@ class SupabaseAuthentication(authentication.BaseAuthentication):
     
     def authenticate_header(self, request):
         return 'Bearer'
+
+
+class EdgeNode:
+    """Edge POS node authenticated by the shared sync token."""
+    
+    is_authenticated = True
+    is_active = True
+    is_anonymous = False
+    is_edge_node = True
+    
+    def __init__(self, node_id):
+        self.node_id = node_id
+        self.id = f'edge:{node_id}'
+        self.pk = self.id  # Required for DRF throttling
+    
+    def __str__(self):
+        return self.id
+
+
+class EdgeNodeAuthentication(authentication.BaseAuthentication):
+    """Authenticate edge POS nodes by the X-Edge-Token header.
+    
+    Only enabled on the sync endpoints, never as a default class.
+    """
+    
+    def authenticate(self, request):
+        token = request.META.get('HTTP_X_EDGE_TOKEN')
+        
+        if not token:
+            return None
+        
+        if not settings.EDGE_SYNC_TOKEN or not hmac.compare_digest(token.encode(), settings.EDGE_SYNC_TOKEN.encode()):
+            raise exceptions.AuthenticationFailed('Invalid edge token')
+        
+        return (EdgeNode(request.META.get('HTTP_X_EDGE_NODE', 'edge')), None)
@@ -0,0 +1,76 @@
+"""Microbenchmark of per-request authentication overhead.
+
+Pushes a request with a bearer token through SupabaseAuthMiddleware and
+SupabaseAuthentication, the two places every API request decodes the
+token, and compares:
+
+- unverified: the old behaviour, two decodes without a signature check
+- verify-twice: turning on signature checks in both places naively
+- shared: the accounts.tokens pipeline, verified once and then cached
+
+    python manage.py bench_auth --requests 20000
+"""
+import time
+from unittest import mock
+
+import jwt
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from rest_framework.request import Request
+
+from accounts import tokens
+from accounts.authentication import SupabaseAuthentication
+from accounts.middleware import SupabaseAuthMiddleware
+
+
+class Command(BaseCommand):
+    help = 'Measure authentication overhead per request for the JWT verification strategies.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20000)
+
+    def handle(self, *args, **options):
+        secret = settings.SUPABASE_JWT_SECRET or 'bench-secret'
+        token = jwt.encode(
+            {
+                'sub': '00000000-0000-0000-0000-000000000000',
+                'email': 'bench@soda.shop',
+                'aud': 'authenticated',
+                'role': 'authenticated',
+                'exp': int(time.time()) + 3600,
+            },
+            secret,
+            algorithm='HS256'
+        )
+        request = RequestFactory().get('/api/inventory/products/', HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        def decode_unverified(token):
+            return jwt.decode(token, options={"verify_signature": False}, algorithms=['HS256'])
+
+        def decode_verified(token):
+            return jwt.decode(token, secret, algorithms=['HS256'], audience='authenticated')
+
+        with override_settings(SUPABASE_JWT_SECRET=secret, SUPABASE_JWT_VERIFY=True):
+            self.stdout.write(f"{'strategy':>14} {'us/request':>11}")
+            for name, decode in [
+                ('unverified', decode_unverified),
+                ('verify-twice', decode_verified),
+                ('shared', tokens.verify_token),
+            ]:
+                tokens.clear_token_cache()
+                per_request = self._time(request, decode, options['requests'])
+                self.stdout.write(f"{name:>14} {per_request:>11.1f}")
+
+    def _time(self, request, decode, count):
+        middleware = SupabaseAuthMiddleware(lambda request: HttpResponse())
+        authentication = SupabaseAuthentication()
+        # Route both call sites through the strategy under test
+        with mock.patch('accounts.middleware.verify_token', decode), \
+                mock.patch('accounts.authentication.verify_token', decode):
+            start = time.perf_counter()
+            for _ in range(count):
+                middleware(request)
+                authentication.authenticate(Request(request))
+            return (time.perf_counter() - start) / count * 1e6
@@ -1,6 +1,6 @@
 """Supabase Auth Middleware for Django."""
 import jwt
-from django.conf import settings
+from .tokens import verify_token
 
 
 class SupabaseAuthMiddleware:
@@ -15,11 +15,7 @@ class SupabaseAuthMiddleware:
         if auth_header.startswith('Bearer '):
             token = auth_header.split(' ')[1]
             try:
-                payload = jwt.decode(
-                    token,
-                    options={"verify_signature": False},
-                    algorithms=['HS256']
-                )
+                payload = verify_token(token)
                 request.supabase_user = payload
                 request.supabase_user_id = payload.get('sub')
                 request.supabase_email = payload.get('email')
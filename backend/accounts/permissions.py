@@ -1,6 +1,6 @@
 """Custom permissions for Mahadav Soda Shop."""
 from rest_framework import permissions
-from django.db import connection
+from .profiles import is_admin
 
 
 class IsAdminUser(permissions.BasePermission):
@@ -16,13 +16,7 @@ class IsAdminUser(permissions.BasePermission):
             return False
         
         try:
-            with connection.cursor() as cursor:
-                cursor.execute(
-                    "SELECT role FROM profiles WHERE id = %s",
-                    [user_id]
-                )
-                row = cursor.fetchone()
-                return row and row[0] == 'admin'
+            return is_admin(user_id)
         except Exception:
             return False
 
@@ -43,12 +37,13 @@ class IsAdminOrReadOnly(permissions.BasePermission):
             return False
         
         try:
-            with connection.cursor() as cursor:
-                cursor.execute(
-                    "SELECT role FROM profiles WHERE id = %s",
-                    [user_id]
-                )
-                row = cursor.fetchone()
-                return row and row[0] == 'admin'
+            return is_admin(user_id)
         except Exception:
             return False
+
+
+class IsEdgeNode(permissions.BasePermission):
+    """Only edge POS nodes authenticated with the sync token."""
+    
+    def has_permission(self, request, view):
+        return getattr(request.user, 'is_edge_node', False)
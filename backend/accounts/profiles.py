@@ -0,0 +1,63 @@
+"""Cached profile and role lookups by Supabase user id.
+
+Permission checks, /api/auth/check-admin/ and /api/auth/profile/ all read
+the same profiles row, so it is fetched once and kept in a bounded
+in-process cache for PROFILE_CACHE_TTL seconds. Call invalidate_profile()
+when a role changes so the change applies immediately in this process;
+other worker processes pick it up when their entry expires.
+"""
+from django.conf import settings
+from soda_shop.db import prepared_cursor
+
+from .cache import TTLCache
+
+# Cached for users without a profile row, so they don't hit the database either
+_NO_PROFILE = object()
+
+_profiles = TTLCache(settings.PROFILE_CACHE_MAX_ENTRIES, settings.PROFILE_CACHE_TTL)
+
+
+def get_profile(user_id):
+    """Return the user's profile as a dict, or None if there isn't one."""
+    profile = _profiles.get(user_id)
+    if profile is None:
+        with prepared_cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT id, username, email, role, created_at 
+                FROM profiles WHERE id = %s
+                """,
+                [user_id]
+            )
+            row = cursor.fetchone()
+        
+        if row:
+            profile = {
+                'id': str(row[0]),
+                'username': row[1],
+                'email': row[2],
+                'role': row[3],
+                'created_at': row[4].isoformat() if row[4] else None
+            }
+        else:
+            profile = _NO_PROFILE
+        _profiles.set(user_id, profile)
+    
+    return None if profile is _NO_PROFILE else profile
+
+
+def get_role(user_id):
+    profile = get_profile(user_id)
+    return profile['role'] if profile else None
+
+
+def is_admin(user_id):
+    return get_role(user_id) == 'admin'
+
+
+def invalidate_profile(user_id=None):
+    """Forget one user's cached profile, or every cached profile."""
+    if user_id is None:
+        _profiles.clear()
+    else:
+        _profiles.pop(user_id)
@@ -0,0 +1,55 @@
+"""Supabase JWT verification shared by the auth middleware and DRF authentication.
+
+Each token's signature is checked against SUPABASE_JWT_SECRET once; the
+decoded payload is then kept in a small LRU until the token's ``exp``, so
+later requests carrying the same token, and the second check within one
+request, cost a dictionary lookup instead of another HMAC.
+"""
+import jwt
+from django.conf import settings
+
+from .cache import TTLCache
+
+# Every entry is stored with its token's exp as the expiry
+_verified = TTLCache(settings.SUPABASE_JWT_CACHE_SIZE, ttl=0)
+
+
+def _decode(token):
+    if not settings.SUPABASE_JWT_VERIFY:
+        # Development only: trust the token without checking its signature
+        return jwt.decode(
+            token,
+            options={"verify_signature": False},
+            algorithms=['HS256']
+        )
+    
+    if not settings.SUPABASE_JWT_SECRET:
+        raise jwt.InvalidTokenError('SUPABASE_JWT_SECRET is not configured')
+    
+    audience = settings.SUPABASE_JWT_AUDIENCE or None
+    return jwt.decode(
+        token,
+        settings.SUPABASE_JWT_SECRET,
+        algorithms=['HS256'],
+        audience=audience,
+        options={"verify_aud": audience is not None}
+    )
+
+
+def verify_token(token):
+    """Return the verified payload of a Supabase access token.
+
+    Raises jwt.InvalidTokenError (or a subclass such as
+    jwt.ExpiredSignatureError) for tokens that don't verify.
+    """
+    payload = _verified.get(token)
+    if payload is None:
+        payload = _decode(token)
+        # Tokens without an exp claim are verified on every use instead
+        if 'exp' in payload:
+            _verified.set(token, payload, expires_at=payload['exp'])
+    return payload
+
+
+def clear_token_cache():
+    _verified.clear()
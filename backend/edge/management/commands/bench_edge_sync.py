@@ -0,0 +1,99 @@
+"""Benchmark edge sync throughput on the central backend.
+
+Builds synthetic offline sales for existing products, encodes them the way
+``sync_edge`` does (gzip JSON) and posts them to the ingest endpoint in
+process, once per batch size. Everything runs in a transaction that is
+rolled back, so no sales are left behind and stock is untouched:
+
+    python manage.py bench_edge_sync --sales 20000 --batch-sizes 100,500,2000
+"""
+import gzip
+import time
+import uuid
+from datetime import date, datetime, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory
+
+from edge.sync import batch_json
+from sales.views import ingest_sales
+
+BENCH_TOKEN = 'bench-edge-sync'
+
+
+class Command(BaseCommand):
+    help = 'Measure sales/s through edge batch encoding and the central ingest endpoint.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sales', type=int, default=20000, help='Sales pushed per batch size.')
+        parser.add_argument('--batch-sizes', default='100,500,2000', help='Comma-separated batch sizes.')
+
+    def handle(self, *args, **options):
+        try:
+            batch_sizes = [int(size) for size in options['batch_sizes'].split(',')]
+        except ValueError:
+            raise CommandError('--batch-sizes must be comma-separated integers')
+
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT id, price, cost_price FROM products WHERE is_active = true ORDER BY id LIMIT 50")
+            products = cursor.fetchall()
+        if not products:
+            raise CommandError('Need at least one active product to sell.')
+
+        sales = self._synthetic_sales(products, options['sales'])
+        self.stdout.write(f"{'batch':>6} {'requests':>9} {'raw KB/batch':>13} {'gzip KB/batch':>14} {'sales/s':>9}")
+
+        with override_settings(EDGE_SYNC_TOKEN=BENCH_TOKEN):
+            for batch_size in batch_sizes:
+                self._run(sales, batch_size)
+
+    def _synthetic_sales(self, products, count):
+        now = datetime.now(timezone.utc).isoformat()
+        today = date.today().isoformat()
+        sales = []
+        for i in range(count):
+            product_id, price, cost_price = products[i % len(products)]
+            quantity = 1 + i % 3
+            cost = cost_price or 0
+            sales.append({
+                'edge_id': uuid.uuid4().hex,
+                'product_id': product_id,
+                'quantity': quantity,
+                'unit_price': price,
+                'total_price': price * quantity,
+                'cost_price': cost,
+                'profit': (price - cost) * quantity,
+                'sale_date': today,
+                'created_at': now,
+            })
+        return sales
+
+    def _run(self, sales, batch_size):
+        factory = APIRequestFactory()
+        raw_bytes = gzip_bytes = requests = 0
+
+        with transaction.atomic():
+            start = time.perf_counter()
+            for offset in range(0, len(sales), batch_size):
+                batch = sales[offset:offset + batch_size]
+                raw = batch_json(batch)
+                body = gzip.compress(raw)
+                raw_bytes += len(raw)
+                gzip_bytes += len(body)
+                request = factory.post(
+                    '/api/sales/ingest/', body, content_type='application/json',
+                    HTTP_CONTENT_ENCODING='gzip', HTTP_X_EDGE_TOKEN=BENCH_TOKEN,
+                )
+                response = ingest_sales(request)
+                if response.status_code != 200:
+                    raise CommandError(f'Ingest failed ({response.status_code}): {response.data}')
+                requests += 1
+            elapsed = time.perf_counter() - start
+            transaction.set_rollback(True)
+
+        self.stdout.write(
+            f'{batch_size:>6} {requests:>9} {raw_bytes / requests / 1024:>13.1f} '
+            f'{gzip_bytes / requests / 1024:>14.1f} {len(sales) / elapsed:>9.0f}'
+        )
@@ -0,0 +1,34 @@
+"""Set up the local store for an edge POS node.
+
+Creates the SQLite tables from edge/schema.sql and, unless --offline is
+given, pulls the full catalog from EDGE_CENTRAL_URL:
+
+    EDGE_MODE=True python manage.py init_edge
+"""
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from edge import sync
+
+
+class Command(BaseCommand):
+    help = 'Create the edge SQLite schema and load the product catalog from the central backend.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--offline', action='store_true', help='Only create the schema.')
+
+    def handle(self, *args, **options):
+        if not settings.EDGE_MODE:
+            raise CommandError('init_edge only runs with EDGE_MODE=True')
+
+        sync.create_schema()
+        self.stdout.write(f"Edge store ready at {settings.DATABASES['default']['NAME']}")
+        if options['offline']:
+            return
+
+        try:
+            pulled = sync.pull_catalog(sync.session(), full=True)
+        except requests.RequestException as e:
+            raise CommandError(f'Could not load the catalog from {settings.EDGE_CENTRAL_URL}: {e}')
+        self.stdout.write(self.style.SUCCESS(f"Loaded {pulled['updated']} products."))
@@ -0,0 +1,58 @@
+"""Sync an edge POS node with the central backend.
+
+Pushes sales recorded offline, then pulls catalog changes. With --loop it
+keeps syncing every --interval seconds and rides out connection failures,
+which is how it runs alongside the edge server:
+
+    EDGE_MODE=True python manage.py sync_edge --loop --interval 30
+"""
+import time
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from edge import sync
+
+
+class Command(BaseCommand):
+    help = 'Push offline sales to the central backend and pull catalog changes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep syncing until interrupted.')
+        parser.add_argument('--interval', type=int, default=30, help='Seconds between syncs with --loop.')
+        parser.add_argument('--batch-size', type=int, default=None)
+
+    def handle(self, *args, **options):
+        if not settings.EDGE_MODE:
+            raise CommandError('sync_edge only runs with EDGE_MODE=True')
+
+        http = sync.session()
+        while True:
+            try:
+                self._sync(http, options['batch_size'])
+            except requests.RequestException as e:
+                if not options['loop']:
+                    raise CommandError(f'Sync failed: {e}')
+                self.stderr.write(f'Sync failed, retrying in {options["interval"]}s: {e}')
+
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
+
+    def _sync(self, http, batch_size):
+        pushed = sync.push_sales(http, batch_size=batch_size)
+        pulled = sync.pull_catalog(http)
+
+        self.stdout.write(
+            f"Pushed {pushed['pushed']} sales ({pushed['inserted']} new, {pushed['duplicates']} already synced); "
+            f"pulled {pulled['updated']} product changes, {pulled['deleted']} removals."
+        )
+        for conflict in pushed['conflicts']:
+            if conflict['reason'] == 'product_missing':
+                message = 'no longer exists centrally; sales kept without a product'
+            else:
+                message = f"only {conflict['available']} in central stock; topped up by {conflict['topped_up']}"
+            self.stderr.write(self.style.WARNING(
+                f"Product {conflict['product_id']}: sold {conflict['quantity']} offline, {message}."
+            ))
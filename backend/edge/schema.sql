@@ -0,0 +1,80 @@
+-- Edge POS store (SQLite)
+-- The subset of supabase/schema.sql the offline POS needs. Products are a
+-- copy of the central catalog pulled by `manage.py sync_edge`; sales are
+-- recorded locally and pushed to the central backend, which dedupes them
+-- on edge_id. Created by `manage.py init_edge`. Safe to run more than once.
+
+CREATE TABLE IF NOT EXISTS profiles (
+    id TEXT PRIMARY KEY,
+    username TEXT,
+    email TEXT,
+    role TEXT DEFAULT 'staff',
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS products (
+    id INTEGER PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    category TEXT DEFAULT 'Other',
+    price DECIMAL(10,2) NOT NULL CHECK (price >= 0),
+    cost_price DECIMAL(10,2),
+    stock INTEGER DEFAULT 0 CHECK (stock >= 0),
+    min_stock INTEGER DEFAULT 10,
+    image_url TEXT,
+    is_active BOOLEAN DEFAULT TRUE,
+    version INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS sales (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    edge_id TEXT NOT NULL UNIQUE DEFAULT (lower(hex(randomblob(16)))),
+    product_id INTEGER,
+    quantity INTEGER NOT NULL CHECK (quantity > 0),
+    unit_price DECIMAL(10,2) NOT NULL,
+    total_price DECIMAL(10,2) NOT NULL,
+    cost_price DECIMAL(10,2),
+    profit DECIMAL(10,2),
+    sale_date TEXT DEFAULT CURRENT_DATE,
+    created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
+    -- Set once the central backend has accepted the sale
+    synced_at TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_sales_unsynced ON sales(id) WHERE synced_at IS NULL;
+CREATE INDEX IF NOT EXISTS idx_sales_sale_date ON sales(sale_date);
+CREATE INDEX IF NOT EXISTS idx_products_is_active ON products(is_active);
+
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    user_id TEXT NOT NULL,
+    key TEXT NOT NULL,
+    request_hash TEXT NOT NULL,
+    status_code INTEGER,
+    response TEXT,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    expires_at TEXT NOT NULL,
+    PRIMARY KEY (user_id, key)
+);
+
+-- Sync bookkeeping, e.g. the catalog version last pulled
+CREATE TABLE IF NOT EXISTS edge_state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+
+-- Stock is deducted per sale, as the central trigger does per statement
+CREATE TRIGGER IF NOT EXISTS after_sale_deduct_stock
+    AFTER INSERT ON sales
+    FOR EACH ROW
+BEGIN
+    UPDATE products SET stock = stock - NEW.quantity WHERE id = NEW.product_id;
+END;
+
+-- Any change bumps the row's version, which feeds the catalog ETag
+CREATE TRIGGER IF NOT EXISTS bump_products_version
+    AFTER UPDATE ON products
+    FOR EACH ROW WHEN NEW.version = OLD.version
+BEGIN
+    UPDATE products SET version = OLD.version + 1, updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+END;
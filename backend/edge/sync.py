@@ -0,0 +1,176 @@
+"""Sync between an edge POS store and the central backend.
+
+``push_sales`` sends locally recorded sales to POST /api/sales/ingest/ in
+gzip-compressed JSON batches and marks them synced once accepted. The
+central side dedupes on ``edge_id``, so a batch resent after a timeout is
+harmless. ``pull_catalog`` applies the central catalog's delta feed
+(GET /api/inventory/products/changes/) to the local products, keeping local
+stock net of sales not yet pushed.
+
+Both authenticate with the shared EDGE_SYNC_TOKEN.
+"""
+import gzip
+import json
+from pathlib import Path
+
+import requests
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+
+SCHEMA_PATH = Path(__file__).resolve().parent / 'schema.sql'
+
+PRODUCT_FIELDS = ['id', 'name', 'category', 'price', 'cost_price', 'stock', 'min_stock', 'image_url', 'is_active']
+
+# Money is computed in floats on the edge; round it back to cents
+SALE_COLUMNS = """
+    edge_id, product_id, quantity,
+    ROUND(unit_price, 2) AS unit_price,
+    ROUND(total_price, 2) AS total_price,
+    ROUND(cost_price, 2) AS cost_price,
+    ROUND(profit, 2) AS profit,
+    sale_date, created_at
+"""
+
+
+def dict_fetchall(cursor):
+    columns = [col[0] for col in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def create_schema():
+    """Create the edge tables and triggers if they don't exist."""
+    with connection.cursor() as cursor:
+        cursor.executescript(SCHEMA_PATH.read_text())
+
+
+def session():
+    """HTTP session carrying this node's sync credentials."""
+    http = requests.Session()
+    http.headers.update({
+        'X-Edge-Token': settings.EDGE_SYNC_TOKEN,
+        'X-Edge-Node': settings.EDGE_NODE_ID,
+    })
+    return http
+
+
+def _url(path):
+    return settings.EDGE_CENTRAL_URL.rstrip('/') + path
+
+
+def batch_json(sales):
+    """JSON body for one ingest request, before compression."""
+    payload = {'node': settings.EDGE_NODE_ID, 'sales': sales}
+    return json.dumps(payload, cls=DjangoJSONEncoder).encode()
+
+
+def encode_batch(sales):
+    """Gzip-compressed JSON body for one ingest request."""
+    return gzip.compress(batch_json(sales))
+
+
+def push_sales(http, batch_size=None):
+    """Push unsynced sales until none are left; return totals.
+
+    Stops at the first failed request, leaving the rest for the next run.
+    """
+    batch_size = batch_size or settings.EDGE_SYNC_BATCH_SIZE
+    totals = {'pushed': 0, 'inserted': 0, 'duplicates': 0, 'conflicts': []}
+
+    while True:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT {SALE_COLUMNS} FROM sales WHERE synced_at IS NULL ORDER BY id LIMIT %s",
+                [batch_size]
+            )
+            sales = dict_fetchall(cursor)
+        if not sales:
+            return totals
+
+        response = http.post(
+            _url('/api/sales/ingest/'),
+            data=encode_batch(sales),
+            headers={'Content-Type': 'application/json', 'Content-Encoding': 'gzip'},
+            timeout=settings.EDGE_SYNC_TIMEOUT,
+        )
+        response.raise_for_status()
+        report = response.json()
+
+        edge_ids = [sale['edge_id'] for sale in sales]
+        placeholders = ', '.join(['%s'] * len(edge_ids))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE sales SET synced_at = CURRENT_TIMESTAMP WHERE edge_id IN ({placeholders})",
+                edge_ids
+            )
+
+        totals['pushed'] += len(sales)
+        totals['inserted'] += report['inserted']
+        totals['duplicates'] += report['duplicates']
+        totals['conflicts'].extend(report['conflicts'])
+
+
+def _get_state(cursor, key):
+    cursor.execute("SELECT value FROM edge_state WHERE key = %s", [key])
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def _set_state(cursor, key, value):
+    cursor.execute(
+        "INSERT INTO edge_state (key, value) VALUES (%s, %s) "
+        "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+        [key, value]
+    )
+
+
+def pull_catalog(http, full=False):
+    """Apply the central catalog's changes since the last pull; return counts."""
+    with connection.cursor() as cursor:
+        since = None if full else _get_state(cursor, 'catalog_version')
+
+    response = http.get(
+        _url('/api/inventory/products/changes/'),
+        params={'since': since} if since is not None else {},
+        timeout=settings.EDGE_SYNC_TIMEOUT,
+    )
+    response.raise_for_status()
+    changes = response.json()
+    products = changes['products']
+
+    columns = ', '.join(PRODUCT_FIELDS)
+    placeholders = ', '.join(['%s'] * len(PRODUCT_FIELDS))
+    updates = ', '.join(f'{field} = excluded.{field}' for field in PRODUCT_FIELDS if field != 'id')
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            if changes['full']:
+                # A full snapshot replaces the catalog
+                cursor.execute("DELETE FROM products")
+            elif changes['deleted']:
+                deleted = ', '.join(['%s'] * len(changes['deleted']))
+                cursor.execute(f"DELETE FROM products WHERE id IN ({deleted})", changes['deleted'])
+
+            cursor.executemany(
+                f"INSERT INTO products ({columns}) VALUES ({placeholders}) "
+                f"ON CONFLICT (id) DO UPDATE SET {updates}",
+                [[product[field] for field in PRODUCT_FIELDS] for product in products]
+            )
+
+            # Central stock doesn't include sales still waiting to be pushed
+            if products:
+                ids = ', '.join(['%s'] * len(products))
+                cursor.execute(
+                    f"""
+                    UPDATE products SET stock = MAX(0, stock - (
+                        SELECT COALESCE(SUM(quantity), 0) FROM sales
+                        WHERE sales.product_id = products.id AND synced_at IS NULL
+                    ))
+                    WHERE id IN ({ids})
+                    """,
+                    [product['id'] for product in products]
+                )
+
+            _set_state(cursor, 'catalog_version', str(changes['version']))
+
+    return {'updated': len(products), 'deleted': len(changes['deleted']), 'full': changes['full']}
@@ -0,0 +1,18 @@
+"""URL configuration in edge mode: the endpoints the POS needs offline."""
+from django.urls import path, include
+
+from inventory import views as inventory_views
+from sales import views as sales_views
+from soda_shop.urls import health_check
+
+urlpatterns = [
+    path('api/health/', health_check, name='health_check'),
+    path('api/auth/', include('accounts.urls')),
+    path('api/inventory/products/', inventory_views.product_list, name='product_list'),
+    path('api/inventory/products/autocomplete/', inventory_views.product_autocomplete, name='product_autocomplete'),
+    path('api/inventory/categories/', inventory_views.categories, name='categories'),
+    path('api/inventory/low-stock/', inventory_views.low_stock_products, name='low_stock'),
+    path('api/sales/create/', sales_views.create_sale, name='create_sale'),
+    path('api/sales/bulk/', sales_views.bulk_sale, name='bulk_sale'),
+    path('api/sales/best-sellers/', sales_views.best_sellers, name='best_sellers'),
+]
@@ -0,0 +1,28 @@
+"""Gunicorn settings shared by every way of starting the server.
+
+Gunicorn reads this file from the working directory, so the Docker CMD and
+a plain ``gunicorn soda_shop.asgi:application`` both pick it up. Each worker
+writes its metrics (soda_shop/metrics.py) to files in
+PROMETHEUS_MULTIPROC_DIR so /metrics can add up all of them; the directory
+is emptied on start, and a dead worker's live gauges are dropped.
+"""
+import os
+import shutil
+import tempfile
+
+# prometheus_client picks its storage when first imported, so this has to
+# be set before anything imports it
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'soda_shop_metrics'))
+
+
+def on_starting(server):
+    # Counters from a previous run would be added to this one's
+    path = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class InventoryConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'inventory'
+
+    def ready(self):
+        from .autocomplete import refresh
+        from .signals import products_changed
+
+        products_changed.connect(refresh, dispatch_uid='inventory.autocomplete.refresh')
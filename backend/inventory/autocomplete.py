@@ -0,0 +1,104 @@
+"""In-process prefix index for POS autocomplete.
+
+Every word of every active product's name goes into one sorted list, so a
+lookup is a binary search rather than a database query. The index is
+rebuilt after products change through this process's API, and at most
+AUTOCOMPLETE_INDEX_TTL seconds after a change made anywhere else (another
+worker, or Supabase directly).
+
+Stock is deliberately left out: sales change it without touching the
+index, so the POS reads it from the product list.
+"""
+import bisect
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+
+_WORD = re.compile(r'\w+')
+
+_lock = threading.Lock()
+_index = None
+
+
+def _words(text):
+    return _WORD.findall(text.lower())
+
+
+class PrefixIndex:
+    """Sorted (word, position) pairs over a list of products."""
+
+    def __init__(self, products):
+        self.products = products
+        self.built_at = time.monotonic()
+        self._names = [product['name'].lower() for product in products]
+        self._words = [set(_words(product['name'])) for product in products]
+        self._keys = sorted(
+            (word, position)
+            for position, words in enumerate(self._words)
+            for word in words
+        )
+
+    def _positions(self, prefix):
+        start = bisect.bisect_left(self._keys, (prefix,))
+        positions = set()
+        for word, position in self._keys[start:]:
+            if not word.startswith(prefix):
+                break
+            positions.add(position)
+        return positions
+
+    def search(self, query, limit=10):
+        """Products whose name has a word starting with each word of ``query``.
+
+        Names that start with the whole query rank first, then by name.
+        """
+        terms = _words(query)
+        if not terms:
+            return []
+
+        # Scan the range of the longest term, the most selective one
+        longest = max(terms, key=len)
+        matches = [
+            position for position in self._positions(longest)
+            if all(any(word.startswith(term) for word in self._words[position]) for term in terms)
+        ]
+        phrase = ' '.join(terms)
+        matches.sort(key=lambda position: (not self._names[position].startswith(phrase), self._names[position]))
+        return [self.products[position] for position in matches[:limit]]
+
+
+def _load_products():
+    with connection.cursor() as cursor:
+        # price as text to match the product list's "20.00"
+        cursor.execute(
+            "SELECT id, name, category, price::text AS price FROM products WHERE is_active = true ORDER BY name"
+        )
+        columns = [col[0] for col in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def _stale(index):
+    return index is None or time.monotonic() - index.built_at > settings.AUTOCOMPLETE_INDEX_TTL
+
+
+def refresh(**kwargs):
+    """Reload the index if this process has built one. Usable as a signal receiver."""
+    global _index
+    if _index is None:
+        return
+    with _lock:
+        _index = PrefixIndex(_load_products())
+
+
+def get_index():
+    """The current index, rebuilt first if missing or older than the TTL."""
+    global _index
+    if _stale(_index):
+        with _lock:
+            # Another thread may have rebuilt it while we waited
+            if _stale(_index):
+                _index = PrefixIndex(_load_products())
+    return _index
@@ -0,0 +1,177 @@
+"""Bulk product catalog import.
+
+Rows are validated with ProductSerializer a batch at a time, valid rows are
+loaded with COPY into a temporary staging table, and the whole file is then
+applied to products with one UPDATE (rows whose name matches an existing
+product, case-insensitively) and one INSERT (the rest), all in a single
+transaction. Cells left blank keep the existing product's value on update
+and get the usual default on insert, so rows for existing products are
+validated partially and only new products need a price.
+"""
+import csv
+import io
+import json
+
+from django.db import connection, transaction
+
+from .serializers import ProductSerializer
+
+IMPORT_FIELDS = ['name', 'category', 'price', 'cost_price', 'stock', 'min_stock', 'image_url', 'is_active']
+
+BATCH_SIZE = 500
+
+# Which of the given names already belong to a product, matched like the upsert
+EXISTING_NAMES_SQL = """
+    SELECT n
+    FROM unnest(%s::text[]) n
+    WHERE EXISTS (SELECT 1 FROM products p WHERE lower(p.name) = lower(trim(n)))
+"""
+
+
+class ImportFormatError(ValueError):
+    """The uploaded file can't be read as a list of product rows."""
+
+
+def parse_rows(content, fmt):
+    """Return product rows from CSV or JSON text as a list of dicts."""
+    if fmt == 'csv':
+        return list(csv.DictReader(io.StringIO(content)))
+
+    if fmt == 'json':
+        try:
+            rows = json.loads(content)
+        except json.JSONDecodeError as e:
+            raise ImportFormatError(f'Invalid JSON: {e}')
+        if isinstance(rows, dict):
+            rows = rows.get('products')
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise ImportFormatError('Expected a JSON list of product objects')
+        return rows
+
+    raise ImportFormatError(f"Unsupported import format '{fmt}'. Use csv or json")
+
+
+def _staged_values(row, data):
+    # Only fields present in the input are staged; the upsert fills the rest
+    return [data[field] if field in row else None for field in IMPORT_FIELDS]
+
+
+def import_products(rows, dry_run=False, batch_size=BATCH_SIZE):
+    """Validate and upsert product rows; return a per-row report.
+
+    Row numbers in the report are 1-based positions in ``rows``. With
+    ``dry_run`` everything runs, including the upsert, and is then rolled
+    back, so the counts show what the import would do.
+    """
+    errors = []
+    seen_names = {}
+    product_ids = []
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                CREATE TEMP TABLE product_import_staging (
+                    row_number INTEGER NOT NULL,
+                    name VARCHAR(255) NOT NULL,
+                    category TEXT,
+                    price DECIMAL(10,2),
+                    cost_price DECIMAL(10,2),
+                    stock INTEGER,
+                    min_stock INTEGER,
+                    image_url TEXT,
+                    is_active BOOLEAN
+                ) ON COMMIT DROP
+                """
+            )
+
+            for start in range(0, len(rows), batch_size):
+                # Blank cells count as missing
+                batch = [
+                    {k: v for k, v in raw.items() if k in IMPORT_FIELDS and v not in ('', None)}
+                    for raw in rows[start:start + batch_size]
+                ]
+                names = [row['name'] for row in batch if isinstance(row.get('name'), str)]
+                cursor.execute(EXISTING_NAMES_SQL, [names])
+                existing = {row[0] for row in cursor.fetchall()}
+
+                staged = []
+                for row_number, row in enumerate(batch, start=start + 1):
+                    # Updates only need the fields they change
+                    is_update = isinstance(row.get('name'), str) and row['name'] in existing
+                    serializer = ProductSerializer(data=row, partial=is_update)
+                    if not serializer.is_valid():
+                        errors.append({'row': row_number, 'errors': serializer.errors})
+                        continue
+
+                    data = serializer.validated_data
+                    key = data['name'].strip().lower()
+                    if key in seen_names:
+                        errors.append({
+                            'row': row_number,
+                            'errors': {'name': [f'Duplicate of row {seen_names[key]} in this import.']}
+                        })
+                        continue
+                    seen_names[key] = row_number
+                    staged.append([row_number] + _staged_values(row, data))
+
+                if staged:
+                    with cursor.copy(
+                        "COPY product_import_staging (row_number, %s) FROM STDIN" % ', '.join(IMPORT_FIELDS)
+                    ) as copy:
+                        for values in staged:
+                            copy.write_row(values)
+
+            cursor.execute(
+                """
+                UPDATE products p
+                SET category = COALESCE(s.category, p.category),
+                    price = COALESCE(s.price, p.price),
+                    cost_price = COALESCE(s.cost_price, p.cost_price),
+                    stock = COALESCE(s.stock, p.stock),
+                    min_stock = COALESCE(s.min_stock, p.min_stock),
+                    image_url = COALESCE(s.image_url, p.image_url),
+                    is_active = COALESCE(s.is_active, p.is_active),
+                    updated_at = NOW()
+                FROM product_import_staging s
+                WHERE lower(p.name) = lower(trim(s.name))
+                RETURNING p.id
+                """
+            )
+            updated = [row[0] for row in cursor.fetchall()]
+
+            cursor.execute(
+                """
+                INSERT INTO products (name, category, price, cost_price, stock, min_stock, image_url, is_active)
+                SELECT
+                    trim(s.name),
+                    COALESCE(s.category, 'Other'),
+                    s.price,
+                    s.cost_price,
+                    COALESCE(s.stock, 0),
+                    COALESCE(s.min_stock, 10),
+                    s.image_url,
+                    COALESCE(s.is_active, true)
+                FROM product_import_staging s
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM products p WHERE lower(p.name) = lower(trim(s.name))
+                )
+                ORDER BY s.row_number
+                RETURNING id
+                """
+            )
+            created = [row[0] for row in cursor.fetchall()]
+            product_ids = updated + created
+
+        if dry_run:
+            transaction.set_rollback(True)
+
+    return {
+        'total_rows': len(rows),
+        'created': len(created),
+        'updated': len(updated),
+        'failed': len(errors),
+        'dry_run': dry_run,
+        'errors': errors,
+        'product_ids': [] if dry_run else product_ids,
+    }
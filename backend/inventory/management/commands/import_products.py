@@ -0,0 +1,51 @@
+"""Import a product catalog from a CSV or JSON file.
+
+Rows are matched to existing products by name (case-insensitive): matches
+are updated, everything else is created, all in one transaction. Invalid
+rows are skipped and listed with their errors.
+
+    python manage.py import_products supplier.csv
+    python manage.py import_products supplier.json --dry-run
+"""
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory import importer
+from inventory.models import Product
+from inventory.signals import products_changed
+
+
+class Command(BaseCommand):
+    help = 'Create or update products in bulk from a CSV or JSON file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or JSON file of products.')
+        parser.add_argument('--format', choices=['csv', 'json'], help='Defaults to the file extension.')
+        parser.add_argument('--dry-run', action='store_true', help='Validate and report without saving.')
+        parser.add_argument('--batch-size', type=int, default=importer.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        fmt = options['format'] or path.suffix.lstrip('.').lower()
+        try:
+            rows = importer.parse_rows(path.read_text(encoding='utf-8-sig'), fmt)
+        except (OSError, importer.ImportFormatError) as e:
+            raise CommandError(str(e))
+
+        report = importer.import_products(rows, dry_run=options['dry_run'], batch_size=options['batch_size'])
+        if report['product_ids']:
+            products_changed.send(sender=Product, product_ids=report['product_ids'])
+
+        for error in report['errors']:
+            details = '; '.join(
+                f"{field}: {' '.join(str(m) for m in messages)}"
+                for field, messages in error['errors'].items()
+            )
+            self.stderr.write(f"Row {error['row']}: {details}")
+
+        suffix = ' (dry run, nothing saved)' if report['dry_run'] else ''
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {report['created']}, updated {report['updated']}, "
+            f"skipped {report['failed']} of {report['total_rows']} rows{suffix}."
+        ))
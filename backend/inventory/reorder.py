@@ -0,0 +1,129 @@
+"""Reorder suggestions from sales velocity.
+
+``refresh`` stores, per product (supabase/migrations/014):
+
+- ``units_per_day``: units sold per day over the last REORDER_VELOCITY_DAYS
+  (or since the product was added, if that's sooner), from the daily rollup;
+- ``reorder_point``: the stock that lasts REORDER_LEAD_TIME_DAYS plus
+  REORDER_SAFETY_DAYS at that rate, at or below which it's time to reorder;
+- ``order_up_to``: the stock to order up to, enough for the lead time plus
+  REORDER_COVER_DAYS.
+
+Runs incrementally from the ``inventory.tasks.refresh_reorder_suggestions``
+beat task: only products changed since the last run and products not
+recomputed for a day are updated. Every sale deducts its product's stock,
+which stamps the product with the sale's transaction id as its version
+(supabase/migrations/006). Each run records the xmin of its snapshot
+(``pg_snapshot_xmin``, as in product_changes) as the watermark: every
+transaction below it had finished, so a sale the run didn't see stamps its
+product at or above it and the next run, which picks products with a
+version at or above the watermark, recomputes it however late the sale
+commits (supabase/migrations/018).
+
+``suggestions`` joins the stored figures with live stock, so restocking
+shows up straight away.
+"""
+from django.conf import settings
+from django.db import connection, transaction
+
+LOCK_STATE_SQL = "SELECT last_version FROM reorder_state FOR UPDATE"
+
+# Products changed (or sold) since the last run, and products due for a
+# daily recompute
+DIRTY_PRODUCTS_SQL = """
+    SELECT id
+    FROM products
+    WHERE version >= %(last_version)s
+    UNION
+    SELECT product_id
+    FROM reorder_suggestions
+    WHERE computed_at < NOW() - INTERVAL '1 day'
+"""
+
+UPSERT_SUGGESTIONS_SQL = """
+    INSERT INTO reorder_suggestions AS r
+        (product_id, units_per_day, reorder_point, order_up_to, computed_at)
+    SELECT
+        p.id,
+        v.units_per_day,
+        CEIL(v.units_per_day * (%(lead_time)s + %(safety)s))::int,
+        CEIL(v.units_per_day * (%(lead_time)s + %(cover)s))::int,
+        NOW()
+    FROM products p
+    CROSS JOIN LATERAL (
+        SELECT COALESCE(SUM(d.items_sold), 0)::numeric
+            / GREATEST(1, LEAST(%(days)s, CURRENT_DATE - p.created_at::date + 1)) AS units_per_day
+        FROM sales_daily_rollup d
+        WHERE d.product_id = p.id AND d.sale_date > CURRENT_DATE - %(days)s::int
+    ) v
+    WHERE p.id = ANY(%(product_ids)s::int[])
+    ON CONFLICT (product_id) DO UPDATE SET
+        units_per_day = EXCLUDED.units_per_day,
+        reorder_point = EXCLUDED.reorder_point,
+        order_up_to = EXCLUDED.order_up_to,
+        computed_at = EXCLUDED.computed_at
+"""
+
+SUGGESTIONS_SQL = """
+    SELECT
+        p.id AS product_id,
+        p.name AS product_name,
+        p.category,
+        p.stock,
+        r.units_per_day,
+        ROUND(p.stock / r.units_per_day, 1) AS days_of_cover,
+        r.reorder_point,
+        GREATEST(r.order_up_to - p.stock, 0) AS reorder_quantity,
+        r.computed_at
+    FROM reorder_suggestions r
+    JOIN products p ON p.id = r.product_id
+    WHERE p.is_active = true
+      AND r.units_per_day > 0
+      AND p.stock <= r.reorder_point
+    ORDER BY days_of_cover ASC, p.id
+"""
+
+
+def dict_fetchall(cursor):
+    columns = [col[0] for col in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def refresh():
+    """Recompute suggestions for products sold since the last run.
+
+    Returns the number of products recomputed.
+    """
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            # One run at a time; a second one waits and finds little to do
+            cursor.execute(LOCK_STATE_SQL)
+            last_version = cursor.fetchone()[0]
+            # Every transaction below the snapshot's xmin has finished, so a
+            # sale this run misses stamps its product at or above it
+            cursor.execute("SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint")
+            version = cursor.fetchone()[0]
+
+            cursor.execute(DIRTY_PRODUCTS_SQL, {'last_version': last_version})
+            product_ids = [row[0] for row in cursor.fetchall()]
+
+            if product_ids:
+                cursor.execute(UPSERT_SUGGESTIONS_SQL, {
+                    'product_ids': product_ids,
+                    'days': settings.REORDER_VELOCITY_DAYS,
+                    'lead_time': settings.REORDER_LEAD_TIME_DAYS,
+                    'safety': settings.REORDER_SAFETY_DAYS,
+                    'cover': settings.REORDER_COVER_DAYS,
+                })
+
+            cursor.execute(
+                "UPDATE reorder_state SET last_version = %s, refreshed_at = NOW()",
+                [version]
+            )
+    return len(product_ids)
+
+
+def suggestions(cursor):
+    """Products at or below their reorder point, least days of cover first."""
+    cursor.execute(SUGGESTIONS_SQL)
+    return dict_fetchall(cursor)
@@ -0,0 +1,6 @@
+"""Inventory signals."""
+from django.dispatch import Signal
+
+# Sent after a product write made through the API has committed.
+# Receivers get ``product_ids``: the ids that were created, updated or deleted.
+products_changed = Signal()
@@ -0,0 +1,12 @@
+"""Periodic inventory tasks."""
+from celery import shared_task
+
+from soda_shop import dialect
+from . import reorder
+
+
+@shared_task(ignore_result=True)
+def refresh_reorder_suggestions():
+    """Recompute reorder suggestions for products sold since the last run."""
+    if dialect.is_postgres():
+        return reorder.refresh()
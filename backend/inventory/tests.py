@@ -0,0 +1,50 @@
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+
+from . import importer
+
+# Just the columns the importer touches; the real table comes from supabase/
+PRODUCTS_SQL = """
+    CREATE TABLE products (
+        id SERIAL PRIMARY KEY,
+        name VARCHAR(255) NOT NULL,
+        category TEXT NOT NULL DEFAULT 'Other',
+        price DECIMAL(10,2) NOT NULL,
+        cost_price DECIMAL(10,2),
+        stock INTEGER NOT NULL DEFAULT 0,
+        min_stock INTEGER NOT NULL DEFAULT 10,
+        image_url TEXT,
+        is_active BOOLEAN NOT NULL DEFAULT true,
+        updated_at TIMESTAMPTZ DEFAULT NOW()
+    )
+"""
+
+
+class ImportProductsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        with connection.cursor() as cursor:
+            cursor.execute(PRODUCTS_SQL)
+            cursor.execute("INSERT INTO products (name, category, price, stock) VALUES ('Coke 250ml', 'Cold Drink', 20, 5)")
+
+    def product(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT category, price, stock FROM products WHERE name = %s", [name])
+            return cursor.fetchone()
+
+    def test_update_with_blank_price_keeps_price(self):
+        rows = importer.parse_rows('name,category,price,stock\ncoke 250ml,,,40\n', 'csv')
+        report = importer.import_products(rows)
+
+        self.assertEqual((report['updated'], report['failed']), (1, 0))
+        self.assertEqual(self.product('Coke 250ml'), ('Cold Drink', Decimal('20.00'), 40))
+
+    def test_new_product_needs_a_price(self):
+        rows = importer.parse_rows('name,price,stock\nLays Classic,,10\n', 'csv')
+        report = importer.import_products(rows)
+
+        self.assertEqual((report['created'], report['failed']), (0, 1))
+        self.assertIn('price', report['errors'][0]['errors'])
+        self.assertIsNone(self.product('Lays Classic'))
@@ -3,8 +3,12 @@ from . import views
 
 urlpatterns = [
     path('products/', views.product_list, name='product_list'),
+    path('products/changes/', views.product_changes, name='product_changes'),
+    path('products/autocomplete/', views.product_autocomplete, name='product_autocomplete'),
+    path('products/import/', views.import_products, name='import_products'),
     path('products/<int:pk>/', views.product_detail, name='product_detail'),
     path('products/<int:pk>/stock/', views.adjust_stock, name='adjust_stock'),
     path('categories/', views.categories, name='categories'),
     path('low-stock/', views.low_stock_products, name='low_stock'),
+    path('reorder/', views.reorder_suggestions, name='reorder_suggestions'),
 ]
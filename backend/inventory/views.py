@@ -1,11 +1,21 @@
 """Inventory API views."""
+import hashlib
+
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from django.db import connection
-from accounts.permissions import IsAdminOrReadOnly
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils.cache import get_conditional_response, patch_cache_control
+from accounts.authentication import EdgeNodeAuthentication, SupabaseAuthentication
+from accounts.permissions import IsAdminOrReadOnly, IsAdminUser
+from soda_shop import dialect
+from soda_shop.routing import read_connection
+from . import autocomplete, importer, reorder
+from .models import Product
 from .serializers import ProductSerializer, StockAdjustmentSerializer
+from .signals import products_changed
 
 
 def dict_fetchall(cursor):
@@ -21,6 +31,34 @@ def dict_fetchone(cursor):
     return dict(zip(columns, row)) if row else None
 
 
+def catalog_etag(request, db=connection):
+    """Strong ETag for a product listing request.
+
+    Hashes the catalog's version fingerprint together with the path, query
+    string and response format, so it changes whenever any product does.
+    Read from ``db``, the database the listing itself is read from.
+    """
+    with db.cursor() as cursor:
+        cursor.execute("SELECT COUNT(*), COALESCE(SUM(version), 0), COALESCE(MAX(version), 0) FROM products")
+        fingerprint = cursor.fetchone()
+    key = f'{fingerprint}:{request.get_full_path()}:{request.accepted_renderer.format}'
+    return '"%s"' % hashlib.sha1(key.encode()).hexdigest()
+
+
+def with_etag(response, etag):
+    """Tag a listing response and make clients revalidate it before reuse."""
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def notify_products_changed(*product_ids):
+    """Send products_changed once the current transaction commits."""
+    transaction.on_commit(
+        lambda: products_changed.send(sender=Product, product_ids=list(product_ids))
+    )
+
+
 @api_view(['GET', 'POST'])
 @permission_classes([IsAdminOrReadOnly])
 def product_list(request):
@@ -44,21 +82,37 @@ def product_list(request):
             params.append(category)
         
         if search:
-            query += " AND name ILIKE %s"
-            params.append(f'%{search}%')
+            # Substring or fuzzy word match, both served by the trigram index
+            condition, search_params = dialect.name_search('name', search)
+            query += f" AND {condition}"
+            params.extend(search_params)
         
         if low_stock and low_stock.lower() == 'true':
             query += " AND stock < min_stock"
         
-        query += " ORDER BY name"
+        if search:
+            # Closest matches first
+            order_by, order_params = dialect.name_search_order('name', search)
+            query += f" ORDER BY {order_by}"
+            params.extend(order_params)
+        else:
+            query += " ORDER BY name"
         
         try:
-            with connection.cursor() as cursor:
+            db = read_connection(request)
+            # Read the version before the rows: a change committed in between
+            # only costs the client one extra download, never a stale 304
+            etag = catalog_etag(request, db)
+            not_modified = get_conditional_response(request, etag=etag)
+            if not_modified:
+                return with_etag(not_modified, etag)
+            
+            with db.cursor() as cursor:
                 cursor.execute(query, params)
                 products = dict_fetchall(cursor)
             
             serializer = ProductSerializer(products, many=True)
-            return Response(serializer.data)
+            return with_etag(Response(serializer.data), etag)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
@@ -88,6 +142,7 @@ def product_list(request):
                     )
                     product = dict_fetchone(cursor)
                 
+                notify_products_changed(product['id'])
                 return Response(ProductSerializer(product).data, status=status.HTTP_201_CREATED)
             except Exception as e:
                 return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -95,6 +150,115 @@ def product_list(request):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['GET'])
+@authentication_classes([SupabaseAuthentication, EdgeNodeAuthentication])
+@permission_classes([IsAuthenticated])
+def product_changes(request):
+    """Active products changed, and ids of products removed, since a version.
+
+    Without ``since`` the whole active catalog is returned. Clients pass the
+    returned ``version`` as ``since`` on their next call; a product may come
+    back twice across calls, but no change is ever skipped. Edge POS nodes
+    pull the catalog from here with their sync token.
+    """
+    since = request.query_params.get('since')
+    try:
+        since = int(since) if since is not None else None
+    except ValueError:
+        return Response({'error': 'since must be an integer version'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        with connection.cursor() as cursor:
+            # Every transaction below the snapshot's xmin has finished, so a
+            # change the queries below miss is stamped at or above it
+            cursor.execute("SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint")
+            version = cursor.fetchone()[0]
+            
+            if since is None:
+                cursor.execute("SELECT * FROM products WHERE is_active = true ORDER BY name")
+                products = dict_fetchall(cursor)
+                deleted = []
+            else:
+                cursor.execute(
+                    "SELECT * FROM products WHERE is_active = true AND version >= %s ORDER BY name",
+                    [since]
+                )
+                products = dict_fetchall(cursor)
+                cursor.execute(
+                    "SELECT product_id FROM product_tombstones WHERE version >= %s ORDER BY product_id",
+                    [since]
+                )
+                deleted = [row[0] for row in cursor.fetchall()]
+        
+        return Response({
+            'version': version,
+            'full': since is None,
+            'products': ProductSerializer(products, many=True).data,
+            'deleted': deleted,
+        })
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def product_autocomplete(request):
+    """Suggest active products whose name words start with the query words."""
+    query = request.query_params.get('q', '')
+    try:
+        limit = min(int(request.query_params.get('limit', 10)), 50)
+    except ValueError:
+        return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        products = autocomplete.get_index().search(query, limit=limit)
+        return Response(products)
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def import_products(request):
+    """Create or update many products from a CSV/JSON file or a JSON list.
+
+    Rows are matched to existing products by name (case-insensitive). Valid
+    rows are applied in one transaction; invalid ones are reported by row.
+    """
+    upload = request.FILES.get('file')
+    dry_run = request.query_params.get('dry_run', 'false').lower() == 'true'
+    
+    try:
+        if upload:
+            fmt = upload.name.rsplit('.', 1)[-1].lower()
+            rows = importer.parse_rows(upload.read().decode('utf-8-sig'), fmt)
+        elif isinstance(request.data, list):
+            rows = request.data
+        else:
+            rows = request.data.get('products')
+            if not isinstance(rows, list):
+                raise importer.ImportFormatError('Send a CSV/JSON file as "file" or a JSON list of products')
+        if not all(isinstance(row, dict) for row in rows):
+            raise importer.ImportFormatError('Every product row must be an object')
+    except (importer.ImportFormatError, UnicodeDecodeError) as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    if len(rows) > settings.PRODUCT_IMPORT_MAX_ROWS:
+        return Response(
+            {'error': f'Too many rows: {len(rows)}. Maximum is {settings.PRODUCT_IMPORT_MAX_ROWS}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        report = importer.import_products(rows, dry_run=dry_run)
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    if report['product_ids']:
+        notify_products_changed(*report['product_ids'])
+    return Response(report)
+
+
 @api_view(['GET', 'PUT', 'DELETE'])
 @permission_classes([IsAdminOrReadOnly])
 def product_detail(request, pk):
@@ -143,6 +307,7 @@ def product_detail(request, pk):
                     )
                     updated_product = dict_fetchone(cursor)
                 
+                notify_products_changed(pk)
                 return Response(ProductSerializer(updated_product).data)
             except Exception as e:
                 return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -153,6 +318,7 @@ def product_detail(request, pk):
         try:
             with connection.cursor() as cursor:
                 cursor.execute("DELETE FROM products WHERE id = %s", [pk])
+            notify_products_changed(pk)
             return Response(status=status.HTTP_204_NO_CONTENT)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -169,32 +335,30 @@ def adjust_stock(request, pk):
         
         try:
             with connection.cursor() as cursor:
-                # Check current stock
-                cursor.execute("SELECT stock FROM products WHERE id = %s", [pk])
-                row = cursor.fetchone()
-                
-                if not row:
-                    return Response({'error': 'Product not found'}, status=status.HTTP_404_NOT_FOUND)
-                
-                current_stock = row[0]
-                new_stock = current_stock + adjustment
-                
-                if new_stock < 0:
-                    return Response(
-                        {'error': f'Insufficient stock. Current: {current_stock}, Adjustment: {adjustment}'},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-                
+                # Apply the adjustment only if stock stays non-negative
                 cursor.execute(
                     """
-                    UPDATE products SET stock = %s, updated_at = NOW()
-                    WHERE id = %s
+                    UPDATE products SET stock = stock + %s, updated_at = NOW()
+                    WHERE id = %s AND stock + %s >= 0
                     RETURNING *
                     """,
-                    [new_stock, pk]
+                    [adjustment, pk, adjustment]
                 )
                 product = dict_fetchone(cursor)
+                
+                if not product:
+                    cursor.execute("SELECT stock FROM products WHERE id = %s", [pk])
+                    row = cursor.fetchone()
+                    
+                    if not row:
+                        return Response({'error': 'Product not found'}, status=status.HTTP_404_NOT_FOUND)
+                    
+                    return Response(
+                        {'error': f'Insufficient stock. Current: {row[0]}, Adjustment: {adjustment}'},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
             
+            notify_products_changed(pk)
             return Response(ProductSerializer(product).data)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -215,7 +379,13 @@ def categories(request):
 def low_stock_products(request):
     """Get products with low stock."""
     try:
-        with connection.cursor() as cursor:
+        db = read_connection(request)
+        etag = catalog_etag(request, db)
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified:
+            return with_etag(not_modified, etag)
+        
+        with db.cursor() as cursor:
             cursor.execute(
                 """
                 SELECT * FROM products 
@@ -225,6 +395,19 @@ def low_stock_products(request):
             )
             products = dict_fetchall(cursor)
         
-        return Response(ProductSerializer(products, many=True).data)
+        return with_etag(Response(ProductSerializer(products, many=True).data), etag)
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def reorder_suggestions(request):
+    """Get products due for reordering, with days of cover and how many to order."""
+    try:
+        with read_connection(request).cursor() as cursor:
+            suggestions = reorder.suggestions(cursor)
+        
+        return Response(suggestions)
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
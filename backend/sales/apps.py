@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class SalesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'sales'
+
+    def ready(self):
+        from inventory.signals import products_changed
+        from . import cache
+
+        products_changed.connect(cache.invalidate, dispatch_uid='sales.cache.invalidate')
@@ -0,0 +1,148 @@
+"""Async versions of the sales report views, for the ASGI server.
+
+DRF 3.14 views are sync only, so ``async_api_view`` borrows an APIView for
+authentication, permissions, throttling and response rendering and awaits
+the view itself in between. Routed instead of the sync views in sales/views.py
+when ASYNC_REPORTS is on.
+"""
+from functools import wraps
+
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from accounts.authentication import SupabaseAuthentication
+from soda_shop import async_db
+from soda_shop.routing import aread_alias
+from . import cache as analytics_cache
+from . import reports
+from .timing import ServerTiming
+from .views import DASHBOARD_PARAMS, dashboard_params
+
+
+class AsyncReportView(APIView):
+    # Session auth would load the user from the database, which can't be
+    # done from the event loop; the dashboard only sends bearer tokens
+    authentication_classes = [SupabaseAuthentication]
+
+
+def async_api_view(view_func):
+    """Run an async GET view with the checks and rendering of ``@api_view``."""
+    @wraps(view_func)
+    async def wrapper(request, *args, **kwargs):
+        view = AsyncReportView()
+        view.args, view.kwargs = args, kwargs
+        request = view.initialize_request(request, *args, **kwargs)
+        view.request = request
+        view.headers = view.default_response_headers
+
+        try:
+            if request.method != 'GET':
+                view.http_method_not_allowed(request)
+            view.initial(request, *args, **kwargs)
+            response = await view_func(request, *args, **kwargs)
+        except Exception as exc:
+            response = view.handle_exception(exc)
+
+        return view.finalize_response(request, response, *args, **kwargs)
+    # Like APIView.as_view: CSRF is left to the authentication classes
+    return csrf_exempt(wrapper)
+
+
+@async_api_view
+@analytics_cache.cached_report('dashboard_stats')
+async def dashboard_stats(request):
+    """Get dashboard statistics."""
+    try:
+        using = await aread_alias(request, pins=[analytics_cache.REPLICA_PIN])
+        stats = await reports.adashboard_stats(using)
+
+        return Response(stats)
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@async_api_view
+@analytics_cache.cached_report('dashboard_full', **DASHBOARD_PARAMS)
+async def dashboard_full(request):
+    """Get every dashboard widget in one response.
+
+    The widgets are queried one after another on a single pooled
+    connection, so a page view holds one of the pool's connections rather
+    than one per query. Each widget's time is reported in the Server-Timing
+    header.
+    """
+    params = dashboard_params(request.query_params)
+    timing = ServerTiming()
+
+    try:
+        using = await aread_alias(request, pins=[analytics_cache.REPLICA_PIN])
+        with timing.time('total'):
+            async with async_db.connection(using) as conn:
+                stats = await timing.measure('stats', reports.adashboard_stats(using, conn))
+                best_sellers = await timing.measure(
+                    'best_sellers',
+                    reports.abest_sellers(params['best_sellers_days'], params['best_sellers_limit'], using, conn)
+                )
+                trend = await timing.measure('trend', reports.adaily_sales_trend(params['trend_days'], using, conn))
+                profit_loss = await timing.measure(
+                    'profit_loss', reports.aprofit_loss(params['profit_loss_days'], using, conn)
+                )
+
+        response = Response({
+            'stats': stats,
+            'best_sellers': best_sellers,
+            'trend': trend,
+            'profit_loss': profit_loss,
+        })
+        response['Server-Timing'] = timing.header()
+        return response
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@async_api_view
+@analytics_cache.cached_report('best_sellers', days=30, limit=5)
+async def best_sellers(request):
+    """Get top 5 best-selling products."""
+    days = int(request.query_params.get('days', 30))
+    limit = int(request.query_params.get('limit', 5))
+
+    try:
+        using = await aread_alias(request, pins=[analytics_cache.REPLICA_PIN])
+        best_sellers = await reports.abest_sellers(days, limit, using)
+
+        return Response(best_sellers)
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@async_api_view
+@analytics_cache.cached_report('daily_sales_trend', days=7)
+async def daily_sales_trend(request):
+    """Get daily sales trend for last N days."""
+    days = int(request.query_params.get('days', 7))
+
+    try:
+        using = await aread_alias(request, pins=[analytics_cache.REPLICA_PIN])
+        trend = await reports.adaily_sales_trend(days, using)
+
+        return Response(trend)
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@async_api_view
+@analytics_cache.cached_report('profit_loss_report', days=30)
+async def profit_loss_report(request):
+    """Get profit/loss report by category."""
+    days = int(request.query_params.get('days', 30))
+
+    try:
+        using = await aread_alias(request, pins=[analytics_cache.REPLICA_PIN])
+        report = await reports.aprofit_loss(days, using)
+
+        return Response(report)
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
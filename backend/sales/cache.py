@@ -0,0 +1,147 @@
+"""Result cache for the sales analytics endpoints.
+
+Responses are cached per endpoint and query params in the ``analytics``
+cache, Redis (ANALYTICS_CACHE_URL, or REDIS_URL by default) shared by every
+worker. Every key embeds a generation number; recording a sale or changing
+a product bumps the generation, which orphans all cached results at once.
+With ANALYTICS_CACHE_URL=locmem:// the cache and its generation are per
+process, so other workers keep serving results cached before a write until
+they expire; only use it with a single process. Entries also
+expire after ANALYTICS_CACHE_TTL seconds to cover writes made outside the
+API, such as sales inserted directly in Supabase.
+"""
+import asyncio
+import threading
+import time
+from collections import Counter
+from datetime import date
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.response import Response
+
+from soda_shop import routing
+
+GENERATION_KEY = 'analytics:generation'
+
+# Report reads pass this pin to soda_shop.routing: right after an
+# invalidation a lagging replica would get stale results cached under the
+# new generation, so they go to the primary for a while instead
+REPLICA_PIN = 'analytics'
+
+_lock = threading.Lock()
+_hits = Counter()
+_misses = Counter()
+
+
+def _cache():
+    return caches[settings.ANALYTICS_CACHE_ALIAS]
+
+
+def _new_generation():
+    # Start from the clock rather than 1 so a generation lost to eviction
+    # can't be reissued while entries keyed with it are still cached.
+    return int(time.time() * 1000)
+
+
+def _generation(cache):
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, _new_generation(), timeout=None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+async def _ageneration(cache):
+    generation = await cache.aget(GENERATION_KEY)
+    if generation is None:
+        await cache.aadd(GENERATION_KEY, _new_generation(), timeout=None)
+        generation = await cache.aget(GENERATION_KEY)
+    return generation
+
+
+def invalidate(**kwargs):
+    """Drop every cached analytics result. Usable as a signal receiver."""
+    cache = _cache()
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.add(GENERATION_KEY, _new_generation(), timeout=None)
+    routing.pin_to_primary(REPLICA_PIN)
+
+
+def stats():
+    """Hit/miss counters per endpoint for this process."""
+    with _lock:
+        endpoints = sorted(set(_hits) | set(_misses))
+        return {
+            endpoint: {'hits': _hits[endpoint], 'misses': _misses[endpoint]}
+            for endpoint in endpoints
+        }
+
+
+def _cached_response(data):
+    response = Response(data)
+    response['Server-Timing'] = 'cache;desc=hit'
+    return response
+
+
+def cached_report(endpoint, daily=False, **params):
+    """Cache a GET view's successful responses.
+
+    ``params`` names the query params that select a result, with the
+    default the view uses when a param is missing. A ``daily`` report only
+    reads days before today, so new sales don't invalidate it; it is kept
+    until the day changes or for ANALYTICS_DAILY_CACHE_TTL seconds. Works on
+    async views too.
+    """
+    def timeout():
+        return settings.ANALYTICS_DAILY_CACHE_TTL if daily else settings.ANALYTICS_CACHE_TTL
+
+    def cache_key(request, generation):
+        query = '&'.join(
+            f'{name}={request.query_params.get(name, default)}'
+            for name, default in sorted(params.items())
+        )
+        # Today's date is part of the key because the reports are relative to it
+        return f'analytics:{generation}:{endpoint}:{date.today()}:{query}'
+
+    def record(hit):
+        with _lock:
+            (_hits if hit else _misses)[endpoint] += 1
+
+    def decorator(view_func):
+        if asyncio.iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def async_wrapper(request, *args, **kwargs):
+                cache = _cache()
+                key = cache_key(request, 'daily' if daily else await _ageneration(cache))
+
+                data = await cache.aget(key)
+                record(hit=data is not None)
+                if data is not None:
+                    return _cached_response(data)
+
+                response = await view_func(request, *args, **kwargs)
+                if response.status_code == 200:
+                    await cache.aset(key, response.data, timeout=timeout())
+                return response
+            return async_wrapper
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            cache = _cache()
+            key = cache_key(request, 'daily' if daily else _generation(cache))
+
+            data = cache.get(key)
+            record(hit=data is not None)
+            if data is not None:
+                return _cached_response(data)
+
+            response = view_func(request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, response.data, timeout=timeout())
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,161 @@
+"""Checkout statements for single sales and carts.
+
+A single sale is one statement that locks the product only if enough stock
+remains and inserts the sale. A cart is checked out in two statements no
+matter how many lines it has: one that locks and fetches every product in
+the cart, and one multi-row INSERT into sales. In both cases stock is
+deducted by the statement-level ``after_sale_deduct_stock`` trigger
+(supabase/migrations/001).
+
+The edge SQLite store (edge/schema.sql) has no row locks, CTE inserts or
+arrays: there a checkout first takes the database write lock, then validates
+and inserts line by line, and a row trigger deducts the stock.
+"""
+from soda_shop import dialect
+
+# FOR UPDATE re-checks ``stock >= quantity`` against the latest row version
+# after waiting on a concurrent sale, so two terminals can't both take the
+# last units.
+SELL_SQL = """
+    WITH product AS (
+        SELECT id, name, price, cost_price
+        FROM products
+        WHERE id = %(product_id)s AND stock >= %(quantity)s
+        FOR UPDATE
+    ), sale AS (
+        INSERT INTO sales (product_id, quantity, unit_price, total_price, cost_price, profit, sale_date)
+        SELECT
+            id,
+            %(quantity)s,
+            price,
+            price * %(quantity)s,
+            COALESCE(cost_price, 0),
+            (price - COALESCE(cost_price, 0)) * %(quantity)s,
+            CURRENT_DATE
+        FROM product
+        RETURNING *
+    )
+    SELECT sale.*, product.name AS product_name
+    FROM sale JOIN product ON product.id = sale.product_id
+"""
+
+LOCK_PRODUCTS_SQL = """
+    SELECT id, name, price, cost_price, stock
+    FROM products
+    WHERE id = ANY(%s::int[])
+    ORDER BY id
+    FOR UPDATE
+"""
+
+INSERT_SALES_SQL = """
+    INSERT INTO sales (product_id, quantity, unit_price, total_price, cost_price, profit, sale_date)
+    SELECT product_id, quantity, unit_price, total_price, cost_price, profit, CURRENT_DATE
+    FROM unnest(
+        %s::int[], %s::int[], %s::numeric[], %s::numeric[], %s::numeric[], %s::numeric[]
+    ) WITH ORDINALITY AS cart(product_id, quantity, unit_price, total_price, cost_price, profit, line)
+    ORDER BY line
+    RETURNING *
+"""
+
+# Any write takes SQLite's database lock until commit, serializing
+# checkouts the way FOR UPDATE does on Postgres. This one changes nothing.
+SQLITE_WRITE_LOCK_SQL = "UPDATE products SET stock = stock WHERE id IS NULL"
+
+SQLITE_INSERT_SALE_SQL = """
+    INSERT INTO sales (product_id, quantity, unit_price, total_price, cost_price, profit, sale_date)
+    VALUES (%s, %s, %s, %s, %s, %s, CURRENT_DATE)
+    RETURNING *
+"""
+
+
+def _rows_as_dicts(cursor):
+    columns = [col[0] for col in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def sell(cursor, product_id, quantity):
+    """Record a single sale if enough stock remains.
+
+    Returns the sale row with ``product_name``, or None when the product is
+    missing or short on stock; callers look up which one on that path only.
+    """
+    if not dialect.is_postgres():
+        return _sell_sqlite(cursor, product_id, quantity)
+
+    cursor.execute(SELL_SQL, {'product_id': product_id, 'quantity': quantity})
+    rows = _rows_as_dicts(cursor)
+    return rows[0] if rows else None
+
+
+def _sell_sqlite(cursor, product_id, quantity):
+    try:
+        return checkout(cursor, [{'product_id': product_id, 'quantity': quantity}])[0]
+    except ValueError:
+        return None
+
+
+def checkout(cursor, items):
+    """Record a sale for every cart item and return the created sale rows.
+
+    Must run inside a transaction. Products are locked in id order so two
+    carts sharing products can't deadlock. Raises ValueError with the same
+    messages as the per-item checkout it replaces.
+    """
+    if not items:
+        return []
+
+    product_ids = sorted({item['product_id'] for item in items})
+    if dialect.is_postgres():
+        cursor.execute(LOCK_PRODUCTS_SQL, [product_ids])
+    else:
+        cursor.execute(SQLITE_WRITE_LOCK_SQL)
+        placeholders = ', '.join(['%s'] * len(product_ids))
+        cursor.execute(
+            f"SELECT id, name, price, cost_price, stock FROM products WHERE id IN ({placeholders})",
+            product_ids
+        )
+    products = {row['id']: row for row in _rows_as_dicts(cursor)}
+    lines = _cart_lines(products, items)
+
+    if dialect.is_postgres():
+        # One array per column, unnested server-side into one row per cart line.
+        cursor.execute(INSERT_SALES_SQL, [list(column) for column in zip(*lines)])
+        # Ids are assigned in insertion (cart) order.
+        sales = sorted(_rows_as_dicts(cursor), key=lambda sale: sale['id'])
+    else:
+        sales = []
+        for line in lines:
+            cursor.execute(SQLITE_INSERT_SALE_SQL, list(line))
+            sales.extend(_rows_as_dicts(cursor))
+
+    for sale in sales:
+        sale['product_name'] = products[sale['product_id']]['name']
+    return sales
+
+
+def _cart_lines(products, items):
+    """Price every cart item, raising ValueError if one can't be sold.
+
+    Validates in cart order against the stock left after earlier lines, so
+    a product appearing twice is checked the way the trigger deducts it.
+    """
+    remaining = {pid: product['stock'] for pid, product in products.items()}
+    lines = []
+    for item in items:
+        product_id = item['product_id']
+        quantity = item['quantity']
+        product = products.get(product_id)
+
+        if not product:
+            raise ValueError(f"Product {product_id} not found")
+
+        if remaining[product_id] < quantity:
+            raise ValueError(f"Insufficient stock for {product['name']}. Available: {remaining[product_id]}")
+        remaining[product_id] -= quantity
+
+        unit_price = float(product['price'])
+        total_price = unit_price * quantity
+        cost_price = float(product['cost_price']) if product['cost_price'] else 0
+        profit = total_price - (cost_price * quantity)
+        lines.append((product_id, quantity, unit_price, total_price, cost_price, profit))
+    return lines
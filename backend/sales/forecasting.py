@@ -0,0 +1,103 @@
+"""Demand forecasts for every active product at once.
+
+``load_history`` reads units sold per product and day over the last
+``weeks`` complete weeks from the daily rollup in one query, into a dense
+products × days NumPy matrix with zeros for days without sales. Both
+forecasts are then array operations over the whole matrix rather than a
+loop per product:
+
+- seasonal moving average: the mean of the same weekday across the weeks;
+- exponential smoothing: simple exponential smoothing (weight ``alpha`` on
+  the latest day) of each series with its weekday pattern taken out, which
+  is added back for the forecast day.
+
+Each gives the units expected tomorrow and over the next 7 days. History
+stops at yesterday, as today's sales are still coming in.
+"""
+from datetime import timedelta
+
+import numpy as np
+
+PRODUCTS_SQL = "SELECT id, name, category FROM products WHERE is_active = true ORDER BY id"
+
+HISTORY_SQL = """
+    SELECT product_id, sale_date, SUM(items_sold)
+    FROM sales_daily_rollup
+    WHERE sale_date >= %s AND sale_date < %s
+    GROUP BY product_id, sale_date
+"""
+
+
+def load_history(cursor, weeks, today):
+    """Active products and a (products, 7 * weeks) matrix of units sold.
+
+    Column 0 is the day ``weeks`` weeks before ``today``; the last column
+    is yesterday.
+    """
+    start = today - timedelta(weeks=weeks)
+    cursor.execute(PRODUCTS_SQL)
+    products = cursor.fetchall()
+    cursor.execute(HISTORY_SQL, [start, today])
+    rows = cursor.fetchall()
+
+    units = np.zeros((len(products), 7 * weeks))
+    if not products or not rows:
+        return products, units
+
+    product_ids = np.array([product[0] for product in products])
+    sale_product_ids, sale_dates, sold = zip(*rows)
+    sale_product_ids = np.array(sale_product_ids)
+    days = (np.array(sale_dates, dtype='datetime64[D]') - np.datetime64(start, 'D')).astype(int)
+
+    # Row of each sale's product; sales of inactive products are dropped
+    rows_at = np.searchsorted(product_ids, sale_product_ids).clip(max=len(product_ids) - 1)
+    active = product_ids[rows_at] == sale_product_ids
+    units[rows_at[active], days[active]] = np.array(sold, dtype=float)[active]
+    return products, units
+
+
+def smoothed_level(series, alpha):
+    """Last level of simple exponential smoothing of each row, seeded with its first value."""
+    days = series.shape[1]
+    # level = alpha * day + (1 - alpha) * previous level, unrolled into one weight per day
+    weights = alpha * (1 - alpha) ** np.arange(days - 1, -1, -1)
+    weights[0] = (1 - alpha) ** (days - 1)
+    return series @ weights
+
+
+def forecast(units, alpha):
+    """Tomorrow's and the next 7 days' units per row of a history matrix.
+
+    Returns a dict of arrays, one value per product.
+    """
+    products, days = units.shape
+    weeks = days // 7
+    # Column i of weekday_means is the weekday of history day i
+    weekday_means = units.reshape(products, weeks, 7).mean(axis=1)
+    weekday_effect = weekday_means - weekday_means.mean(axis=1, keepdims=True)
+    tomorrow = (days + 1) % 7
+
+    level = smoothed_level(units - np.tile(weekday_effect, weeks), alpha)
+    smoothed_days = np.clip(level[:, np.newaxis] + weekday_effect, 0, None)
+
+    return {
+        'tomorrow_moving_average': weekday_means[:, tomorrow],
+        'next_7_days_moving_average': weekday_means.sum(axis=1),
+        'tomorrow_smoothed': smoothed_days[:, tomorrow],
+        'next_7_days_smoothed': smoothed_days.sum(axis=1),
+        'last_7_days': units[:, -7:].sum(axis=1),
+    }
+
+
+def demand_forecast(cursor, weeks, alpha, today):
+    """Forecasts for every active product, biggest expected week first."""
+    products, units = load_history(cursor, weeks, today)
+    forecasts = forecast(units, alpha)
+
+    result = []
+    for i in np.argsort(-forecasts['next_7_days_smoothed'], kind='stable'):
+        product_id, name, category = products[i]
+        row = {'product_id': product_id, 'product_name': name, 'category': category}
+        row.update({field: round(float(values[i]), 2) for field, values in forecasts.items()})
+        result.append(row)
+    return result
@@ -0,0 +1,124 @@
+"""Idempotency-Key support for the sale creation endpoints.
+
+A request carrying an ``Idempotency-Key`` header claims the key with one
+INSERT on the (user_id, key) primary key, in the same transaction as the
+sale itself. A concurrent duplicate blocks on that insert until the first
+request commits, then finds the stored response and replays it; if the
+first request rolled back, the duplicate claims the key and runs. Server
+errors are never stored, so a retry after a 5xx runs again.
+
+Keys are kept for IDEMPOTENCY_KEY_TTL seconds and purged by the
+``sales.tasks.purge_idempotency_keys`` beat task.
+"""
+import hashlib
+import json
+from functools import wraps
+
+from django.conf import settings
+from django.db import connection, transaction
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from soda_shop import dialect
+
+HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+
+
+def request_fingerprint(request):
+    """Hash of what the request asks for, to catch a key reused for another sale."""
+    body = json.dumps(request.data, sort_keys=True, cls=JSONEncoder)
+    return hashlib.sha256(f'{request.method} {request.path}\n{body}'.encode()).hexdigest()
+
+
+def idempotent(view_func):
+    """Run a write view at most once per user and Idempotency-Key.
+
+    Goes under ``@api_view`` so the request is authenticated first. Requests
+    without the header run as before.
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return view_func(request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {'error': f'{HEADER} must be at most {MAX_KEY_LENGTH} characters'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        fingerprint = request_fingerprint(request)
+        # Supabase users have UUIDs, session users integer ids
+        user_id = str(request.user.id)
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                # Claim the key, or take over one that has expired
+                cursor.execute(
+                    f"""
+                    INSERT INTO idempotency_keys (user_id, key, request_hash, expires_at)
+                    VALUES (%s, %s, %s, {dialect.seconds_from_now()})
+                    ON CONFLICT (user_id, key) DO UPDATE
+                    SET request_hash = EXCLUDED.request_hash,
+                        status_code = NULL,
+                        response = NULL,
+                        created_at = {dialect.now()},
+                        expires_at = EXCLUDED.expires_at
+                    WHERE idempotency_keys.expires_at <= {dialect.now()}
+                    RETURNING 1
+                    """,
+                    [user_id, key, fingerprint, settings.IDEMPOTENCY_KEY_TTL]
+                )
+                claimed = cursor.fetchone()
+
+                if not claimed:
+                    cursor.execute(
+                        """
+                        SELECT request_hash, status_code, response FROM idempotency_keys
+                        WHERE user_id = %s AND key = %s
+                        """,
+                        [user_id, key]
+                    )
+                    request_hash, status_code, data = cursor.fetchone()
+                    if request_hash != fingerprint:
+                        return Response(
+                            {'error': f'{HEADER} was already used for a different request'},
+                            status=status.HTTP_422_UNPROCESSABLE_ENTITY
+                        )
+                    if isinstance(data, str):
+                        data = json.loads(data)
+                    response = Response(data, status=status_code)
+                    response[REPLAYED_HEADER] = 'true'
+                    return response
+
+            response = view_func(request, *args, **kwargs)
+
+            if response.status_code >= 500:
+                # Release the key along with anything the view wrote
+                transaction.set_rollback(True)
+                return response
+
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"""
+                    UPDATE idempotency_keys SET status_code = %s, response = {dialect.json_param()}
+                    WHERE user_id = %s AND key = %s
+                    """,
+                    [
+                        response.status_code,
+                        json.dumps(response.data, cls=JSONEncoder),
+                        user_id,
+                        key,
+                    ]
+                )
+        return response
+    return wrapper
+
+
+def purge_expired():
+    """Delete expired keys; returns how many were removed."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM idempotency_keys WHERE expires_at <= {dialect.now()}")
+        return cursor.rowcount
@@ -0,0 +1,101 @@
+"""Ingestion of sales recorded offline by edge POS nodes.
+
+Sales arrive in batches from ``edge.sync.push_sales``. Each carries the
+``edge_id`` it was given on the edge, and the unique index on
+``sales (edge_id, sale_date)`` (supabase/migrations/010) makes resending a
+batch a no-op.
+
+Edge sales already happened at the counter, so they are never rejected for
+stock. When other terminals sold the same units in the meantime, the
+product's stock is topped up by the shortfall before the insert (so the
+deduction trigger can't drive it negative) and the conflict is reported
+back for someone to recount. Sales of products since deleted centrally are
+kept without a product, like sales of any deleted product.
+"""
+
+LOCK_PRODUCTS_SQL = """
+    SELECT id, stock
+    FROM products
+    WHERE id = ANY(%s::int[])
+    ORDER BY id
+    FOR UPDATE
+"""
+
+INSERT_EDGE_SALES_SQL = """
+    INSERT INTO sales (
+        edge_id, product_id, quantity, unit_price, total_price, cost_price, profit, sale_date, created_at
+    )
+    SELECT *
+    FROM unnest(
+        %s::text[], %s::int[], %s::int[], %s::numeric[], %s::numeric[],
+        %s::numeric[], %s::numeric[], %s::date[], %s::timestamptz[]
+    )
+    ON CONFLICT (edge_id, sale_date) DO NOTHING
+"""
+
+
+def ingest(cursor, sales):
+    """Insert edge sales not seen before and return a report.
+
+    ``sales`` are validated EdgeSaleSerializer rows. Must run inside a
+    transaction; products are locked first, so a batch resent while the
+    first copy is still running waits for it and then finds its sales.
+    """
+    product_ids = sorted({sale['product_id'] for sale in sales})
+    cursor.execute(LOCK_PRODUCTS_SQL, [product_ids])
+    stock = dict(cursor.fetchall())
+
+    edge_ids = [sale['edge_id'] for sale in sales]
+    cursor.execute("SELECT edge_id FROM sales WHERE edge_id = ANY(%s::text[])", [edge_ids])
+    seen = {row[0] for row in cursor.fetchall()}
+
+    new_sales = []
+    for sale in sales:
+        if sale['edge_id'] not in seen:
+            seen.add(sale['edge_id'])
+            new_sales.append(sale)
+
+    sold = {}
+    for sale in new_sales:
+        sold[sale['product_id']] = sold.get(sale['product_id'], 0) + sale['quantity']
+
+    conflicts = []
+    for product_id, quantity in sorted(sold.items()):
+        if product_id not in stock:
+            conflicts.append({
+                'product_id': product_id, 'reason': 'product_missing',
+                'quantity': quantity, 'available': 0, 'topped_up': 0,
+            })
+        elif stock[product_id] < quantity:
+            shortfall = quantity - stock[product_id]
+            cursor.execute(
+                "UPDATE products SET stock = stock + %s, updated_at = NOW() WHERE id = %s",
+                [shortfall, product_id]
+            )
+            conflicts.append({
+                'product_id': product_id, 'reason': 'insufficient_stock',
+                'quantity': quantity, 'available': stock[product_id], 'topped_up': shortfall,
+            })
+
+    inserted = 0
+    if new_sales:
+        columns = [
+            [sale['edge_id'] for sale in new_sales],
+            [sale['product_id'] if sale['product_id'] in stock else None for sale in new_sales],
+            [sale['quantity'] for sale in new_sales],
+            [sale['unit_price'] for sale in new_sales],
+            [sale['total_price'] for sale in new_sales],
+            [sale.get('cost_price') for sale in new_sales],
+            [sale.get('profit') for sale in new_sales],
+            [sale['sale_date'] for sale in new_sales],
+            [sale['created_at'] for sale in new_sales],
+        ]
+        cursor.execute(INSERT_EDGE_SALES_SQL, columns)
+        inserted = cursor.rowcount
+
+    return {
+        'received': len(sales),
+        'inserted': inserted,
+        'duplicates': len(sales) - inserted,
+        'conflicts': conflicts,
+    }
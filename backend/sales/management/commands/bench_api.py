@@ -0,0 +1,418 @@
+"""Load-test every sales and inventory endpoint over HTTP.
+
+Drives a running server (runserver, gunicorn or uvicorn) with concurrent
+requests to each route in sales/urls.py and inventory/urls.py, and reports
+p50/p95/p99 latency and throughput per endpoint and overall. By default the
+endpoints are requested in one shuffled mix, as a busy shop would; with
+--isolated each endpoint is run on its own, which gives its throughput at
+that concurrency (in the mix, an endpoint's req/s is its share of the
+total). Results are saved as JSON, tagged with the git commit, so
+runs can be compared:
+
+    python manage.py generate_sales_data --products 2000 --sales 1000000
+    python manage.py bench_api --url http://127.0.0.1:8000 --concurrency 16 --requests 200
+    python manage.py bench_api --compare bench-results/<earlier run>.json
+
+Requests are signed with a token minted from SUPABASE_JWT_SECRET for the
+first admin profile (or --user-id), or --token is sent as is. The write
+endpoints record real sales and stock adjustments, so point it at a scratch
+database loaded by generate_sales_data, or pass --read-only. The ingest
+endpoint needs EDGE_SYNC_TOKEN and is skipped without it.
+"""
+import json
+import random
+import statistics
+import subprocess
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import jwt
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.urls import reverse
+
+from inventory import urls as inventory_urls
+from sales import urls as sales_urls
+
+AUTOCOMPLETE_TERMS = ['th', 'lay', 'cad', 'amul', 'mango', 'chips', 'pav', 'cola']
+IMPORT_ROWS = [
+    {'name': f'Bench Import {i}', 'category': 'Other', 'price': 10 + i, 'cost_price': 8 + i, 'stock': 100}
+    for i in range(20)
+]
+
+
+class Scenarios:
+    """One request per URL name: (method, path, requests keyword arguments).
+
+    ``None`` skips the endpoint for this run.
+    """
+
+    def __init__(self, product_ids, catalog_version, edge_token):
+        self.product_ids = product_ids
+        self.catalog_version = catalog_version
+        self.edge_token = edge_token
+
+    def product_id(self):
+        return random.choice(self.product_ids)
+
+    def sale_list(self):
+        return 'GET', reverse('sale_list'), {'params': {'page_size': 100}}
+
+    def sale_export(self):
+        yesterday = (datetime.now() - timedelta(days=1)).date().isoformat()
+        return 'GET', reverse('sale_export', kwargs={'fmt': 'csv'}), {'params': {'start_date': yesterday}}
+
+    def create_sale(self):
+        return 'POST', reverse('create_sale'), {'json': {'product_id': self.product_id(), 'quantity': 1}}
+
+    def bulk_sale(self):
+        items = [{'product_id': pid, 'quantity': 1} for pid in random.sample(self.product_ids, 3)]
+        return 'POST', reverse('bulk_sale'), {'json': {'items': items}}
+
+    def ingest_sales(self):
+        if not self.edge_token:
+            return None
+        now = datetime.now(timezone.utc)
+        sales = [{
+            'edge_id': uuid.uuid4().hex,
+            'product_id': self.product_id(),
+            'quantity': 1,
+            'unit_price': '20.00',
+            'total_price': '20.00',
+            'cost_price': '15.00',
+            'profit': '5.00',
+            'sale_date': now.date().isoformat(),
+            'created_at': now.isoformat(),
+        } for _ in range(10)]
+        return 'POST', reverse('ingest_sales'), {
+            'json': {'node': 'bench', 'sales': sales},
+            'headers': {'X-Edge-Token': self.edge_token},
+        }
+
+    def dashboard_stats(self):
+        return 'GET', reverse('dashboard_stats'), {}
+
+    def dashboard_full(self):
+        return 'GET', reverse('dashboard_full'), {}
+
+    def best_sellers(self):
+        return 'GET', reverse('best_sellers'), {'params': {'days': random.choice([7, 30])}}
+
+    def daily_trend(self):
+        return 'GET', reverse('daily_trend'), {'params': {'days': 30}}
+
+    def profit_loss(self):
+        return 'GET', reverse('profit_loss'), {'params': {'days': 30}}
+
+    def demand_forecast(self):
+        return 'GET', reverse('demand_forecast'), {}
+
+    def analytics_cache_stats(self):
+        return 'GET', reverse('analytics_cache_stats'), {}
+
+    def product_list(self):
+        return 'GET', reverse('product_list'), {}
+
+    def product_changes(self):
+        # A POS polling for changes since its last sync, not a full download
+        return 'GET', reverse('product_changes'), {'params': {'since': self.catalog_version}}
+
+    def product_autocomplete(self):
+        return 'GET', reverse('product_autocomplete'), {'params': {'q': random.choice(AUTOCOMPLETE_TERMS)}}
+
+    def import_products(self):
+        return 'POST', reverse('import_products'), {'json': {'products': IMPORT_ROWS}}
+
+    def product_detail(self):
+        return 'GET', reverse('product_detail', kwargs={'pk': self.product_id()}), {}
+
+    def adjust_stock(self):
+        return 'PATCH', reverse('adjust_stock', kwargs={'pk': self.product_id()}), {'json': {'adjustment': 1}}
+
+    def categories(self):
+        return 'GET', reverse('categories'), {}
+
+    def low_stock(self):
+        return 'GET', reverse('low_stock'), {}
+
+    def reorder_suggestions(self):
+        return 'GET', reverse('reorder_suggestions'), {}
+
+
+WRITE_ENDPOINTS = {'create_sale', 'bulk_sale', 'ingest_sales', 'import_products', 'adjust_stock'}
+
+
+def endpoint_names():
+    return [pattern.name for pattern in sales_urls.urlpatterns + inventory_urls.urlpatterns]
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def summarize(timings, errors, elapsed):
+    """Latency percentiles in ms and throughput for one endpoint or the whole run."""
+    timings = sorted(timings)
+    if not timings:
+        return {'requests': 0, 'errors': errors}
+    return {
+        'requests': len(timings),
+        'errors': errors,
+        'p50_ms': round(percentile(timings, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(timings, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(timings, 0.99) * 1000, 2),
+        'mean_ms': round(statistics.mean(timings) * 1000, 2),
+        'rps': round(len(timings) / elapsed, 1),
+    }
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ['git', 'status', '--porcelain', '--untracked-files=no'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown', False
+    return commit, bool(dirty)
+
+
+class Command(BaseCommand):
+    help = 'Concurrent HTTP load test of the sales and inventory endpoints, with p50/p95/p99 saved as JSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Base URL of the running server.')
+        parser.add_argument('--concurrency', type=int, default=16, help='Requests in flight at once.')
+        parser.add_argument('--requests', type=int, default=200, help='Timed requests per endpoint.')
+        parser.add_argument('--warmup', type=int, default=3, help='Untimed requests per endpoint first.')
+        parser.add_argument('--endpoints', default='', help='Comma-separated URL names to run (default all).')
+        parser.add_argument('--exclude', default='', help='Comma-separated URL names to leave out.')
+        parser.add_argument('--read-only', action='store_true', help='Leave out the endpoints that write.')
+        parser.add_argument('--isolated', action='store_true', help='Run each endpoint on its own, not mixed.')
+        parser.add_argument('--token', default='', help='Bearer token to send instead of minting one.')
+        parser.add_argument('--user-id', default='', help='Profile id to mint the token for (default first admin).')
+        parser.add_argument('--timeout', type=float, default=30, help='Per-request timeout in seconds.')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed for the request mix.')
+        parser.add_argument('--output', default='', help='Results file (default bench-results/<time>-<commit>.json).')
+        parser.add_argument('--compare', default='', help='Earlier results file to compare with.')
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+        names = self._endpoints(options)
+
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT id FROM products WHERE is_active = true ORDER BY stock DESC, id LIMIT 100")
+            product_ids = [row[0] for row in cursor.fetchall()]
+            cursor.execute("SELECT COUNT(*) FROM products")
+            product_count = cursor.fetchone()[0]
+            cursor.execute("SELECT COUNT(*) FROM sales")
+            sale_count = cursor.fetchone()[0]
+            cursor.execute("SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint")
+            catalog_version = cursor.fetchone()[0]
+        if len(product_ids) < 3:
+            raise CommandError('Need at least 3 active products; load some with generate_sales_data.')
+
+        scenarios = Scenarios(product_ids, catalog_version, settings.EDGE_SYNC_TOKEN)
+        skipped = [name for name in names if getattr(scenarios, name)() is None]
+        names = [name for name in names if name not in skipped]
+        if skipped:
+            self.stdout.write(f"Skipping {', '.join(skipped)} (not configured)")
+
+        base_url = options['url'].rstrip('/')
+        headers = {'Authorization': f'Bearer {options["token"] or self._mint_token(options["user_id"])}'}
+        self._check_server(base_url, headers, options['timeout'])
+
+        self._warmup(base_url, headers, scenarios, names, options)
+        if options['isolated']:
+            results, total = {}, None
+            for name in names:
+                results.update(self._run(base_url, headers, scenarios, [name], options)[0])
+        else:
+            results, total = self._run(base_url, headers, scenarios, names, options)
+
+        self._print(results, total)
+        commit, dirty = git_commit()
+        report = {
+            'commit': commit,
+            'dirty': dirty,
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'config': {
+                'url': base_url,
+                'concurrency': options['concurrency'],
+                'requests_per_endpoint': options['requests'],
+                'mode': 'isolated' if options['isolated'] else 'mixed',
+                'async_reports': settings.ASYNC_REPORTS,
+            },
+            'dataset': {'products': product_count, 'sales': sale_count},
+            'total': total,
+            'endpoints': results,
+        }
+        path = self._save(report, options['output'], commit)
+        self.stdout.write(self.style.SUCCESS(f'Saved {path}'))
+
+        if options['compare']:
+            self._compare(options['compare'], report)
+
+    def _endpoints(self, options):
+        names = endpoint_names()
+        missing = [name for name in names if not hasattr(Scenarios, name)]
+        if missing:
+            raise CommandError(f"No bench scenario for {', '.join(missing)}; add one to Scenarios.")
+
+        wanted = [name for name in options['endpoints'].split(',') if name]
+        excluded = {name for name in options['exclude'].split(',') if name}
+        unknown = [name for name in wanted + sorted(excluded) if name not in names]
+        if unknown:
+            raise CommandError(f"Unknown endpoints: {', '.join(unknown)}. Choose from {', '.join(names)}")
+        if options['read_only']:
+            excluded |= WRITE_ENDPOINTS
+
+        names = [name for name in (wanted or names) if name not in excluded]
+        if not names:
+            raise CommandError('No endpoints left to run.')
+        return names
+
+    def _mint_token(self, user_id):
+        if not settings.SUPABASE_JWT_SECRET:
+            raise CommandError('Set SUPABASE_JWT_SECRET (as on the server) or pass --token.')
+        if not user_id:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT id FROM profiles WHERE role = 'admin' ORDER BY created_at LIMIT 1")
+                row = cursor.fetchone()
+            if row is None:
+                raise CommandError('No admin profile to sign requests as; pass --user-id or --token.')
+            user_id = str(row[0])
+
+        claims = {
+            'sub': user_id,
+            'role': 'authenticated',
+            'exp': datetime.now(timezone.utc) + timedelta(hours=1),
+        }
+        if settings.SUPABASE_JWT_AUDIENCE:
+            claims['aud'] = settings.SUPABASE_JWT_AUDIENCE
+        return jwt.encode(claims, settings.SUPABASE_JWT_SECRET, algorithm='HS256')
+
+    def _check_server(self, base_url, headers, timeout):
+        try:
+            response = requests.get(base_url + reverse('categories'), headers=headers, timeout=timeout)
+        except requests.RequestException as e:
+            raise CommandError(f'Cannot reach {base_url}: {e}')
+        if response.status_code in (401, 403):
+            raise CommandError(f'{base_url} rejected the token ({response.status_code}): {response.text[:200]}')
+
+    def _warmup(self, base_url, headers, scenarios, names, options):
+        with requests.Session() as session:
+            for name in names:
+                for _ in range(options['warmup']):
+                    method, path, kwargs = getattr(scenarios, name)()
+                    try:
+                        session.request(method, base_url + path, headers={**headers, **kwargs.pop('headers', {})},
+                                        timeout=options['timeout'], **kwargs)
+                    except requests.RequestException:
+                        pass
+
+    def _run(self, base_url, headers, scenarios, names, options):
+        """Timed requests for ``names``, mixed in random order; returns (per endpoint, total)."""
+        workload = [name for name in names for _ in range(options['requests'])]
+        random.shuffle(workload)
+        sessions = threading.local()
+        timings = {name: [] for name in names}
+        errors = {name: 0 for name in names}
+        first_errors = {}
+        lock = threading.Lock()
+
+        def request(name):
+            session = getattr(sessions, 'session', None)
+            if session is None:
+                session = sessions.session = requests.Session()
+            method, path, kwargs = getattr(scenarios, name)()
+            request_headers = {**headers, **kwargs.pop('headers', {})}
+
+            start = time.perf_counter()
+            try:
+                response = session.request(method, base_url + path, headers=request_headers,
+                                           timeout=options['timeout'], **kwargs)
+                error = None if response.status_code < 400 else f'{response.status_code} {response.text[:200]}'
+            except requests.RequestException as e:
+                error = str(e)
+            elapsed = time.perf_counter() - start
+
+            with lock:
+                timings[name].append(elapsed)
+                if error:
+                    errors[name] += 1
+                    first_errors.setdefault(name, error)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            list(pool.map(request, workload))
+        elapsed = time.perf_counter() - start
+
+        for name, error in first_errors.items():
+            self.stderr.write(f'{name}: {errors[name]} errors, first: {error}')
+
+        results = {name: summarize(timings[name], errors[name], elapsed) for name in names}
+        total = summarize([t for values in timings.values() for t in values], sum(errors.values()), elapsed)
+        return results, total
+
+    def _print(self, results, total):
+        self.stdout.write(
+            f"{'endpoint':<22} {'requests':>8} {'errors':>6} {'p50 ms':>8} {'p95 ms':>8} "
+            f"{'p99 ms':>8} {'mean ms':>8} {'req/s':>8}"
+        )
+        rows = list(results.items()) + ([('total', total)] if total else [])
+        for name, stats in rows:
+            if not stats['requests']:
+                continue
+            self.stdout.write(
+                f"{name:<22} {stats['requests']:>8} {stats['errors']:>6} {stats['p50_ms']:>8.1f} "
+                f"{stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f} {stats['mean_ms']:>8.1f} {stats['rps']:>8.1f}"
+            )
+
+    def _save(self, report, output, commit):
+        if output:
+            path = Path(output)
+        else:
+            stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+            path = Path('bench-results') / f'{stamp}-{commit}.json'
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(report, indent=2) + '\n')
+        return path
+
+    def _compare(self, previous_path, report):
+        try:
+            previous = json.loads(Path(previous_path).read_text())
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Cannot read {previous_path}: {e}')
+
+        self.stdout.write(f"\nAgainst {previous['commit']} ({previous['timestamp']}):")
+        if previous.get('config') != report['config'] or previous.get('dataset') != report['dataset']:
+            self.stdout.write(self.style.WARNING('Runs used different settings or data; compare with care.'))
+        self.stdout.write(f"{'endpoint':<22} {'p95 ms':>17} {'change':>8} {'req/s':>17} {'change':>8}")
+        rows = list(report['endpoints'].items())
+        if report['total'] and previous.get('total'):
+            rows.append(('total', report['total']))
+        for name, stats in rows:
+            before = previous['total'] if name == 'total' else previous['endpoints'].get(name)
+            if not before or not before.get('requests') or not stats['requests']:
+                continue
+            self.stdout.write(
+                f"{name:<22} {before['p95_ms']:>8.1f} {stats['p95_ms']:>8.1f} "
+                f"{self._change(before['p95_ms'], stats['p95_ms']):>8} "
+                f"{before['rps']:>8.1f} {stats['rps']:>8.1f} {self._change(before['rps'], stats['rps']):>8}"
+            )
+
+    def _change(self, before, after):
+        return f'{(after - before) / before * 100:+.0f}%' if before else 'n/a'
@@ -0,0 +1,115 @@
+"""Benchmark cart checkout latency: per-item statements vs set-based checkout.
+
+Runs against the configured database inside a transaction that is rolled
+back, so no products or sales are left behind:
+
+    python manage.py bench_checkout --sizes 1,10,50 --iterations 30
+"""
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from sales.checkout import checkout
+
+
+def legacy_checkout(cursor, items):
+    """The original bulk_sale loop: one SELECT and one INSERT per cart line."""
+    created_sales = []
+    for item in items:
+        cursor.execute(
+            "SELECT id, name, price, cost_price, stock FROM products WHERE id = %s",
+            [item['product_id']]
+        )
+        columns = [col[0] for col in cursor.description]
+        product = dict(zip(columns, cursor.fetchone()))
+
+        unit_price = float(product['price'])
+        total_price = unit_price * item['quantity']
+        cost_price = float(product['cost_price']) if product['cost_price'] else 0
+        profit = total_price - (cost_price * item['quantity'])
+
+        cursor.execute(
+            """
+            INSERT INTO sales (product_id, quantity, unit_price, total_price, cost_price, profit, sale_date)
+            VALUES (%s, %s, %s, %s, %s, %s, CURRENT_DATE)
+            RETURNING *
+            """,
+            [item['product_id'], item['quantity'], unit_price, total_price, cost_price, profit]
+        )
+        columns = [col[0] for col in cursor.description]
+        sale = dict(zip(columns, cursor.fetchone()))
+        sale['product_name'] = product['name']
+        created_sales.append(sale)
+    return created_sales
+
+
+STRATEGIES = {
+    'per-item': legacy_checkout,
+    'set-based': checkout,
+}
+
+
+class Command(BaseCommand):
+    help = 'Compare per-cart checkout latency of the per-item and set-based strategies.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1,10,50', help='Comma-separated cart sizes.')
+        parser.add_argument('--iterations', type=int, default=30, help='Checkouts per size and strategy.')
+        parser.add_argument('--warmup', type=int, default=3, help='Untimed checkouts per size and strategy.')
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',')]
+        except ValueError:
+            raise CommandError('--sizes must be a comma-separated list of integers')
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                product_ids = self._create_products(cursor, max(sizes))
+
+                self.stdout.write(f"{'items':>6} {'strategy':>10} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9}")
+                for size in sizes:
+                    items = [{'product_id': pid, 'quantity': 1} for pid in product_ids[:size]]
+                    means = {}
+                    for name, strategy in STRATEGIES.items():
+                        timings = self._run(cursor, strategy, items, options['iterations'], options['warmup'])
+                        means[name] = statistics.mean(timings)
+                        self.stdout.write(
+                            f"{size:>6} {name:>10} {means[name]:>9.2f} "
+                            f"{statistics.median(timings):>9.2f} {_percentile(timings, 95):>9.2f}"
+                        )
+                    self.stdout.write(f"{'':>6} {'speedup':>10} {means['per-item'] / means['set-based']:>8.1f}x")
+
+            transaction.set_rollback(True)
+
+    def _create_products(self, cursor, count):
+        cursor.execute(
+            """
+            INSERT INTO products (name, category, price, cost_price, stock)
+            SELECT 'bench-checkout-' || g, 'Other', 20, 15, 1000000
+            FROM generate_series(1, %s) g
+            RETURNING id
+            """,
+            [count]
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+    def _run(self, cursor, strategy, items, iterations, warmup):
+        timings = []
+        for i in range(warmup + iterations):
+            sid = transaction.savepoint()
+            start = time.perf_counter()
+            strategy(cursor, items)
+            elapsed = (time.perf_counter() - start) * 1000
+            transaction.savepoint_rollback(sid)
+            if i >= warmup:
+                timings.append(elapsed)
+        return timings
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+    return ordered[index]
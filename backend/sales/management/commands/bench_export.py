@@ -0,0 +1,114 @@
+"""Check that the streaming sales export runs in flat memory.
+
+Streams synthetic sale rows generated by the database (nothing is written)
+through the same server-side cursor and encoders as /api/sales/export/,
+first for a tenth of ``--rows`` and then for all of them, and compares the
+process's peak resident memory after each run. Fails if the full run pushes
+the peak up by more than a few megabytes.
+
+By default the response goes out through Django's ASGI handler, as the
+Docker image serves it, with the stream ``export_rows`` picks for the
+ASYNC_REPORTS setting; ``--server wsgi`` iterates it the way a WSGI server
+does.
+
+    python manage.py bench_export --rows 3000000 --format csv
+    ASYNC_REPORTS=True python manage.py bench_export --server asgi
+"""
+import asyncio
+import resource
+import sys
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.http import StreamingHttpResponse
+
+from sales.export import EXPORT_CONTENT_TYPES, export_rows
+from soda_shop import async_db
+
+SYNTHETIC_SALES_SQL = """
+    SELECT
+        g AS id,
+        1 + g %% 500 AS product_id,
+        1 + g %% 5 AS quantity,
+        20.00::numeric(10,2) AS unit_price,
+        (20.00 * (1 + g %% 5))::numeric(10,2) AS total_price,
+        15.00::numeric(10,2) AS cost_price,
+        (5.00 * (1 + g %% 5))::numeric(10,2) AS profit,
+        (CURRENT_DATE - (g / 5000))::date AS sale_date,
+        now() - g * interval '1 second' AS created_at,
+        'Product ' || (1 + g %% 500) AS product_name,
+        'Cold Drink' AS category
+    FROM generate_series(1, %s) g
+"""
+
+# Allowed growth of peak RSS between the small and the full run
+MAX_GROWTH_BYTES = 16 * 1024 * 1024
+
+
+def peak_rss_bytes():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class Command(BaseCommand):
+    help = 'Stream millions of synthetic sales through the export encoder and check peak memory stays flat.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=3_000_000)
+        parser.add_argument('--format', choices=sorted(EXPORT_CONTENT_TYPES), default='csv')
+        parser.add_argument('--server', choices=['asgi', 'wsgi'], default='asgi')
+
+    def handle(self, *args, **options):
+        small = self._measure(max(1, options['rows'] // 10), options['format'], options['server'])
+        full = self._measure(options['rows'], options['format'], options['server'])
+
+        if full - small > MAX_GROWTH_BYTES:
+            hint = ''
+            if settings.ASYNC_REPORTS != (options['server'] == 'asgi'):
+                hint = f" (ASYNC_REPORTS={settings.ASYNC_REPORTS} doesn't match --server {options['server']})"
+            raise CommandError(
+                f'Peak RSS grew with row count: {small / 1e6:.1f} MB -> {full / 1e6:.1f} MB{hint}'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Peak RSS flat: {small / 1e6:.1f} MB -> {full / 1e6:.1f} MB'
+        ))
+
+    def _measure(self, rows, fmt, server):
+        response = StreamingHttpResponse(
+            export_rows(SYNTHETIC_SALES_SQL, [rows], fmt), content_type=EXPORT_CONTENT_TYPES[fmt]
+        )
+        start = time.perf_counter()
+        if server == 'asgi':
+            total_bytes = asyncio.run(self._send_asgi(response))
+        else:
+            total_bytes = sum(len(chunk) for chunk in response)
+            response.close()
+        elapsed = time.perf_counter() - start
+        peak = peak_rss_bytes()
+
+        self.stdout.write(
+            f'{rows:>10} rows  {total_bytes / 1e6:>8.1f} MB {fmt}  '
+            f'{rows / elapsed:>9.0f} rows/s  peak RSS {peak / 1e6:.1f} MB'
+        )
+        return peak
+
+    async def _send_asgi(self, response):
+        """Send ``response`` as the ASGI handler does; returns the body size."""
+        total_bytes = 0
+
+        async def send(message):
+            nonlocal total_bytes
+            total_bytes += len(message.get('body', b''))
+
+        try:
+            await ASGIHandler().send_response(response, send)
+        finally:
+            # As the handler closes it: on the thread a sync stream ran on
+            await sync_to_async(response.close, thread_sensitive=True)()
+            # Each run has its own event loop, and with it its own pool
+            await async_db.close_pools()
+        return total_bytes
@@ -0,0 +1,207 @@
+"""Load realistic synthetic products and sales into a local database.
+
+For benchmarking at scale (see bench_api): products get category-typical
+prices and margins, and sales follow a long-tailed product popularity,
+busier weekends and evenings, and a gentle growth trend over the period.
+Both tables are loaded with COPY, sales in chunks, so the stock and rollup
+triggers run once per chunk rather than once per sale; each product starts
+with enough stock to cover its generated sales plus some left over.
+
+    python manage.py generate_sales_data --products 2000 --sales 1000000 --days 365
+
+Refuses to run against a non-local database unless --allow-remote is given.
+Everything goes in one transaction; nothing is deleted first, so run it on
+an empty database for reproducible numbers.
+"""
+import time
+from datetime import datetime, time as dt_time, timedelta
+from zoneinfo import ZoneInfo
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from sales import cache as analytics_cache
+from sales import partitions, reports
+from soda_shop import dialect
+
+LOCAL_HOSTS = ('', 'localhost', '127.0.0.1', '::1')
+CHUNK_SIZE = 100_000
+
+# Category: (share of the catalog, price range, brands, items, sizes)
+CATALOG = {
+    'Cold Drink': (0.18, (10, 120), ['Thums Up', 'Sprite', 'Limca', 'Maaza', 'Frooti', 'Pepsi', 'Coca-Cola'],
+                   ['Soda', 'Lemon', 'Mango', 'Orange', 'Cola', 'Jeera'], ['200ml', '250ml', '500ml', '750ml', '1.25L', '2L']),
+    'Chips': (0.14, (5, 60), ['Lays', 'Bingo', 'Kurkure', 'Uncle Chipps', 'Balaji'],
+              ['Classic Salted', 'Masala', 'Tomato Tango', 'Cream & Onion', 'Peri Peri'], ['Small', 'Medium', 'Party Pack']),
+    'Bakery': (0.10, (10, 80), ['Britannia', 'Modern', 'Harvest Gold'],
+               ['Bread', 'Bun', 'Rusk', 'Cake', 'Cookies', 'Khari'], ['100g', '200g', '400g']),
+    'Chocolates': (0.12, (5, 200), ['Cadbury', 'Nestle', 'Amul', 'Ferrero'],
+                   ['Dairy Milk', 'KitKat', 'Munch', 'Dark', 'Silk', 'Fruit & Nut'], ['Mini', 'Regular', 'Family']),
+    'Ice Cream': (0.08, (10, 250), ['Amul', 'Kwality Walls', 'Havmor', 'Vadilal'],
+                  ['Vanilla', 'Chocolate', 'Kesar Pista', 'Butterscotch', 'Kulfi', 'Cone'], ['Cup', 'Stick', '500ml Tub']),
+    'Fast Food': (0.08, (20, 150), ['Shop'], ['Samosa', 'Vada Pav', 'Sandwich', 'Puff', 'Maggi', 'Frankie'],
+                  ['Single', 'Plate', 'Jumbo']),
+    'Grocery': (0.14, (10, 400), ['Tata', 'Aashirvaad', 'Fortune', 'Amul', 'Parle'],
+                ['Salt', 'Atta', 'Oil', 'Sugar', 'Tea', 'Biscuits', 'Butter'], ['100g', '500g', '1kg', '5kg']),
+    'Tobacco Items': (0.06, (5, 350), ['Gold Flake', 'Classic', 'Navy Cut'], ['Kings', 'Lights', 'Mint'],
+                      ['Single', 'Pack of 10', 'Pack of 20']),
+    'Battery': (0.04, (15, 300), ['Duracell', 'Eveready', 'Panasonic'], ['AA', 'AAA', '9V', 'Coin Cell'],
+                ['Single', 'Pack of 2', 'Pack of 4']),
+    'Other': (0.06, (5, 200), ['Generic'], ['Matchbox', 'Candle', 'Pen', 'Notebook', 'Tissue', 'Lighter'],
+              ['Single', 'Pack']),
+}
+
+# Share of a day's sales made in each hour (shop open 7:00 to 23:00)
+HOURLY = np.array([0, 0, 0, 0, 0, 0, 0, 2, 4, 5, 5, 5, 6, 6, 5, 5, 6, 7, 9, 10, 10, 8, 5, 2], dtype=float)
+QUANTITIES = np.array([1, 2, 3, 4, 6])
+QUANTITY_SHARES = np.array([0.62, 0.2, 0.1, 0.05, 0.03])
+
+
+class Command(BaseCommand):
+    help = 'Load synthetic products and sales with COPY for benchmarks at scale.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=2000, help='Products to create.')
+        parser.add_argument('--sales', type=int, default=1_000_000, help='Sales to create.')
+        parser.add_argument('--days', type=int, default=365, help='Days of history, ending today.')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed, for repeatable data.')
+        parser.add_argument('--allow-remote', action='store_true', help='Allow a non-local database.')
+
+    def handle(self, *args, **options):
+        if not dialect.is_postgres():
+            raise CommandError('Synthetic data is loaded with COPY, which needs PostgreSQL.')
+        host = connection.settings_dict['HOST'] or ''
+        if host not in LOCAL_HOSTS and not host.startswith('/') and not options['allow_remote']:
+            raise CommandError(f'{host} is not a local database; pass --allow-remote to load it anyway.')
+        if options['products'] < 1 or options['days'] < 1 or options['sales'] < 0:
+            raise CommandError('--products and --days must be positive and --sales not negative.')
+
+        rng = np.random.default_rng(options['seed'])
+        start = time.perf_counter()
+
+        product_count = options['products']
+        products = self._products(rng, product_count)
+        # Long-tailed popularity: a few products sell most of the units
+        popularity = 1 / np.arange(1, product_count + 1) ** 1.1
+        rng.shuffle(popularity)
+        sale_products = rng.choice(product_count, size=options['sales'], p=popularity / popularity.sum())
+        quantities = rng.choice(QUANTITIES, size=options['sales'], p=QUANTITY_SHARES)
+        # Enough stock for every generated sale, plus what's left on the shelf
+        sold = np.bincount(sale_products, weights=quantities, minlength=product_count).astype(int)
+        products['stock'] = sold + rng.integers(0, 300, size=product_count)
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                product_ids = self._copy_products(cursor, products)
+                self.stdout.write(f'Products: {len(product_ids)} in {time.perf_counter() - start:.1f}s')
+
+                today = timezone.localdate()
+                first_day = today - timedelta(days=options['days'] - 1)
+                if partitions.is_partitioned():
+                    cursor.execute(
+                        "SELECT ensure_sales_partitions(%s, 'sales', %s)",
+                        [settings.SALES_PARTITION_MONTHS_AHEAD, first_day]
+                    )
+
+                for offset in range(0, options['sales'], CHUNK_SIZE):
+                    chunk = slice(offset, offset + CHUNK_SIZE)
+                    self._copy_sales(
+                        cursor, rng, products, product_ids, sale_products[chunk], quantities[chunk],
+                        first_day, options['days']
+                    )
+                    done = min(offset + CHUNK_SIZE, options['sales'])
+                    self.stdout.write(f'Sales: {done} in {time.perf_counter() - start:.1f}s')
+
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE products, sales, sales_daily_rollup")
+            reports.refresh_best_sellers(cursor)
+        analytics_cache.invalidate()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Loaded {len(product_ids)} products and {options['sales']} sales "
+            f'in {time.perf_counter() - start:.1f}s.'
+        ))
+
+    def _products(self, rng, count):
+        categories = list(CATALOG)
+        shares = np.array([CATALOG[category][0] for category in categories])
+        picked = rng.choice(len(categories), size=count, p=shares / shares.sum())
+
+        names, category_names, prices = [], [], []
+        seen = {}
+        for i in picked:
+            category = categories[i]
+            _, (low, high), brands, items, sizes = CATALOG[category]
+            name = f'{rng.choice(brands)} {rng.choice(items)} {rng.choice(sizes)}'
+            seen[name] = seen.get(name, 0) + 1
+            names.append(name if seen[name] == 1 else f'{name} #{seen[name]}')
+            category_names.append(category)
+            prices.append(round(float(rng.uniform(low, high))))
+
+        prices = np.array(prices, dtype=float)
+        # Margins of 10-35%
+        cost_prices = np.round(prices * rng.uniform(0.65, 0.9, size=count), 2)
+        return {
+            'name': names,
+            'category': category_names,
+            'price': prices,
+            'cost_price': cost_prices,
+            'min_stock': rng.choice([5, 10, 20], size=count),
+        }
+
+    def _copy_products(self, cursor, products):
+        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM products")
+        last_id = cursor.fetchone()[0]
+
+        columns = zip(
+            products['name'], products['category'], products['price'], products['cost_price'],
+            products['stock'], products['min_stock']
+        )
+        with cursor.copy(
+            "COPY products (name, category, price, cost_price, stock, min_stock, is_active) FROM STDIN"
+        ) as copy:
+            for name, category, price, cost_price, stock, min_stock in columns:
+                copy.write_row((name, category, float(price), float(cost_price), int(stock), int(min_stock), True))
+
+        # Ids in insertion order, to line up with the generated columns
+        cursor.execute("SELECT id FROM products WHERE id > %s ORDER BY id", [last_id])
+        return np.array([row[0] for row in cursor.fetchall()])
+
+    def _copy_sales(self, cursor, rng, products, product_ids, sale_products, quantities, first_day, days):
+        count = len(sale_products)
+        # Later days are busier (growth) and weekends busier still
+        day_weights = 1 + 0.5 * np.arange(days) / days
+        weekdays = (np.arange(days) + first_day.weekday()) % 7
+        day_weights *= np.where(weekdays >= 5, 1.4, 1.0)
+        sale_days = rng.choice(days, size=count, p=day_weights / day_weights.sum())
+        seconds = rng.choice(24, size=count, p=HOURLY / HOURLY.sum()) * 3600 + rng.integers(0, 3600, size=count)
+
+        unit_prices = products['price'][sale_products]
+        cost_prices = products['cost_price'][sale_products]
+        categories = np.array(products['category'])[sale_products]
+        zone = ZoneInfo(settings.TIME_ZONE)
+        midnight = datetime.combine(first_day, dt_time(), tzinfo=zone)
+
+        with cursor.copy(
+            "COPY sales (product_id, category, quantity, unit_price, total_price, cost_price, profit, sale_date, "
+            "created_at) FROM STDIN"
+        ) as copy:
+            for i in range(count):
+                quantity = int(quantities[i])
+                unit_price = float(unit_prices[i])
+                cost_price = float(cost_prices[i])
+                day = int(sale_days[i])
+                copy.write_row((
+                    int(product_ids[sale_products[i]]),
+                    str(categories[i]),
+                    quantity,
+                    unit_price,
+                    round(unit_price * quantity, 2),
+                    cost_price,
+                    round((unit_price - cost_price) * quantity, 2),
+                    first_day + timedelta(days=day),
+                    midnight + timedelta(days=day, seconds=int(seconds[i])),
+                ))
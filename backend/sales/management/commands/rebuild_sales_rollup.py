@@ -0,0 +1,87 @@
+"""Rebuild sales_daily_rollup from the sales table.
+
+Use after backfilling or bulk-editing sales outside the API, or to repair
+the rollup for a date range:
+
+    python manage.py rebuild_sales_rollup
+    python manage.py rebuild_sales_rollup --start-date 2024-01-01 --end-date 2024-03-31
+
+Months whose sales were archived (recorded in sales_archived_months, see
+sales/partitions.py) are left alone: the rollup is all that's left of them.
+Sales are rolled up under the category stored with each sale, and sales
+whose product was deleted under product_id 0, as the triggers on sales do
+(supabase/migrations/017).
+"""
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+
+class Command(BaseCommand):
+    help = 'Recompute the daily sales rollup for all dates or a date range.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start-date', help='First sale date to rebuild (YYYY-MM-DD).')
+        parser.add_argument('--end-date', help='Last sale date to rebuild (YYYY-MM-DD).')
+
+    def handle(self, *args, **options):
+        try:
+            start_date = date.fromisoformat(options['start_date']) if options['start_date'] else None
+            end_date = date.fromisoformat(options['end_date']) if options['end_date'] else None
+        except ValueError as e:
+            raise CommandError(f'Invalid date: {e}')
+
+        conditions = ""
+        params = []
+        if start_date:
+            conditions += " AND sale_date >= %s"
+            params.append(start_date)
+        if end_date:
+            conditions += " AND sale_date <= %s"
+            params.append(end_date)
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                # Hold off new sales so the triggers can't update rows mid-rebuild
+                cursor.execute("LOCK TABLE sales IN SHARE MODE")
+                # Archived months have no sales to rebuild from; keep their rows
+                cursor.execute("SELECT month FROM sales_archived_months ORDER BY month")
+                archived = [row[0] for row in cursor.fetchall()]
+                cursor.execute(
+                    f"""
+                    DELETE FROM sales_daily_rollup
+                    WHERE date_trunc('month', sale_date)::date <> ALL(%s::date[]){conditions}
+                    """,
+                    [archived] + params
+                )
+                deleted = cursor.rowcount
+                cursor.execute(
+                    f"""
+                    INSERT INTO sales_daily_rollup
+                        (sale_date, product_id, category, items_sold, revenue, profit, transactions)
+                    SELECT
+                        sale_date,
+                        COALESCE(product_id, 0),
+                        category,
+                        SUM(quantity),
+                        SUM(total_price),
+                        COALESCE(SUM(profit), 0),
+                        COUNT(*)
+                    FROM sales
+                    WHERE sale_date IS NOT NULL{conditions}
+                    GROUP BY sale_date, COALESCE(product_id, 0), category
+                    """,
+                    params
+                )
+                inserted = cursor.rowcount
+
+        kept = [
+            month for month in archived
+            if (not start_date or month >= start_date.replace(day=1)) and (not end_date or month <= end_date)
+        ]
+        if kept:
+            self.stdout.write(f"Kept archived months: {', '.join(f'{month:%Y-%m}' for month in kept)}")
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt sales rollup: removed {deleted} rows, wrote {inserted} rows.'
+        ))
@@ -0,0 +1,125 @@
+"""Manage the monthly sales partitions and their archive.
+
+    python manage.py sales_partitions backfill --batch-size 10000
+    python manage.py sales_partitions list
+    python manage.py sales_partitions ensure --months-ahead 6
+    python manage.py sales_partitions archive --dry-run
+    python manage.py sales_partitions restore 2023-04
+
+``backfill`` is the step between supabase/migrations/011 and 012: it copies
+existing sales into sales_partitioned, one short transaction per batch of
+ids, while new sales are mirrored by the trigger. ``ensure`` and ``archive``
+do what the daily beat tasks do.
+"""
+from datetime import date
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from sales import partitions
+from soda_shop import dialect
+
+# Copies the next batch of sales after id %s; returns its last id and size
+BACKFILL_SQL = """
+    WITH batch AS (
+        SELECT * FROM sales WHERE id > %s ORDER BY id LIMIT %s
+    ), copied AS (
+        INSERT INTO sales_partitioned SELECT * FROM batch ON CONFLICT DO NOTHING
+    )
+    SELECT max(id), count(*) FROM batch
+"""
+
+
+def parse_month(value):
+    try:
+        return date.fromisoformat(f'{value}-01')
+    except ValueError:
+        raise CommandError(f'Invalid month {value!r}; use YYYY-MM.')
+
+
+class Command(BaseCommand):
+    help = 'Backfill, create, list, archive and restore monthly sales partitions.'
+
+    def add_arguments(self, parser):
+        subcommands = parser.add_subparsers(dest='action', required=True)
+
+        backfill = subcommands.add_parser('backfill', help='Copy existing sales into sales_partitioned.')
+        backfill.add_argument('--batch-size', type=int, default=10000, help='Sales copied per transaction.')
+
+        subcommands.add_parser('list', help='Show partitions and archived months.')
+
+        ensure = subcommands.add_parser('ensure', help='Create partitions for the coming months.')
+        ensure.add_argument('--months-ahead', type=int, help='Defaults to SALES_PARTITION_MONTHS_AHEAD.')
+
+        archive = subcommands.add_parser('archive', help='Archive partitions past SALES_ARCHIVE_AFTER_MONTHS.')
+        archive.add_argument('--dry-run', action='store_true', help='Only show what would be archived.')
+
+        restore = subcommands.add_parser('restore', help='Load an archived month back into sales.')
+        restore.add_argument('month', help='Month to restore (YYYY-MM).')
+
+    def handle(self, *args, **options):
+        if not dialect.is_postgres():
+            raise CommandError('Sales partitions need PostgreSQL.')
+        action = options['action']
+        if action != 'backfill' and not partitions.is_partitioned():
+            raise CommandError(
+                'sales is not partitioned yet; run supabase/migrations/011 and 012 first.'
+            )
+        getattr(self, f'_{action}')(options)
+
+    def _backfill(self, options):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT to_regclass('sales_partitioned') IS NOT NULL")
+            if not cursor.fetchone()[0]:
+                raise CommandError('sales_partitioned is missing; run supabase/migrations/011 first.')
+
+        last_id = 0
+        copied = 0
+        while True:
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    cursor.execute(BACKFILL_SQL, [last_id, options['batch_size']])
+                    batch_last_id, count = cursor.fetchone()
+            if not count:
+                break
+            last_id = batch_last_id
+            copied += count
+            self.stdout.write(f'Copied up to id {last_id} ({copied} sales)')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Backfilled {copied} sales; run supabase/migrations/012_sales_partition_swap.sql next.'
+        ))
+
+    def _list(self, options):
+        cutoff = partitions.archive_cutoff()
+        for month, estimate in partitions.partitions().items():
+            note = '  (due for archive)' if month < cutoff else ''
+            self.stdout.write(f'{month:%Y-%m}  ~{estimate} sales{note}')
+        for month, (sales, archive_file) in partitions.archived_months().items():
+            self.stdout.write(f'{month:%Y-%m}  {sales} sales archived to {archive_file}')
+
+    def _ensure(self, options):
+        created = partitions.ensure_partitions(options['months_ahead'])
+        self.stdout.write(self.style.SUCCESS(f'Created {created} partitions.'))
+
+    def _archive(self, options):
+        try:
+            archived = partitions.archive_partitions(dry_run=options['dry_run'])
+        except ImproperlyConfigured as e:
+            raise CommandError(str(e))
+        verb = 'Would archive' if options['dry_run'] else 'Archived'
+        for month, rows in archived.items():
+            self.stdout.write(f'{verb} {month:%Y-%m}: {rows} sales')
+        self.stdout.write(self.style.SUCCESS(f'{verb} {len(archived)} partitions.'))
+
+    def _restore(self, options):
+        month = parse_month(options['month'])
+        try:
+            restored = partitions.restore_month(month)
+        except (FileNotFoundError, ValueError, ImproperlyConfigured) as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(
+            f'Restored {restored} sales for {month:%Y-%m}; '
+            'the next archive run archives them again.'
+        ))
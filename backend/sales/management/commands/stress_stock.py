@@ -0,0 +1,108 @@
+"""Concurrent overselling stress test for the sale endpoints.
+
+Creates one product with ``--stock`` units, then has ``--threads`` workers
+sell it one unit at a time through the real view until every worker is
+refused for insufficient stock. Fails if more units were sold than were in
+stock, and reports throughput. The product and its sales are deleted at the
+end.
+
+    python manage.py stress_stock --threads 16 --stock 200
+"""
+import threading
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from accounts.authentication import SupabaseUser
+from sales import views
+
+ENDPOINTS = {
+    'create': ('/api/sales/create/', views.create_sale, lambda pid: {'product_id': pid, 'quantity': 1}),
+    'bulk': ('/api/sales/bulk/', views.bulk_sale, lambda pid: {'items': [{'product_id': pid, 'quantity': 1}]}),
+}
+
+
+class Command(BaseCommand):
+    help = 'Sell the last units of one product from many threads and check nothing is oversold.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--stock', type=int, default=200)
+        parser.add_argument('--endpoint', choices=sorted(ENDPOINTS), default='create')
+
+    def handle(self, *args, **options):
+        path, view, payload = ENDPOINTS[options['endpoint']]
+        stock = options['stock']
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO products (name, category, price, cost_price, stock)
+                VALUES (%s, 'Other', 20, 15, %s)
+                RETURNING id
+                """,
+                [f'stress-{uuid.uuid4().hex[:8]}', stock]
+            )
+            product_id = cursor.fetchone()[0]
+
+        factory = APIRequestFactory()
+        lock = threading.Lock()
+        results = {'sold': 0, 'refused': 0, 'errors': []}
+
+        def worker(n):
+            user = SupabaseUser({'sub': f'stress-{n}', 'email': f'stress-{n}@soda.shop'})
+            try:
+                while True:
+                    request = factory.post(path, payload(product_id), format='json')
+                    force_authenticate(request, user=user)
+                    response = view(request)
+                    with lock:
+                        if response.status_code == 201:
+                            results['sold'] += 1
+                        elif response.status_code == 400 and 'Insufficient stock' in str(response.data):
+                            results['refused'] += 1
+                            return
+                        else:
+                            results['errors'].append((response.status_code, response.data))
+                            return
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(options['threads'])]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT stock FROM products WHERE id = %s", [product_id])
+                final_stock = cursor.fetchone()[0]
+                cursor.execute("SELECT COALESCE(SUM(quantity), 0) FROM sales WHERE product_id = %s", [product_id])
+                units_recorded = cursor.fetchone()[0]
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute("DELETE FROM sales WHERE product_id = %s", [product_id])
+                cursor.execute("DELETE FROM products WHERE id = %s", [product_id])
+
+        attempts = results['sold'] + results['refused'] + len(results['errors'])
+        self.stdout.write(
+            f"{options['threads']} threads, {attempts} requests in {elapsed:.2f}s: "
+            f"{results['sold'] / elapsed:.1f} sales/s, {attempts / elapsed:.1f} requests/s"
+        )
+        self.stdout.write(
+            f"sold={results['sold']} refused={results['refused']} "
+            f"final_stock={final_stock} units_recorded={units_recorded}"
+        )
+
+        if results['errors']:
+            raise CommandError(f"Unexpected responses: {results['errors'][:5]}")
+        if results['sold'] != stock or units_recorded != stock or final_stock != 0:
+            raise CommandError(f'Stock mismatch: started with {stock}, sold {results["sold"]}, '
+                               f'recorded {units_recorded}, {final_stock} left')
+        self.stdout.write(self.style.SUCCESS('No overselling detected.'))
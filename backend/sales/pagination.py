@@ -0,0 +1,24 @@
+"""Opaque keyset cursors for paging through sales newest first.
+
+A cursor encodes the (created_at, id) of the last sale on a page; the next
+page starts strictly after it, so every page is one index range scan no
+matter how deep into history it is.
+"""
+import base64
+import json
+from datetime import datetime
+
+
+def encode_cursor(sale):
+    position = json.dumps([sale['created_at'].isoformat(), sale['id']])
+    return base64.urlsafe_b64encode(position.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return (created_at, id) from a cursor; raise ValueError if it's malformed."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, sale_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(sale_id)
+    except (TypeError, ValueError, UnicodeDecodeError) as e:
+        raise ValueError('Invalid cursor') from e
@@ -0,0 +1,210 @@
+"""Monthly partitions of the sales table and their cold archive.
+
+sales is range-partitioned by sale_date into one ``sales_YYYY_MM`` table per
+month (supabase/migrations/011 and 012), with ``sales_default`` catching
+dates outside all of them. Two daily beat tasks in sales/tasks.py keep it
+that way:
+
+- ``ensure_partitions`` creates the partitions for this month and the next
+  SALES_PARTITION_MONTHS_AHEAD months before any sale needs them.
+- ``archive_partitions`` writes every partition older than
+  SALES_ARCHIVE_AFTER_MONTHS to ``SALES_ARCHIVE_DIR/sales_YYYY_MM.csv.gz``,
+  then detaches and drops it. The daily rollup keeps those months' totals,
+  so dashboards and reports are unchanged; only the individual sales leave
+  the database. The file is then their only copy, so SALES_ARCHIVE_DIR has
+  no default and must be durable storage; archiving refuses to run
+  without it. Archived months are recorded in ``sales_archived_months``
+  (supabase/migrations/015) in the same transaction as the drop, so
+  anything that must not touch them can tell without seeing the files.
+
+``restore_month`` loads an archived month back as a partition when its
+sales are wanted again; it stays until the next archive run puts it back.
+"""
+import gzip
+import os
+import re
+from datetime import date
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, transaction
+
+from soda_shop import dialect
+
+PARTITION_NAME = re.compile(r'^sales_(\d{4})_(\d{2})$')
+COLUMN_NAME = re.compile(r'^[a-z_][a-z0-9_]*$')
+COPY_BLOCK_SIZE = 64 * 1024
+
+PARTITIONS_SQL = """
+    SELECT c.relname, c.reltuples::bigint
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = 'sales'::regclass
+    ORDER BY c.relname
+"""
+
+
+def partition_name(month):
+    return f'sales_{month:%Y_%m}'
+
+
+def add_months(month, months):
+    """First day of the month ``months`` after the month of ``month``."""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def archive_configured():
+    return bool(settings.SALES_ARCHIVE_DIR)
+
+
+def archive_dir():
+    """SALES_ARCHIVE_DIR as a path; raises ImproperlyConfigured while it's unset."""
+    if not archive_configured():
+        raise ImproperlyConfigured(
+            'SALES_ARCHIVE_DIR is not set; point it at durable storage before archiving sales.'
+        )
+    return Path(settings.SALES_ARCHIVE_DIR)
+
+
+def archive_path(month):
+    return archive_dir() / f'{partition_name(month)}.csv.gz'
+
+
+def is_partitioned():
+    """Whether sales has been switched to partitions (migration 012)."""
+    if not dialect.is_postgres():
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT relkind = 'p' FROM pg_class WHERE oid = 'sales'::regclass")
+        return cursor.fetchone()[0]
+
+
+def partitions():
+    """Attached monthly partitions as {month: estimated rows}, oldest first."""
+    with connection.cursor() as cursor:
+        cursor.execute(PARTITIONS_SQL)
+        rows = cursor.fetchall()
+
+    months = {}
+    for name, estimate in rows:
+        match = PARTITION_NAME.match(name)
+        if match:
+            months[date(int(match[1]), int(match[2]), 1)] = max(estimate, 0)
+    return months
+
+
+def archived_months():
+    """Archived months as {month: (sales, archive file name)}, oldest first."""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT month, sales, archive_file FROM sales_archived_months ORDER BY month")
+        return {month: (sales, archive_file) for month, sales, archive_file in cursor.fetchall()}
+
+
+def ensure_partitions(months_ahead=None):
+    """Create missing partitions up to ``months_ahead`` months out; returns how many."""
+    if months_ahead is None:
+        months_ahead = settings.SALES_PARTITION_MONTHS_AHEAD
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT ensure_sales_partitions(%s)", [months_ahead])
+            return cursor.fetchone()[0]
+
+
+def archive_cutoff():
+    """Partitions for months before this are archived."""
+    return add_months(date.today(), -settings.SALES_ARCHIVE_AFTER_MONTHS)
+
+
+def archive_month(month):
+    """Write a month's partition to its archive file, then drop it.
+
+    Returns the number of sales archived.
+    """
+    name = partition_name(month)
+    path = archive_path(month)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_name(f'{path.name}.partial')
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            # Detaching needs a moment alone with sales; give up rather than
+            # stall checkout behind a long report, and try again next run
+            cursor.execute(
+                "SELECT set_config('lock_timeout', %s, true)",
+                [f'{settings.SALES_ARCHIVE_LOCK_TIMEOUT}s']
+            )
+            # No late edge sale can land between the copy and the drop
+            cursor.execute(f'LOCK TABLE {name} IN SHARE MODE')
+            cursor.execute(f'SELECT count(*) FROM {name}')
+            rows = cursor.fetchone()[0]
+
+            with gzip.open(partial, 'wb') as archive:
+                with cursor.copy(f'COPY (SELECT * FROM {name} ORDER BY id) TO STDOUT WITH (FORMAT csv, HEADER)') as copy:
+                    for data in copy:
+                        archive.write(data)
+            os.replace(partial, path)
+
+            # Not CONCURRENTLY: that isn't allowed while sales has a default partition
+            cursor.execute(f'ALTER TABLE sales DETACH PARTITION {name}')
+            cursor.execute(f'DROP TABLE {name}')
+            cursor.execute(
+                """
+                INSERT INTO sales_archived_months (month, sales, archive_file)
+                VALUES (%s, %s, %s)
+                ON CONFLICT (month) DO UPDATE SET
+                    sales = EXCLUDED.sales,
+                    archive_file = EXCLUDED.archive_file,
+                    archived_at = NOW()
+                """,
+                [month, rows, path.name]
+            )
+
+    return rows
+
+
+def archive_partitions(dry_run=False):
+    """Archive every partition older than the cutoff; returns {month: sales}."""
+    cutoff = archive_cutoff()
+    if not dry_run:
+        archive_dir()
+    archived = {}
+    for month, estimate in partitions().items():
+        if month >= cutoff:
+            break
+        archived[month] = estimate if dry_run else archive_month(month)
+    return archived
+
+
+def restore_month(month):
+    """Load an archived month back into sales as a partition.
+
+    Goes straight into the partition, so the stock and rollup triggers on
+    sales don't count the sales a second time. Returns the number restored.
+    """
+    name = partition_name(month)
+    path = archive_path(month)
+    if not path.exists():
+        raise FileNotFoundError(f'No archive for {month:%Y-%m} at {path}')
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT create_sales_partition(%s)", [month])
+            if cursor.fetchone()[0] is None:
+                raise ValueError(f'{name} is already in the database')
+
+            with gzip.open(path, 'rb') as archive:
+                # Files archived before a column was added (e.g. category,
+                # which the insert trigger then fills in) don't have it
+                columns = archive.readline().decode().strip().split(',')
+                if not all(COLUMN_NAME.match(column) for column in columns):
+                    raise ValueError(f'{path} does not start with a header of sales columns')
+                with cursor.copy(f"COPY {name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)") as copy:
+                    while data := archive.read(COPY_BLOCK_SIZE):
+                        copy.write(data)
+
+            cursor.execute("DELETE FROM sales_archived_months WHERE month = %s", [month])
+            cursor.execute(f'SELECT count(*) FROM {name}')
+            return cursor.fetchone()[0]
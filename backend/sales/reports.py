@@ -0,0 +1,204 @@
+"""Dashboard and report queries.
+
+Daily figures come from ``sales_daily_rollup`` (supabase/migrations/002),
+which is kept current by triggers on sales, so these queries scale with the
+number of days and products rather than the number of sales. Best sellers
+for the BEST_SELLER_WINDOWS are read ready-ranked from the
+``best_sellers_windows`` materialized view (supabase/migrations/013), which
+the ``sales.tasks.refresh_best_sellers`` beat task refreshes.
+
+Each report has a sync form taking a Django cursor and an ``a``-prefixed
+async form for the ASGI views (sales/async_views.py), which runs the same
+SQL through soda_shop.async_db and issues independent queries concurrently,
+or one after another on the ``conn`` it is given.
+"""
+import asyncio
+from datetime import date, timedelta
+
+from django.db import DEFAULT_DB_ALIAS
+
+from soda_shop import async_db, dialect
+
+TODAY_TOTALS_SQL = """
+    SELECT
+        COALESCE(SUM(revenue), 0) as today_sales,
+        COALESCE(SUM(profit), 0) as today_profit,
+        COALESCE(SUM(items_sold), 0) as today_items_sold
+    FROM sales_daily_rollup
+    WHERE sale_date = CURRENT_DATE
+"""
+
+LOW_STOCK_COUNT_SQL = "SELECT COUNT(*) as count FROM products WHERE stock < min_stock AND is_active = true"
+
+ACTIVE_PRODUCTS_COUNT_SQL = "SELECT COUNT(*) as count FROM products WHERE is_active = true"
+
+DAILY_TREND_SQL = """
+    SELECT
+        sale_date as date,
+        COALESCE(SUM(revenue), 0) as total_sales,
+        COALESCE(SUM(profit), 0) as total_profit,
+        COALESCE(SUM(items_sold), 0)::bigint as items_sold
+    FROM sales_daily_rollup
+    WHERE sale_date >= CURRENT_DATE - %s::int
+    GROUP BY sale_date
+    ORDER BY sale_date ASC
+"""
+
+# By the category each sale was recorded under, including sales of products
+# since deactivated or deleted, so the totals match the other reports;
+# active products' categories are listed even without sales
+PROFIT_LOSS_SQL = """
+    SELECT
+        r.category,
+        COALESCE(SUM(r.revenue), 0) as total_revenue,
+        COALESCE(SUM(r.profit), 0) as total_profit,
+        COALESCE(SUM(r.items_sold), 0)::bigint as items_sold,
+        COALESCE(SUM(r.transactions), 0)::bigint as transactions
+    FROM (
+        SELECT category, revenue, profit, items_sold, transactions
+        FROM sales_daily_rollup
+        WHERE sale_date >= CURRENT_DATE - %s::int
+        UNION ALL
+        SELECT DISTINCT category, 0, 0, 0, 0
+        FROM products
+        WHERE is_active = true
+    ) r
+    GROUP BY r.category
+    ORDER BY total_profit DESC
+"""
+
+
+def dict_fetchall(cursor):
+    columns = [col[0] for col in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def dict_fetchone(cursor):
+    columns = [col[0] for col in cursor.description]
+    row = cursor.fetchone()
+    return dict(zip(columns, row)) if row else None
+
+
+def dashboard_stats(cursor):
+    """Today's totals plus product counts for the dashboard cards."""
+    cursor.execute(TODAY_TOTALS_SQL)
+    today_stats = dict_fetchone(cursor)
+
+    # Low stock count
+    cursor.execute(LOW_STOCK_COUNT_SQL)
+    low_stock = cursor.fetchone()[0]
+
+    # Total products
+    cursor.execute(ACTIVE_PRODUCTS_COUNT_SQL)
+    total_products = cursor.fetchone()[0]
+
+    return _dashboard_stats(today_stats, low_stock, total_products)
+
+
+async def adashboard_stats(using=DEFAULT_DB_ALIAS, conn=None):
+    # On a shared ``conn`` the queries still run one at a time
+    today_stats, low_stock, total_products = await asyncio.gather(
+        async_db.fetchone(TODAY_TOTALS_SQL, using=using, conn=conn),
+        async_db.fetchone(LOW_STOCK_COUNT_SQL, using=using, conn=conn),
+        async_db.fetchone(ACTIVE_PRODUCTS_COUNT_SQL, using=using, conn=conn),
+    )
+    return _dashboard_stats(today_stats, low_stock['count'], total_products['count'])
+
+
+def _dashboard_stats(today_stats, low_stock, total_products):
+    return {
+        'today_sales': float(today_stats['today_sales']),
+        'today_profit': float(today_stats['today_profit']),
+        'today_items_sold': int(today_stats['today_items_sold']),
+        'low_stock_count': low_stock,
+        'total_products': total_products
+    }
+
+
+# Day windows precomputed in best_sellers_windows
+BEST_SELLER_WINDOWS = (1, 7, 30, 90)
+
+WINDOW_BEST_SELLERS_SQL = """
+    SELECT product_id, product_name, category, total_sold, total_revenue
+    FROM best_sellers_windows
+    WHERE window_days = %s
+    ORDER BY total_sold DESC, product_id
+    LIMIT %s
+"""
+
+REFRESH_BEST_SELLERS_SQL = "REFRESH MATERIALIZED VIEW CONCURRENTLY best_sellers_windows"
+
+
+def _best_sellers_sql(days):
+    # No materialized views on SQLite (edge mode)
+    if days in BEST_SELLER_WINDOWS and dialect.is_postgres():
+        return WINDOW_BEST_SELLERS_SQL
+    return f"""
+        SELECT
+            p.id as product_id,
+            p.name as product_name,
+            p.category,
+            COALESCE(SUM(s.quantity), 0) as total_sold,
+            COALESCE(SUM(s.total_price), 0) as total_revenue
+        FROM products p
+        LEFT JOIN sales s ON p.id = s.product_id
+            AND s.sale_date >= {dialect.days_ago()}
+        WHERE p.is_active = true
+        GROUP BY p.id, p.name, p.category
+        ORDER BY total_sold DESC
+        LIMIT %s
+    """
+
+
+def best_sellers(cursor, days, limit):
+    """Top active products by units sold over the last ``days`` days."""
+    cursor.execute(_best_sellers_sql(days), [days, limit])
+    return dict_fetchall(cursor)
+
+
+async def abest_sellers(days, limit, using=DEFAULT_DB_ALIAS, conn=None):
+    return await async_db.fetchall(_best_sellers_sql(days), [days, limit], using, conn)
+
+
+def refresh_best_sellers(cursor):
+    """Recompute the precomputed best-seller windows without blocking readers."""
+    cursor.execute(REFRESH_BEST_SELLERS_SQL)
+
+
+def daily_sales_trend(cursor, days):
+    """Per-day totals for the last ``days`` days, with empty days filled in."""
+    cursor.execute(DAILY_TREND_SQL, [days])
+    return _fill_trend(dict_fetchall(cursor), days)
+
+
+async def adaily_sales_trend(days, using=DEFAULT_DB_ALIAS, conn=None):
+    return _fill_trend(await async_db.fetchall(DAILY_TREND_SQL, [days], using, conn), days)
+
+
+def _fill_trend(trend, days):
+    # Fill in missing dates with zeros
+    date_map = {str(d['date']): d for d in trend}
+    result = []
+    for i in range(days, -1, -1):
+        d = date.today() - timedelta(days=i)
+        d_str = str(d)
+        if d_str in date_map:
+            result.append(date_map[d_str])
+        else:
+            result.append({
+                'date': d_str,
+                'total_sales': 0,
+                'total_profit': 0,
+                'items_sold': 0
+            })
+    return result
+
+
+def profit_loss(cursor, days):
+    """Revenue, profit and volume per category over the last ``days`` days."""
+    cursor.execute(PROFIT_LOSS_SQL, [days])
+    return dict_fetchall(cursor)
+
+
+async def aprofit_loss(days, using=DEFAULT_DB_ALIAS, conn=None):
+    return await async_db.fetchall(PROFIT_LOSS_SQL, [days], using, conn)
@@ -27,6 +27,25 @@ class BulkSaleSerializer(serializers.Serializer):
     items = SaleCreateSerializer(many=True)
 
 
+class EdgeSaleSerializer(serializers.Serializer):
+    """Serializer for a sale pushed by an edge POS node."""
+    edge_id = serializers.CharField(max_length=64)
+    product_id = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1)
+    unit_price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    total_price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    cost_price = serializers.DecimalField(max_digits=10, decimal_places=2, required=False, allow_null=True)
+    profit = serializers.DecimalField(max_digits=10, decimal_places=2, required=False, allow_null=True)
+    sale_date = serializers.DateField()
+    created_at = serializers.DateTimeField()
+
+
+class EdgeSaleBatchSerializer(serializers.Serializer):
+    """Serializer for one batch of edge sales."""
+    node = serializers.CharField(max_length=100)
+    sales = EdgeSaleSerializer(many=True, allow_empty=False)
+
+
 class DashboardStatsSerializer(serializers.Serializer):
     """Serializer for dashboard statistics."""
     today_sales = serializers.DecimalField(max_digits=12, decimal_places=2)
@@ -0,0 +1,37 @@
+"""Periodic sales maintenance tasks."""
+from celery import shared_task
+from django.db import connection
+
+from soda_shop import dialect
+from . import idempotency, partitions, reports
+
+
+@shared_task(ignore_result=True)
+def purge_idempotency_keys():
+    """Delete Idempotency-Key responses past their expiry."""
+    return idempotency.purge_expired()
+
+
+@shared_task(ignore_result=True)
+def refresh_best_sellers():
+    """Refresh the precomputed best-seller windows."""
+    if dialect.is_postgres():
+        with connection.cursor() as cursor:
+            reports.refresh_best_sellers(cursor)
+
+
+@shared_task(ignore_result=True)
+def ensure_sales_partitions():
+    """Create the sales partitions for the coming months."""
+    if partitions.is_partitioned():
+        return partitions.ensure_partitions()
+
+
+@shared_task(ignore_result=True)
+def archive_sales_partitions():
+    """Move sales partitions past SALES_ARCHIVE_AFTER_MONTHS to archive files.
+
+    Off until SALES_ARCHIVE_DIR points at durable storage.
+    """
+    if partitions.archive_configured() and partitions.is_partitioned():
+        return {month.isoformat(): rows for month, rows in partitions.archive_partitions().items()}
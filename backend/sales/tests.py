@@ -0,0 +1,104 @@
+from django.db import connection
+from django.test import TestCase
+
+from . import ingest, reports
+from .serializers import EdgeSaleBatchSerializer
+
+# Just the columns ingest touches; the real tables come from supabase/
+TABLES_SQL = """
+    CREATE TABLE products (
+        id SERIAL PRIMARY KEY,
+        stock INTEGER NOT NULL DEFAULT 0,
+        updated_at TIMESTAMPTZ DEFAULT NOW()
+    );
+    CREATE TABLE sales (
+        id SERIAL PRIMARY KEY,
+        edge_id TEXT,
+        product_id INTEGER REFERENCES products(id) ON DELETE SET NULL,
+        quantity INTEGER NOT NULL,
+        unit_price DECIMAL(10,2) NOT NULL,
+        total_price DECIMAL(10,2) NOT NULL,
+        cost_price DECIMAL(10,2),
+        profit DECIMAL(10,2),
+        sale_date DATE NOT NULL,
+        created_at TIMESTAMPTZ NOT NULL,
+        UNIQUE (edge_id, sale_date)
+    );
+"""
+
+
+class IngestTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        with connection.cursor() as cursor:
+            cursor.execute(TABLES_SQL)
+            cursor.execute("INSERT INTO products (stock) VALUES (10) RETURNING id")
+            cls.product_id = cursor.fetchone()[0]
+
+    def batch(self, **fields):
+        sale = {
+            'edge_id': 'node-1:1',
+            'product_id': self.product_id,
+            'quantity': 2,
+            'unit_price': '20.00',
+            'total_price': '40.00',
+            'sale_date': '2026-10-01',
+            'created_at': '2026-10-01T10:00:00Z',
+            **fields,
+        }
+        serializer = EdgeSaleBatchSerializer(data={'node': 'node-1', 'sales': [sale]})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        return serializer.validated_data['sales']
+
+    def test_sale_without_cost_price_or_profit(self):
+        with connection.cursor() as cursor:
+            report = ingest.ingest(cursor, self.batch())
+            cursor.execute("SELECT cost_price, profit FROM sales WHERE edge_id = 'node-1:1'")
+            self.assertEqual(cursor.fetchall(), [(None, None)])
+        self.assertEqual(report['inserted'], 1)
+        self.assertEqual(report['conflicts'], [])
+
+    def test_resent_sale_is_a_duplicate(self):
+        with connection.cursor() as cursor:
+            ingest.ingest(cursor, self.batch(cost_price='15.00', profit='10.00'))
+            report = ingest.ingest(cursor, self.batch(cost_price='15.00', profit='10.00'))
+        self.assertEqual(report['inserted'], 0)
+        self.assertEqual(report['duplicates'], 1)
+
+
+class ProfitLossTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                CREATE TABLE products (
+                    id SERIAL PRIMARY KEY,
+                    category TEXT NOT NULL,
+                    is_active BOOLEAN DEFAULT true
+                );
+                CREATE TABLE sales_daily_rollup (
+                    sale_date DATE NOT NULL,
+                    product_id INTEGER NOT NULL,
+                    category TEXT NOT NULL,
+                    items_sold BIGINT NOT NULL,
+                    revenue DECIMAL(14,2) NOT NULL,
+                    profit DECIMAL(14,2) NOT NULL,
+                    transactions BIGINT NOT NULL
+                );
+                -- Recategorised from Snacks, and one deactivated
+                INSERT INTO products (id, category, is_active) VALUES
+                    (1, 'Cold Drink', true), (2, 'Grocery', false), (3, 'Chocolates', true);
+                INSERT INTO sales_daily_rollup VALUES
+                    (CURRENT_DATE, 1, 'Snacks', 2, 40, 10, 1),
+                    (CURRENT_DATE, 2, 'Grocery', 1, 100, 20, 1),
+                    (CURRENT_DATE, 0, 'Cold Drink', 3, 60, 15, 2);
+            """)
+
+    def test_grouped_by_the_category_sales_were_recorded_under(self):
+        with connection.cursor() as cursor:
+            rows = reports.profit_loss(cursor, 30)
+        by_category = {row['category']: row for row in rows}
+        self.assertEqual(set(by_category), {'Snacks', 'Grocery', 'Cold Drink', 'Chocolates'})
+        self.assertEqual(sum(row['total_revenue'] for row in rows), 200)
+        self.assertEqual(by_category['Cold Drink']['transactions'], 2)
+        self.assertEqual(by_category['Chocolates']['total_revenue'], 0)
@@ -0,0 +1,26 @@
+"""Server-Timing header for endpoints that report where their time went."""
+import time
+from contextlib import contextmanager
+
+
+class ServerTiming:
+    """Durations of named steps, rendered as a Server-Timing header value."""
+
+    def __init__(self):
+        self.entries = []
+
+    @contextmanager
+    def time(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.entries.append((name, (time.perf_counter() - start) * 1000))
+
+    async def measure(self, name, awaitable):
+        """Await ``awaitable`` and record how long it took."""
+        with self.time(name):
+            return await awaitable
+
+    def header(self):
+        return ', '.join(f'{name};dur={ms:.1f}' for name, ms in self.entries)
@@ -1,12 +1,21 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
+
+# Report views run on the async driver when served through soda_shop/asgi.py
+report_views = async_views if settings.ASYNC_REPORTS else views
 
 urlpatterns = [
     path('', views.sale_list, name='sale_list'),
+    path('export/<str:fmt>/', views.sale_export, name='sale_export'),
     path('create/', views.create_sale, name='create_sale'),
     path('bulk/', views.bulk_sale, name='bulk_sale'),
-    path('dashboard/', views.dashboard_stats, name='dashboard_stats'),
-    path('best-sellers/', views.best_sellers, name='best_sellers'),
-    path('daily-trend/', views.daily_sales_trend, name='daily_trend'),
-    path('profit-loss/', views.profit_loss_report, name='profit_loss'),
+    path('ingest/', views.ingest_sales, name='ingest_sales'),
+    path('dashboard/', report_views.dashboard_stats, name='dashboard_stats'),
+    path('dashboard/full/', report_views.dashboard_full, name='dashboard_full'),
+    path('best-sellers/', report_views.best_sellers, name='best_sellers'),
+    path('daily-trend/', report_views.daily_sales_trend, name='daily_trend'),
+    path('profit-loss/', report_views.profit_loss_report, name='profit_loss'),
+    path('forecast/', views.demand_forecast, name='demand_forecast'),
+    path('cache-stats/', views.analytics_cache_stats, name='analytics_cache_stats'),
 ]
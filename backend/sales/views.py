@@ -1,12 +1,30 @@
 """Sales API views."""
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from django.conf import settings
 from django.db import connection, transaction
-from datetime import date, timedelta
+from django.http import StreamingHttpResponse
+from datetime import date
+from functools import partial
+import json
+import zlib
+from accounts.authentication import EdgeNodeAuthentication
+from soda_shop import metrics
+from soda_shop.db import prepared_cursor
+from soda_shop.routing import read_connection
+from accounts.permissions import IsAdminUser, IsEdgeNode
+from . import cache as analytics_cache
+from . import forecasting, ingest, reports
+from .checkout import checkout, sell
+from .idempotency import idempotent
+from .export import EXPORT_CONTENT_TYPES, export_rows
+from .pagination import decode_cursor, encode_cursor
+from .timing import ServerTiming
 from .serializers import (
-    SaleSerializer, SaleCreateSerializer, BulkSaleSerializer,
+    SaleSerializer, SaleCreateSerializer, BulkSaleSerializer, EdgeSaleBatchSerializer,
     DashboardStatsSerializer, BestSellerSerializer, DailySalesSerializer
 )
 
@@ -22,48 +40,130 @@ def dict_fetchone(cursor):
     return dict(zip(columns, row)) if row else None
 
 
-@api_view(['GET'])
-@permission_classes([IsAuthenticated])
-def sale_list(request):
-    """List sales with optional date filtering."""
-    start_date = request.query_params.get('start_date')
-    end_date = request.query_params.get('end_date')
-    product_id = request.query_params.get('product_id')
+def report_connection(request):
+    """Connection for a cached report read: the replica unless pinned to the primary."""
+    return read_connection(request, pins=[analytics_cache.REPLICA_PIN])
+
+
+# Query params of /api/sales/dashboard/full/, with their defaults
+DASHBOARD_PARAMS = {
+    'best_sellers_days': 30,
+    'best_sellers_limit': 5,
+    'trend_days': 7,
+    'profit_loss_days': 30,
+}
+
+
+def dashboard_params(query_params):
+    return {name: int(query_params.get(name, default)) for name, default in DASHBOARD_PARAMS.items()}
+
+
+def sale_filters(query_params):
+    """Build the WHERE conditions for the sale list filters."""
+    start_date = query_params.get('start_date')
+    end_date = query_params.get('end_date')
+    product_id = query_params.get('product_id')
     
-    query = """
-        SELECT s.*, p.name as product_name, p.category
-        FROM sales s
-        LEFT JOIN products p ON s.product_id = p.id
-        WHERE 1=1
-    """
+    conditions = ""
     params = []
     
     if start_date:
-        query += " AND s.sale_date >= %s"
+        conditions += " AND s.sale_date >= %s"
         params.append(start_date)
     
     if end_date:
-        query += " AND s.sale_date <= %s"
+        conditions += " AND s.sale_date <= %s"
         params.append(end_date)
     
     if product_id:
-        query += " AND s.product_id = %s"
+        conditions += " AND s.product_id = %s"
         params.append(product_id)
     
-    query += " ORDER BY s.created_at DESC LIMIT 100"
+    return conditions, params
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def sale_list(request):
+    """List sales newest first with optional filtering and cursor pagination.
     
+    When more sales match, the response carries an X-Next-Cursor header (and
+    a Link rel="next" header) whose value is passed back as ?cursor=.
+    """
     try:
-        with connection.cursor() as cursor:
+        page_size = int(request.query_params.get('page_size', settings.SALES_PAGE_SIZE))
+    except ValueError:
+        return Response({'error': 'Invalid page_size'}, status=status.HTTP_400_BAD_REQUEST)
+    page_size = max(1, min(page_size, settings.SALES_MAX_PAGE_SIZE))
+    
+    conditions, params = sale_filters(request.query_params)
+    
+    cursor_param = request.query_params.get('cursor')
+    if cursor_param:
+        try:
+            created_at, sale_id = decode_cursor(cursor_param)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        conditions += " AND (s.created_at, s.id) < (%s, %s)"
+        params.extend([created_at, sale_id])
+    
+    query = f"""
+        SELECT s.*, p.name as product_name
+        FROM sales s
+        LEFT JOIN products p ON s.product_id = p.id
+        WHERE 1=1{conditions}
+        ORDER BY s.created_at DESC, s.id DESC
+        LIMIT %s
+    """
+    # One extra row tells us whether there is a next page
+    params.append(page_size + 1)
+    
+    try:
+        with read_connection(request).cursor() as cursor:
             cursor.execute(query, params)
             sales = dict_fetchall(cursor)
         
-        return Response(sales)
+        response = Response(sales[:page_size])
+        if len(sales) > page_size:
+            next_cursor = encode_cursor(sales[page_size - 1])
+            next_url = replace_query_param(request.build_absolute_uri(), 'cursor', next_cursor)
+            response['X-Next-Cursor'] = next_cursor
+            response['Link'] = f'<{next_url}>; rel="next"'
+        return response
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def sale_export(request, fmt):
+    """Stream every sale matching the sale list filters as CSV or NDJSON."""
+    if fmt not in EXPORT_CONTENT_TYPES:
+        return Response(
+            {'error': f"Unsupported export format '{fmt}'. Use one of: {', '.join(EXPORT_CONTENT_TYPES)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    conditions, params = sale_filters(request.query_params)
+    query = f"""
+        SELECT s.*, p.name as product_name
+        FROM sales s
+        LEFT JOIN products p ON s.product_id = p.id
+        WHERE 1=1{conditions}
+        ORDER BY s.created_at, s.id
+    """
+    
+    response = StreamingHttpResponse(
+        export_rows(query, params, fmt),
+        content_type=EXPORT_CONTENT_TYPES[fmt]
+    )
+    response['Content-Disposition'] = f'attachment; filename="sales-{date.today()}.{fmt}"'
+    return response
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@idempotent
 def create_sale(request):
     """Create a single sale."""
     serializer = SaleCreateSerializer(data=request.data)
@@ -74,41 +174,24 @@ def create_sale(request):
         
         try:
             with transaction.atomic():
-                with connection.cursor() as cursor:
-                    # Get product details
-                    cursor.execute(
-                        "SELECT id, name, price, cost_price, stock FROM products WHERE id = %s",
-                        [product_id]
-                    )
-                    product = dict_fetchone(cursor)
+                with prepared_cursor() as cursor:
+                    # Insert sale only if stock suffices (deduction handled by trigger)
+                    sale = sell(cursor, product_id, quantity)
                     
-                    if not product:
-                        return Response({'error': 'Product not found'}, status=status.HTTP_404_NOT_FOUND)
-                    
-                    if product['stock'] < quantity:
+                    if not sale:
+                        cursor.execute("SELECT stock FROM products WHERE id = %s", [product_id])
+                        row = cursor.fetchone()
+                        
+                        if not row:
+                            return Response({'error': 'Product not found'}, status=status.HTTP_404_NOT_FOUND)
+                        
                         return Response(
-                            {'error': f"Insufficient stock. Available: {product['stock']}"},
+                            {'error': f"Insufficient stock. Available: {row[0]}"},
                             status=status.HTTP_400_BAD_REQUEST
                         )
-                    
-                    # Calculate sale values
-                    unit_price = float(product['price'])
-                    total_price = unit_price * quantity
-                    cost_price = float(product['cost_price']) if product['cost_price'] else 0
-                    profit = total_price - (cost_price * quantity)
-                    
-                    # Insert sale (stock deduction handled by trigger)
-                    cursor.execute(
-                        """
-                        INSERT INTO sales (product_id, quantity, unit_price, total_price, cost_price, profit, sale_date)
-                        VALUES (%s, %s, %s, %s, %s, %s, CURRENT_DATE)
-                        RETURNING *
-                        """,
-                        [product_id, quantity, unit_price, total_price, cost_price, profit]
-                    )
-                    sale = dict_fetchone(cursor)
-                    sale['product_name'] = product['name']
                 
+                transaction.on_commit(analytics_cache.invalidate)
+                transaction.on_commit(partial(metrics.record_sales, 'pos', 1))
                 return Response(sale, status=status.HTTP_201_CREATED)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -118,52 +201,22 @@ def create_sale(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@idempotent
 def bulk_sale(request):
     """Create multiple sales (cart checkout)."""
     serializer = BulkSaleSerializer(data=request.data)
     
     if serializer.is_valid():
         items = serializer.validated_data['items']
-        created_sales = []
         
         try:
             with transaction.atomic():
-                with connection.cursor() as cursor:
-                    for item in items:
-                        product_id = item['product_id']
-                        quantity = item['quantity']
-                        
-                        # Get product
-                        cursor.execute(
-                            "SELECT id, name, price, cost_price, stock FROM products WHERE id = %s",
-                            [product_id]
-                        )
-                        product = dict_fetchone(cursor)
-                        
-                        if not product:
-                            raise ValueError(f"Product {product_id} not found")
-                        
-                        if product['stock'] < quantity:
-                            raise ValueError(f"Insufficient stock for {product['name']}. Available: {product['stock']}")
-                        
-                        # Calculate values
-                        unit_price = float(product['price'])
-                        total_price = unit_price * quantity
-                        cost_price = float(product['cost_price']) if product['cost_price'] else 0
-                        profit = total_price - (cost_price * quantity)
-                        
-                        # Insert sale
-                        cursor.execute(
-                            """
-                            INSERT INTO sales (product_id, quantity, unit_price, total_price, cost_price, profit, sale_date)
-                            VALUES (%s, %s, %s, %s, %s, %s, CURRENT_DATE)
-                            RETURNING *
-                            """,
-                            [product_id, quantity, unit_price, total_price, cost_price, profit]
-                        )
-                        sale = dict_fetchone(cursor)
-                        sale['product_name'] = product['name']
-                        created_sales.append(sale)
+                with prepared_cursor() as cursor:
+                    # Lock all cart products, then insert every line at once
+                    created_sales = checkout(cursor, items)
+                
+                transaction.on_commit(analytics_cache.invalidate)
+                transaction.on_commit(partial(metrics.record_cart, len(created_sales)))
             
             return Response({
                 'message': f'Successfully created {len(created_sales)} sales',
@@ -179,74 +232,104 @@ def bulk_sale(request):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['POST'])
+@authentication_classes([EdgeNodeAuthentication])
+@permission_classes([IsEdgeNode])
+def ingest_sales(request):
+    """Record a batch of sales pushed by an edge POS node (gzip JSON)."""
+    body = request.body
+    
+    if request.headers.get('Content-Encoding') == 'gzip':
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        try:
+            body = decompressor.decompress(body, settings.EDGE_INGEST_MAX_BYTES)
+        except zlib.error as e:
+            return Response({'error': f'Invalid gzip body: {e}'}, status=status.HTTP_400_BAD_REQUEST)
+        if decompressor.unconsumed_tail:
+            return Response({'error': 'Batch too large'}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+    
+    try:
+        payload = json.loads(body)
+    except ValueError as e:
+        return Response({'error': f'Invalid JSON: {e}'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    serializer = EdgeSaleBatchSerializer(data=payload)
+    if serializer.is_valid():
+        try:
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    report = ingest.ingest(cursor, serializer.validated_data['sales'])
+                
+                if report['inserted']:
+                    transaction.on_commit(analytics_cache.invalidate)
+                    transaction.on_commit(partial(metrics.record_sales, 'edge', report['inserted']))
+            
+            return Response(report)
+        except Exception as e:
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@analytics_cache.cached_report('dashboard_stats')
 def dashboard_stats(request):
     """Get dashboard statistics."""
     try:
-        with connection.cursor() as cursor:
-            # Today's stats
-            cursor.execute(
-                """
-                SELECT 
-                    COALESCE(SUM(total_price), 0) as today_sales,
-                    COALESCE(SUM(profit), 0) as today_profit,
-                    COALESCE(SUM(quantity), 0) as today_items_sold
-                FROM sales
-                WHERE sale_date = CURRENT_DATE
-                """
-            )
-            today_stats = dict_fetchone(cursor)
-            
-            # Low stock count
-            cursor.execute(
-                "SELECT COUNT(*) as count FROM products WHERE stock < min_stock AND is_active = true"
-            )
-            low_stock = cursor.fetchone()[0]
-            
-            # Total products
-            cursor.execute("SELECT COUNT(*) FROM products WHERE is_active = true")
-            total_products = cursor.fetchone()[0]
+        with report_connection(request).cursor() as cursor:
+            stats = reports.dashboard_stats(cursor)
         
-        return Response({
-            'today_sales': float(today_stats['today_sales']),
-            'today_profit': float(today_stats['today_profit']),
-            'today_items_sold': int(today_stats['today_items_sold']),
-            'low_stock_count': low_stock,
-            'total_products': total_products
+        return Response(stats)
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@analytics_cache.cached_report('dashboard_full', **DASHBOARD_PARAMS)
+def dashboard_full(request):
+    """Get every dashboard widget in one response, on one connection.
+    
+    Each widget's time is reported in the Server-Timing header.
+    """
+    params = dashboard_params(request.query_params)
+    timing = ServerTiming()
+    
+    try:
+        with timing.time('total'), report_connection(request).cursor() as cursor:
+            with timing.time('stats'):
+                stats = reports.dashboard_stats(cursor)
+            with timing.time('best_sellers'):
+                best_sellers = reports.best_sellers(cursor, params['best_sellers_days'], params['best_sellers_limit'])
+            with timing.time('trend'):
+                trend = reports.daily_sales_trend(cursor, params['trend_days'])
+            with timing.time('profit_loss'):
+                profit_loss = reports.profit_loss(cursor, params['profit_loss_days'])
+        
+        response = Response({
+            'stats': stats,
+            'best_sellers': best_sellers,
+            'trend': trend,
+            'profit_loss': profit_loss,
         })
+        response['Server-Timing'] = timing.header()
+        return response
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@analytics_cache.cached_report('best_sellers', days=30, limit=5)
 def best_sellers(request):
     """Get top 5 best-selling products."""
     days = int(request.query_params.get('days', 30))
     limit = int(request.query_params.get('limit', 5))
     
     try:
-        with connection.cursor() as cursor:
-            cursor.execute(
-                """
-                SELECT 
-                    p.id as product_id,
-                    p.name as product_name,
-                    p.category,
-                    COALESCE(SUM(s.quantity), 0) as total_sold,
-                    COALESCE(SUM(s.total_price), 0) as total_revenue
-                FROM products p
-                LEFT JOIN sales s ON p.id = s.product_id 
-                    AND s.sale_date >= CURRENT_DATE - INTERVAL '%s days'
-                WHERE p.is_active = true
-                GROUP BY p.id, p.name, p.category
-                ORDER BY total_sold DESC
-                LIMIT %s
-                """,
-                [days, limit]
-            )
-            best_sellers = dict_fetchall(cursor)
+        with report_connection(request).cursor() as cursor:
+            best_sellers = reports.best_sellers(cursor, days, limit)
         
         return Response(best_sellers)
     except Exception as e:
@@ -255,76 +338,68 @@ def best_sellers(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@analytics_cache.cached_report('daily_sales_trend', days=7)
 def daily_sales_trend(request):
     """Get daily sales trend for last N days."""
     days = int(request.query_params.get('days', 7))
     
     try:
-        with connection.cursor() as cursor:
-            cursor.execute(
-                """
-                SELECT 
-                    sale_date as date,
-                    COALESCE(SUM(total_price), 0) as total_sales,
-                    COALESCE(SUM(profit), 0) as total_profit,
-                    COALESCE(SUM(quantity), 0) as items_sold
-                FROM sales
-                WHERE sale_date >= CURRENT_DATE - INTERVAL '%s days'
-                GROUP BY sale_date
-                ORDER BY sale_date ASC
-                """,
-                [days]
-            )
-            trend = dict_fetchall(cursor)
-        
-        # Fill in missing dates with zeros
-        date_map = {str(d['date']): d for d in trend}
-        result = []
-        for i in range(days, -1, -1):
-            d = date.today() - timedelta(days=i)
-            d_str = str(d)
-            if d_str in date_map:
-                result.append(date_map[d_str])
-            else:
-                result.append({
-                    'date': d_str,
-                    'total_sales': 0,
-                    'total_profit': 0,
-                    'items_sold': 0
-                })
+        with report_connection(request).cursor() as cursor:
+            trend = reports.daily_sales_trend(cursor, days)
         
-        return Response(result)
+        return Response(trend)
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@analytics_cache.cached_report('profit_loss_report', days=30)
 def profit_loss_report(request):
     """Get profit/loss report by category."""
     days = int(request.query_params.get('days', 30))
     
     try:
-        with connection.cursor() as cursor:
-            cursor.execute(
-                """
-                SELECT 
-                    p.category,
-                    COALESCE(SUM(s.total_price), 0) as total_revenue,
-                    COALESCE(SUM(s.profit), 0) as total_profit,
-                    COALESCE(SUM(s.quantity), 0) as items_sold,
-                    COUNT(DISTINCT s.id) as transactions
-                FROM products p
-                LEFT JOIN sales s ON p.id = s.product_id 
-                    AND s.sale_date >= CURRENT_DATE - INTERVAL '%s days'
-                WHERE p.is_active = true
-                GROUP BY p.category
-                ORDER BY total_profit DESC
-                """,
-                [days]
-            )
-            report = dict_fetchall(cursor)
+        with report_connection(request).cursor() as cursor:
+            report = reports.profit_loss(cursor, days)
         
         return Response(report)
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@analytics_cache.cached_report(
+    'demand_forecast', daily=True, weeks=settings.FORECAST_WEEKS, alpha=settings.FORECAST_ALPHA
+)
+def demand_forecast(request):
+    """Get tomorrow's and next week's forecast demand for every active product."""
+    try:
+        weeks = int(request.query_params.get('weeks', settings.FORECAST_WEEKS))
+        alpha = float(request.query_params.get('alpha', settings.FORECAST_ALPHA))
+    except ValueError:
+        return Response({'error': 'weeks must be an integer and alpha a number'}, status=status.HTTP_400_BAD_REQUEST)
+    if not 1 <= weeks <= 52 or not 0 < alpha <= 1:
+        return Response({'error': 'weeks must be 1-52 and alpha in (0, 1]'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        today = date.today()
+        with report_connection(request).cursor() as cursor:
+            forecasts = forecasting.demand_forecast(cursor, weeks, alpha, today)
+        
+        return Response({
+            'date': today,
+            'weeks': weeks,
+            'alpha': alpha,
+            'products': forecasts,
+        })
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def analytics_cache_stats(request):
+    """Get analytics cache hit/miss counters for this worker process."""
+    return Response(analytics_cache.stats())
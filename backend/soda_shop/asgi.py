@@ -0,0 +1,6 @@
+"""ASGI config for soda_shop project."""
+import os
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'soda_shop.settings')
+application = get_asgi_application()
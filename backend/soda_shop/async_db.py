@@ -0,0 +1,86 @@
+"""Async Postgres access for the views served through soda_shop/asgi.py.
+
+Django's database layer is sync-only, so async views run their raw SQL on
+psycopg AsyncConnectionPools of their own, one per database alias, built
+from the same DATABASES settings. Independent queries each borrow a pooled
+connection, so ``asyncio.gather`` runs them at the same time instead of one
+after another on a single connection.
+Pass ``conn`` (from ``connection``) to run several queries on one
+connection instead, so a view doesn't hold many of the pool's connections
+at once.
+
+The pool belongs to the event loop that created it and lives as long as
+that loop, which only makes sense under an ASGI server; the async views are
+routed only when ASYNC_REPORTS is on (see sales/urls.py).
+"""
+import asyncio
+from contextlib import asynccontextmanager
+
+import psycopg
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool
+
+_pools = {}
+
+
+def connect_kwargs(using=DEFAULT_DB_ALIAS):
+    """Connection arguments of a configured database, for async connections."""
+    params = connections[using].get_connection_params()
+    # Same client-side binding as Django's psycopg backend
+    params['cursor_factory'] = psycopg.AsyncClientCursor
+    params['autocommit'] = True
+    return params
+
+
+async def get_pool(using=DEFAULT_DB_ALIAS):
+    """The running event loop's pool for ``using``, opened on first use."""
+    key = (asyncio.get_running_loop(), using)
+    pool = _pools.get(key)
+    if pool is None:
+        pool = _pools[key] = AsyncConnectionPool(
+            kwargs=connect_kwargs(using),
+            min_size=1,
+            max_size=settings.ASYNC_DB_POOL_SIZE,
+            check=AsyncConnectionPool.check_connection,
+            name=using,
+            open=False,
+        )
+    # Safe to call again on an open pool
+    await pool.open()
+    return pool
+
+
+def pools():
+    return list(_pools.values())
+
+
+async def close_pools():
+    """Close the running event loop's pools, e.g. before the loop ends."""
+    loop = asyncio.get_running_loop()
+    for key in [key for key in _pools if key[0] is loop]:
+        await _pools.pop(key).close()
+
+
+@asynccontextmanager
+async def connection(using=DEFAULT_DB_ALIAS):
+    """A pooled connection to ``using``, for several queries in a row."""
+    pool = await get_pool(using)
+    async with pool.connection() as conn:
+        yield conn
+
+
+async def fetchall(sql, params=None, using=DEFAULT_DB_ALIAS, conn=None):
+    """Run ``sql`` on ``conn`` or a pooled connection to ``using``; rows as dicts."""
+    if conn is None:
+        async with connection(using) as conn:
+            return await fetchall(sql, params, conn=conn)
+    async with conn.cursor(row_factory=dict_row) as cursor:
+        await cursor.execute(sql, params)
+        return await cursor.fetchall()
+
+
+async def fetchone(sql, params=None, using=DEFAULT_DB_ALIAS, conn=None):
+    rows = await fetchall(sql, params, using, conn)
+    return rows[0] if rows else None
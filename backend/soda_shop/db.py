@@ -0,0 +1,56 @@
+"""Pooled database connections and prepared hot-path statements.
+
+settings.DATABASES turns on Django's psycopg connection pool for Postgres,
+so requests reuse open connections instead of paying for TCP, TLS and auth
+on every request. ``pool_stats`` reports its size and waits.
+
+Django's cursors bind parameters client-side, and psycopg never prepares
+those queries. ``prepared_cursor`` returns a cursor that binds them
+server-side instead. psycopg then prepares each query on the connection
+once it has run DATABASE_PREPARE_THRESHOLD times (on the first run with
+the default of 0), and later runs skip parsing and planning. Only use it for
+the hot queries: server-side parameters aren't allowed everywhere
+client-side ones are, e.g. in DDL or as a tuple for IN.
+"""
+import time
+
+from django.db import connection, connections
+
+from soda_shop import async_db, dialect
+
+
+def prepared_cursor():
+    """A cursor whose queries psycopg prepares server-side; plain on SQLite."""
+    if not dialect.is_postgres():
+        return connection.cursor()
+
+    from django.db.backends.postgresql.base import ServerBindingCursor
+
+    connection.ensure_connection()
+    connection.validate_thread_sharing()
+    with connection.wrap_database_errors:
+        cursor = ServerBindingCursor(connection.connection)
+    # Wrapped like connection.cursor(), so query logging still sees it
+    if connection.queries_logged:
+        return connection.make_debug_cursor(cursor)
+    return connection.make_cursor(cursor)
+
+
+def pool_stats():
+    """Size and wait counters of this process's connection pools."""
+    stats = {}
+    for db in connections.all():
+        if db.vendor == 'postgresql' and db.pool is not None:
+            stats[db.alias] = db.pool.get_stats()
+    for pool in async_db.pools():
+        stats[f'async:{pool.name}'] = pool.get_stats()
+    return stats
+
+
+def check():
+    """Round-trip the database; returns the latency in milliseconds."""
+    start = time.perf_counter()
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
+    return (time.perf_counter() - start) * 1000
@@ -0,0 +1,58 @@
+"""SQL fragments that differ between Postgres and the edge SQLite store.
+
+Views and helpers that also serve the offline POS (EDGE_MODE) build their
+vendor-specific bits here instead of writing Postgres-only syntax inline.
+Each helper looks at the default connection and returns SQL with ``%s``
+placeholders, plus the params to go with them where there are any.
+"""
+from django.db import connection
+
+
+def is_postgres():
+    return connection.vendor == 'postgresql'
+
+
+def ilike(column):
+    """Case-insensitive LIKE. SQLite's LIKE already ignores ASCII case."""
+    return f"{column} ILIKE %s" if is_postgres() else f"{column} LIKE %s"
+
+
+def now():
+    return "NOW()" if is_postgres() else "CURRENT_TIMESTAMP"
+
+
+def days_ago():
+    """The date ``%s`` days before today."""
+    if is_postgres():
+        return "CURRENT_DATE - %s::int"
+    return "date('now', '-' || %s || ' days')"
+
+
+def seconds_from_now():
+    """The timestamp ``%s`` seconds from now."""
+    if is_postgres():
+        return "NOW() + make_interval(secs => %s)"
+    return "datetime('now', '+' || %s || ' seconds')"
+
+
+def json_param():
+    """Placeholder for a JSON-encoded string stored in a json column."""
+    return "%s::json" if is_postgres() else "%s"
+
+
+def name_search(column, term):
+    """WHERE condition and params matching ``term`` in ``column``.
+
+    Postgres adds a fuzzy word match served by the trigram index
+    (supabase/migrations/005); SQLite only does substring matches.
+    """
+    if is_postgres():
+        return f"({column} ILIKE %s OR %s <%% {column})", [f'%{term}%', term]
+    return ilike(column), [f'%{term}%']
+
+
+def name_search_order(column, term):
+    """ORDER BY clause and params ranking the closest ``term`` matches first."""
+    if is_postgres():
+        return f"{column} ILIKE %s DESC, word_similarity(%s, {column}) DESC, {column}", [f'{term}%', term]
+    return f"{ilike(column)} DESC, {column}", [f'{term}%']
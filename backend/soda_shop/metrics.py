@@ -0,0 +1,168 @@
+"""Prometheus metrics, served at /metrics.
+
+- ``soda_shop_request_duration_seconds``: latency histogram per view (URL
+  name) and method;
+- ``soda_shop_request_errors_total``: responses with a 4xx or 5xx status,
+  per view and status;
+- ``soda_shop_requests_throttled_total``: requests DRF throttling turned
+  away (429), per view;
+- ``soda_shop_db_pool_wait_seconds_total``, ``..._requests_total``,
+  ``..._queued_total`` and ``..._errors_total``: connection checkouts from
+  each pool, how many had to queue, for how long in total and how many
+  timed out; and ``soda_shop_db_pool_connections``, the pools' size,
+  idle connections and waiting requests;
+- ``soda_shop_sales_inserted_total`` per source (pos, cart, edge) and
+  ``soda_shop_carts_checked_out_total``, counted when the sale commits.
+  Per minute: ``rate(soda_shop_carts_checked_out_total[5m]) * 60``.
+
+Under gunicorn each worker is a separate process, so with
+PROMETHEUS_MULTIPROC_DIR set (gunicorn.conf.py sets it up) the values are
+kept in shared files and /metrics adds up every worker's, whichever worker
+serves the scrape. Recording a value is an in-memory update of a mapped
+file: no locks across processes and no I/O on the checkout path. Pool
+counters are copied from psycopg_pool's own stats at most once a second
+per worker.
+"""
+import hmac
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest,
+)
+from prometheus_client import multiprocess
+
+from soda_shop import db
+
+REQUEST_DURATION = Histogram(
+    'soda_shop_request_duration_seconds', 'Time to respond to a request.', ['view', 'method'],
+)
+REQUEST_ERRORS = Counter(
+    'soda_shop_request_errors_total', 'Responses with an error status.', ['view', 'status'],
+)
+REQUESTS_THROTTLED = Counter(
+    'soda_shop_requests_throttled_total', 'Requests rejected by rate limiting.', ['view'],
+)
+
+POOL_WAIT = Counter(
+    'soda_shop_db_pool_wait_seconds_total', 'Time spent waiting for a pooled connection.', ['pool'],
+)
+POOL_REQUESTS = Counter(
+    'soda_shop_db_pool_requests_total', 'Connections taken from the pool.', ['pool'],
+)
+POOL_QUEUED = Counter(
+    'soda_shop_db_pool_queued_total', 'Connection requests that had to wait.', ['pool'],
+)
+POOL_ERRORS = Counter(
+    'soda_shop_db_pool_errors_total', 'Connection requests that failed or timed out.', ['pool'],
+)
+POOL_CONNECTIONS = Gauge(
+    'soda_shop_db_pool_connections', 'Pool connections (size, available) and waiting requests.',
+    ['pool', 'state'], multiprocess_mode='livesum',
+)
+
+SALES_INSERTED = Counter(
+    'soda_shop_sales_inserted_total', 'Sale rows recorded.', ['source'],
+)
+CARTS_CHECKED_OUT = Counter(
+    'soda_shop_carts_checked_out_total', 'Carts checked out.',
+)
+
+# psycopg_pool stats key -> (counter, scale)
+POOL_COUNTERS = {
+    'requests_wait_ms': (POOL_WAIT, 0.001),
+    'requests_num': (POOL_REQUESTS, 1),
+    'requests_queued': (POOL_QUEUED, 1),
+    'requests_errors': (POOL_ERRORS, 1),
+}
+POOL_GAUGES = {'pool_size': 'size', 'pool_available': 'available', 'requests_waiting': 'waiting'}
+POOL_SYNC_INTERVAL = 1.0
+
+_pool_lock = threading.Lock()
+# Last cumulative stats copied into the counters, per pool
+_pool_sync = {'next': 0.0, 'seen': {}}
+
+
+def record_sales(source, count):
+    """Count committed sales; pass as a transaction.on_commit callback."""
+    SALES_INSERTED.labels(source).inc(count)
+
+
+def record_cart(count):
+    SALES_INSERTED.labels('cart').inc(count)
+    CARTS_CHECKED_OUT.inc()
+
+
+def sync_pool_stats():
+    """Copy this worker's pool counters into the metrics, at most once a second."""
+    now = time.monotonic()
+    if now < _pool_sync['next'] or not _pool_lock.acquire(blocking=False):
+        return
+    try:
+        _pool_sync['next'] = now + POOL_SYNC_INTERVAL
+        for pool, stats in db.pool_stats().items():
+            seen = _pool_sync['seen'].setdefault(pool, {})
+            for key, (counter, scale) in POOL_COUNTERS.items():
+                value = stats.get(key, 0)
+                if value > seen.get(key, 0):
+                    counter.labels(pool).inc((value - seen.get(key, 0)) * scale)
+                seen[key] = value
+            for key, state in POOL_GAUGES.items():
+                POOL_CONNECTIONS.labels(pool, state).set(stats.get(key, 0))
+    finally:
+        _pool_lock.release()
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.url_name or match.view_name
+
+
+class MetricsMiddleware:
+    """Time every request and count its errors by view.
+
+    Goes first in MIDDLEWARE, so the time covers the whole stack.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        response = self.get_response(request)
+        elapsed = time.perf_counter() - start
+
+        view = view_name(request)
+        REQUEST_DURATION.labels(view, request.method).observe(elapsed)
+        if response.status_code >= 400:
+            REQUEST_ERRORS.labels(view, str(response.status_code)).inc()
+            if response.status_code == 429:
+                REQUESTS_THROTTLED.labels(view).inc()
+        sync_pool_stats()
+        return response
+
+
+def metrics_view(request):
+    """Every worker's metrics in the Prometheus text format.
+
+    Scrapers must send METRICS_TOKEN as a bearer token; without a token
+    configured, every scrape is refused.
+    """
+    if not settings.METRICS_TOKEN:
+        return HttpResponseForbidden()
+    expected = f'Bearer {settings.METRICS_TOKEN}'.encode()
+    if not hmac.compare_digest(request.headers.get('Authorization', '').encode(), expected):
+        return HttpResponseForbidden()
+
+    sync_pool_stats()
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,155 @@
+"""Per-request SQL counts and timings, and a slow-query log.
+
+``QueryInstrumentationMiddleware`` puts a ``QueryLog`` execute wrapper on
+every database connection for the duration of the request, so every
+statement the views run through ``connection.cursor()`` (or
+``prepared_cursor()``, or the replica from ``read_connection``) is counted
+and timed. The response's ``Server-Timing`` header then gets one ``db``
+entry per database used (``db-replica`` for the replica) with the number
+of queries and their total time, plus the whole request as ``request``,
+after any entries the view added itself.
+
+Logged to the ``soda_shop.sql`` logger, one JSON object per line:
+
+- ``slow_query``: a statement that took SLOW_QUERY_MS or longer, with the
+  shape of its parameters (types and list lengths, never the values);
+- ``repeated_query``: the same statement run REPEATED_QUERY_THRESHOLD or
+  more times in one request, usually a loop that should be one query.
+
+Not covered: the async report views (ASYNC_REPORTS), which use their own
+psycopg pool, and rows a streaming response reads after the view returns.
+"""
+import json
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('soda_shop.sql')
+
+# Longest statement text written to the log
+MAX_SQL_LENGTH = 2000
+
+
+def param_shape(params):
+    """Types of the parameters, with lengths for long lists, but no values."""
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {key: param_shape(value) for key, value in params.items()}
+    if isinstance(params, (list, tuple)):
+        # A long list bound as one array parameter, e.g. ANY(%s)
+        if len(params) > 10 and not isinstance(params[0], (list, tuple, dict)):
+            return f'list[{len(params)}] of {type(params[0]).__name__}'
+        return [param_shape(value) for value in params]
+    return type(params).__name__
+
+
+def compact(sql):
+    """Statement text on one line, cut to MAX_SQL_LENGTH."""
+    return ' '.join(sql.split())[:MAX_SQL_LENGTH]
+
+
+class QueryLog:
+    """Execute wrapper that counts and times one request's statements."""
+
+    def __init__(self, request):
+        self.request = request
+        # Per connection alias: [queries, seconds]
+        self.totals = {}
+        # Per statement text: [runs, seconds]
+        self.statements = {}
+
+    def wrapper(self, alias):
+        def execute(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                self._record(alias, sql, params, many, time.perf_counter() - start)
+        return execute
+
+    def _record(self, alias, sql, params, many, seconds):
+        totals = self.totals.setdefault(alias, [0, 0.0])
+        totals[0] += 1
+        totals[1] += seconds
+        statement = self.statements.setdefault(sql, [0, 0.0])
+        statement[0] += 1
+        statement[1] += seconds
+
+        if seconds * 1000 >= settings.SLOW_QUERY_MS:
+            if many:
+                params = list(params)
+                params_shape = {'rows': len(params), 'row': param_shape(params[0]) if params else None}
+            else:
+                params_shape = param_shape(params)
+            self._log('slow_query', {
+                'database': alias,
+                'ms': round(seconds * 1000, 2),
+                'sql': compact(sql),
+                'params': params_shape,
+            })
+
+    def finish(self):
+        """Log statements repeated within the request."""
+        for sql, (runs, seconds) in self.statements.items():
+            if runs >= settings.REPEATED_QUERY_THRESHOLD:
+                self._log('repeated_query', {
+                    'runs': runs,
+                    'ms': round(seconds * 1000, 2),
+                    'sql': compact(sql),
+                })
+
+    def server_timing(self, total_seconds):
+        entries = []
+        for alias, (queries, seconds) in sorted(self.totals.items()):
+            name = 'db' if alias == 'default' else f'db-{alias}'
+            noun = 'query' if queries == 1 else 'queries'
+            entries.append(f'{name};dur={seconds * 1000:.1f};desc="{queries} {noun}"')
+        entries.append(f'request;dur={total_seconds * 1000:.1f}')
+        return ', '.join(entries)
+
+    def _log(self, event, fields):
+        logger.warning(json.dumps({
+            'event': event,
+            'method': self.request.method,
+            'path': self.request.path,
+            **fields,
+        }, default=str))
+
+
+class QueryInstrumentationMiddleware:
+    """Count and time each request's SQL; add Server-Timing and log slow queries.
+
+    Goes near the top of MIDDLEWARE so queries made by the middleware
+    below it count too. Off with SQL_INSTRUMENTATION=False.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.SQL_INSTRUMENTATION:
+            return self.get_response(request)
+
+        query_log = QueryLog(request)
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for db in connections.all():
+                stack.enter_context(db.execute_wrapper(query_log.wrapper(db.alias)))
+            response = self.get_response(request)
+        total = time.perf_counter() - start
+
+        query_log.finish()
+        # After any entries the view set itself (e.g. dashboard widget times)
+        timing = query_log.server_timing(total)
+        if response.has_header('Server-Timing'):
+            timing = f"{response['Server-Timing']}, {timing}"
+        response['Server-Timing'] = timing
+        # Lets the frontend's origin read the timings from the Performance API
+        origin = request.headers.get('Origin')
+        if origin and origin in settings.CORS_ALLOWED_ORIGINS:
+            response['Timing-Allow-Origin'] = origin
+        return response
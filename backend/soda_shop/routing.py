@@ -0,0 +1,150 @@
+"""Read-replica routing for the raw-SQL read views.
+
+The views run their SQL on a connection directly, so a Django database
+router never sees it. Read-only views ask ``read_connection(request)``
+(``aread_alias`` in async views) for a connection instead, and get the
+READ_REPLICA_ALIAS database when:
+
+- a replica is configured (REPLICA_DATABASE_URL),
+- its replication lag, re-checked at most every REPLICA_LAG_CHECK_INTERVAL
+  seconds, is within REPLICA_MAX_LAG seconds,
+- the request isn't inside a transaction, and
+- nothing pinned the read to the primary in the last REPLICA_PIN_SECONDS:
+  the user's own writes (recorded by ``ReadYourWritesMiddleware``), so
+  they read what they wrote, or a pin the view names, such as the one the
+  analytics cache sets when it's invalidated.
+
+Otherwise they get the primary.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+
+from soda_shop import async_db
+
+LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        -- Nothing left to replay: caught up, however old the last write is
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END AS lag
+"""
+
+_lock = threading.Lock()
+# Lag in seconds, or None while the replica is unreachable
+_lag = {'next_check': float('-inf'), 'seconds': None}
+
+
+def replica_configured():
+    return settings.READ_REPLICA_ALIAS in settings.DATABASES
+
+
+def _claim_lag_check():
+    """True for the one caller that should re-check the lag now."""
+    with _lock:
+        now = time.monotonic()
+        if now < _lag['next_check']:
+            return False
+        # Meanwhile everyone else goes by the last result
+        _lag['next_check'] = now + settings.REPLICA_LAG_CHECK_INTERVAL
+        return True
+
+
+def _record_lag(seconds):
+    _lag['seconds'] = seconds
+    if seconds is None:
+        # Each check of a replica that is down waits out the pool timeout;
+        # make one request pay that less often
+        _lag['next_check'] = time.monotonic() + settings.REPLICA_RETRY_INTERVAL
+
+
+def replica_lag():
+    """Replication lag in seconds, or None if the replica is unreachable."""
+    if _claim_lag_check():
+        try:
+            with connections[settings.READ_REPLICA_ALIAS].cursor() as cursor:
+                cursor.execute(LAG_SQL)
+                _record_lag(float(cursor.fetchone()[0]))
+        except Exception:
+            _record_lag(None)
+    return _lag['seconds']
+
+
+async def areplica_lag():
+    if _claim_lag_check():
+        try:
+            row = await async_db.fetchone(LAG_SQL, using=settings.READ_REPLICA_ALIAS)
+            _record_lag(float(row['lag']))
+        except Exception:
+            _record_lag(None)
+    return _lag['seconds']
+
+
+def _user_pin(request):
+    user_id = getattr(request, 'supabase_user_id', None)
+    return f'user:{user_id}' if user_id else None
+
+
+def pin_to_primary(pin):
+    """Send reads under ``pin`` to the primary until the replica catches up."""
+    if replica_configured():
+        caches[settings.REPLICA_PIN_CACHE_ALIAS].set(
+            f'replica:pin:{pin}', True, timeout=settings.REPLICA_PIN_SECONDS
+        )
+
+
+def _pin_keys(request, pins):
+    return [f'replica:pin:{pin}' for pin in [_user_pin(request), *pins] if pin]
+
+
+def _pinned(request, pins):
+    return bool(caches[settings.REPLICA_PIN_CACHE_ALIAS].get_many(_pin_keys(request, pins)))
+
+
+async def _apinned(request, pins):
+    return bool(await caches[settings.REPLICA_PIN_CACHE_ALIAS].aget_many(_pin_keys(request, pins)))
+
+
+def _choose(lag):
+    if lag is not None and lag <= settings.REPLICA_MAX_LAG:
+        return settings.READ_REPLICA_ALIAS
+    return DEFAULT_DB_ALIAS
+
+
+def read_alias(request, pins=()):
+    """Database alias for a safe read made while handling ``request``."""
+    if not replica_configured() or connection.in_atomic_block or _pinned(request, pins):
+        return DEFAULT_DB_ALIAS
+    return _choose(replica_lag())
+
+
+async def aread_alias(request, pins=()):
+    if not replica_configured() or await _apinned(request, pins):
+        return DEFAULT_DB_ALIAS
+    return _choose(await areplica_lag())
+
+
+def read_connection(request, pins=()):
+    return connections[read_alias(request, pins)]
+
+
+class ReadYourWritesMiddleware:
+    """Pin users to the primary for a while after a successful write.
+
+    Goes after SupabaseAuthMiddleware, which identifies the user.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        pin = _user_pin(request)
+        if pin and request.method not in ('GET', 'HEAD', 'OPTIONS') and response.status_code < 400:
+            pin_to_primary(pin)
+        return response
@@ -0,0 +1,22 @@
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from .metrics import metrics_view
+
+
+class MetricsViewTests(SimpleTestCase):
+    def scrape(self, **headers):
+        return metrics_view(RequestFactory().get('/metrics', headers=headers))
+
+    @override_settings(METRICS_TOKEN='')
+    def test_refused_without_a_token_configured(self):
+        self.assertEqual(self.scrape().status_code, 403)
+        self.assertEqual(self.scrape(Authorization='Bearer ').status_code, 403)
+
+    @override_settings(METRICS_TOKEN='scrape-me')
+    def test_needs_the_token(self):
+        self.assertEqual(self.scrape().status_code, 403)
+        self.assertEqual(self.scrape(Authorization='Bearer wrong').status_code, 403)
+
+        response = self.scrape(Authorization='Bearer scrape-me')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'soda_shop_request_duration_seconds', response.content)
@@ -2,15 +2,31 @@
 from django.contrib import admin
 from django.urls import path, include
 from django.http import JsonResponse
+from soda_shop import db, metrics
 
 
 def health_check(request):
     return JsonResponse({'status': 'healthy', 'app': 'Mahadav Soda Shop API'})
 
 
+def database_health(request):
+    """Database round trip plus connection pool size and wait counters."""
+    try:
+        latency_ms = db.check()
+    except Exception as e:
+        return JsonResponse({'status': 'unhealthy', 'error': str(e)}, status=503)
+    return JsonResponse({
+        'status': 'healthy',
+        'latency_ms': round(latency_ms, 1),
+        'pools': db.pool_stats(),
+    })
+
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/health/', health_check, name='health_check'),
+    path('api/health/db/', database_health, name='database_health'),
+    path('metrics', metrics.metrics_view, name='metrics'),
     path('api/auth/', include('accounts.urls')),
     path('api/inventory/', include('inventory.urls')),
     path('api/sales/', include('sales.urls')),
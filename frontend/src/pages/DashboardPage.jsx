@@ -15,16 +15,14 @@ function DashboardPage() {
 
   const fetchData = useCallback(async () => {
     try {
-      const [statsRes, trendRes, sellersRes, lowStockRes] = await Promise.all([
-        salesApi.getDashboardStats(),
-        salesApi.getDailyTrend({ days: 7 }),
-        salesApi.getBestSellers({ days: 30, limit: 5 }),
+      const [dashboardRes, lowStockRes] = await Promise.all([
+        salesApi.getDashboard({ trend_days: 7, best_sellers_days: 30, best_sellers_limit: 5 }),
         inventoryApi.getLowStock(),
       ])
       
-      setStats(statsRes.data)
-      setDailyTrend(trendRes.data)
-      setBestSellers(sellersRes.data)
+      setStats(dashboardRes.data.stats)
+      setDailyTrend(dashboardRes.data.trend)
+      setBestSellers(dashboardRes.data.best_sellers)
       setLowStockProducts(lowStockRes.data)
     } catch (error) {
       console.error('Dashboard fetch error:', error)
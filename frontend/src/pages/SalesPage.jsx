@@ -1,41 +1,42 @@
-import { useState, useEffect, useCallback } from 'react'
-import { inventoryApi, salesApi } from '../utils/api'
+import { useState, useEffect, useCallback, useMemo } from 'react'
+import { salesApi } from '../utils/api'
 import { useCartStore } from '../stores/cartStore'
-import { useSalesRealtime } from '../hooks/useSupabaseRealtime'
+import { useCatalogStore } from '../stores/catalogStore'
+import { useSalesRealtime, useProductsRealtime } from '../hooks/useSupabaseRealtime'
 import toast from 'react-hot-toast'
 
 function SalesPage() {
-  const [products, setProducts] = useState([])
-  const [loading, setLoading] = useState(true)
   const [checkoutLoading, setCheckoutLoading] = useState(false)
   const [search, setSearch] = useState('')
   const [category, setCategory] = useState('')
   
-  const { items, addItem, updateQuantity, removeItem, clearCart, getTotal } = useCartStore()
+  const { items, addItem, updateQuantity, removeItem, clearCart, getTotal, getCheckoutKey } = useCartStore()
+  const { products: catalog, loading, sync } = useCatalogStore()
 
   const fetchProducts = useCallback(async () => {
     try {
-      const params = { is_active: 'true' }
-      if (search) params.search = search
-      if (category) params.category = category
-      
-      const response = await inventoryApi.getProducts(params)
-      setProducts(response.data)
+      await sync()
     } catch (error) {
       toast.error('Failed to load products')
-    } finally {
-      setLoading(false)
     }
-  }, [search, category])
+  }, [sync])
 
   useEffect(() => {
     fetchProducts()
   }, [fetchProducts])
 
+  // Filter the local catalog instead of refetching on every keystroke
+  const products = useMemo(() => {
+    const term = search.trim().toLowerCase()
+    return Object.values(catalog)
+      .filter((product) => !category || product.category === category)
+      .filter((product) => !term || product.name.toLowerCase().includes(term))
+      .sort((a, b) => a.name.localeCompare(b.name))
+  }, [catalog, search, category])
+
   // Real-time stock updates
-  useSalesRealtime(() => {
-    fetchProducts()
-  })
+  useSalesRealtime(fetchProducts)
+  useProductsRealtime(fetchProducts)
 
   const handleAddToCart = (product) => {
     if (product.stock <= 0) {
@@ -66,7 +67,8 @@ function SalesPage() {
         quantity: item.quantity,
       }))
       
-      const response = await salesApi.bulkSale(saleItems)
+      // Same key on retry, so a sale that went through isn't recorded twice
+      const response = await salesApi.bulkSale(saleItems, getCheckoutKey())
       toast.success(`Sale completed! Total: ₹${response.data.total.toFixed(2)}`)
       clearCart()
       fetchProducts()
@@ -2,6 +2,9 @@ import { create } from 'zustand'
 
 export const useCartStore = create((set, get) => ({
   items: [],
+  // Idempotency-Key for checking out the current cart; retries reuse it,
+  // any change to the cart starts a new one
+  checkoutKey: null,
   
   addItem: (product, quantity = 1) => {
     const items = get().items
@@ -10,9 +13,9 @@ export const useCartStore = create((set, get) => ({
     if (existingIndex >= 0) {
       const newItems = [...items]
       newItems[existingIndex].quantity += quantity
-      set({ items: newItems })
+      set({ items: newItems, checkoutKey: null })
     } else {
-      set({ items: [...items, { product, quantity }] })
+      set({ items: [...items, { product, quantity }], checkoutKey: null })
     }
   },
   
@@ -25,15 +28,25 @@ export const useCartStore = create((set, get) => ({
     set({
       items: get().items.map(item =>
         item.product.id === productId ? { ...item, quantity } : item
-      )
+      ),
+      checkoutKey: null,
     })
   },
   
   removeItem: (productId) => {
-    set({ items: get().items.filter(item => item.product.id !== productId) })
+    set({ items: get().items.filter(item => item.product.id !== productId), checkoutKey: null })
   },
   
-  clearCart: () => set({ items: [] }),
+  clearCart: () => set({ items: [], checkoutKey: null }),
+  
+  getCheckoutKey: () => {
+    let key = get().checkoutKey
+    if (!key) {
+      key = crypto.randomUUID()
+      set({ checkoutKey: key })
+    }
+    return key
+  },
   
   getTotal: () => {
     return get().items.reduce(
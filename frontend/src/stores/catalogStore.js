@@ -0,0 +1,31 @@
+import { create } from 'zustand'
+import { inventoryApi } from '../utils/api'
+
+// Local copy of the active catalog, kept current by delta syncs:
+// each sync only downloads products changed since the last one.
+export const useCatalogStore = create((set, get) => ({
+  products: {},
+  version: null,
+  loading: true,
+  pending: null,
+
+  sync: () => {
+    // Run syncs one after another so an older response never lands last
+    const previous = (get().pending || Promise.resolve()).catch(() => {})
+    const run = previous.then(async () => {
+      const response = await inventoryApi.getProductChanges(get().version)
+      const { version, full, products, deleted } = response.data
+
+      const next = full ? {} : { ...get().products }
+      products.forEach((product) => { next[product.id] = product })
+      deleted.forEach((id) => { delete next[id] })
+      set({ products: next, version })
+    }).finally(() => {
+      set({ loading: false })
+      if (get().pending === run) set({ pending: null })
+    })
+
+    set({ pending: run })
+    return run
+  },
+}))
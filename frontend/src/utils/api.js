@@ -34,6 +34,7 @@ api.interceptors.response.use(
 // Inventory API
 export const inventoryApi = {
   getProducts: (params) => api.get('/inventory/products/', { params }),
+  getProductChanges: (since) => api.get('/inventory/products/changes/', { params: since == null ? {} : { since } }),
   getProduct: (id) => api.get(`/inventory/products/${id}/`),
   createProduct: (data) => api.post('/inventory/products/', data),
   updateProduct: (id, data) => api.put(`/inventory/products/${id}/`, data),
@@ -47,8 +48,13 @@ export const inventoryApi = {
 export const salesApi = {
   getSales: (params) => api.get('/sales/', { params }),
   createSale: (data) => api.post('/sales/create/', data),
-  bulkSale: (items) => api.post('/sales/bulk/', { items }),
+  bulkSale: (items, idempotencyKey) => api.post(
+    '/sales/bulk/',
+    { items },
+    { headers: idempotencyKey ? { 'Idempotency-Key': idempotencyKey } : {} }
+  ),
   getDashboardStats: () => api.get('/sales/dashboard/'),
+  getDashboard: (params) => api.get('/sales/dashboard/full/', { params }),
   getBestSellers: (params) => api.get('/sales/best-sellers/', { params }),
   getDailyTrend: (params) => api.get('/sales/daily-trend/', { params }),
   getProfitLoss: (params) => api.get('/sales/profit-loss/', { params }),
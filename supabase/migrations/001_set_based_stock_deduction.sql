@@ -0,0 +1,30 @@
+-- Set-based stock deduction for multi-row sale inserts
+-- Replaces the per-row after_sale_deduct_stock trigger with a statement-level
+-- trigger, so a cart checkout inserting N sales runs one UPDATE on products.
+-- Safe to run more than once.
+
+BEGIN;
+
+CREATE OR REPLACE FUNCTION deduct_stock_after_sale()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE products p
+    SET stock = p.stock - d.quantity
+    FROM (
+        SELECT product_id, SUM(quantity) AS quantity
+        FROM new_sales
+        WHERE product_id IS NOT NULL
+        GROUP BY product_id
+    ) d
+    WHERE p.id = d.product_id;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+DROP TRIGGER IF EXISTS after_sale_deduct_stock ON sales;
+CREATE TRIGGER after_sale_deduct_stock
+    AFTER INSERT ON sales
+    REFERENCING NEW TABLE AS new_sales
+    FOR EACH STATEMENT EXECUTE FUNCTION deduct_stock_after_sale();
+
+COMMIT;
@@ -0,0 +1,121 @@
+-- Daily sales rollup per (day, product, category)
+-- Maintained by statement-level triggers in the same transaction as every
+-- insert into (or delete from) sales. Dashboard and report queries read from
+-- it, so their cost grows with the number of days, not the number of sales.
+-- Rebuild a date range with: python manage.py rebuild_sales_rollup
+-- Safe to run more than once; rebuilds the rollup from sales on every run.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS sales_daily_rollup (
+    sale_date DATE NOT NULL,
+    product_id INTEGER NOT NULL,
+    category TEXT NOT NULL,
+    items_sold BIGINT NOT NULL DEFAULT 0,
+    revenue DECIMAL(14,2) NOT NULL DEFAULT 0,
+    profit DECIMAL(14,2) NOT NULL DEFAULT 0,
+    transactions BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (sale_date, product_id, category)
+);
+
+CREATE INDEX IF NOT EXISTS idx_sales_daily_rollup_product ON sales_daily_rollup(product_id, sale_date);
+
+ALTER TABLE sales_daily_rollup ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Authenticated users can read sales rollup" ON sales_daily_rollup;
+CREATE POLICY "Authenticated users can read sales rollup" ON sales_daily_rollup
+    FOR SELECT TO authenticated USING (true);
+
+-- Add newly inserted sales to the rollup
+CREATE OR REPLACE FUNCTION rollup_sales_insert()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO sales_daily_rollup AS r
+        (sale_date, product_id, category, items_sold, revenue, profit, transactions)
+    SELECT
+        n.sale_date,
+        n.product_id,
+        COALESCE(p.category, 'Other'),
+        SUM(n.quantity),
+        SUM(n.total_price),
+        COALESCE(SUM(n.profit), 0),
+        COUNT(*)
+    FROM new_sales n
+    LEFT JOIN products p ON p.id = n.product_id
+    WHERE n.product_id IS NOT NULL AND n.sale_date IS NOT NULL
+    GROUP BY n.sale_date, n.product_id, COALESCE(p.category, 'Other')
+    ORDER BY n.sale_date, n.product_id
+    ON CONFLICT (sale_date, product_id, category) DO UPDATE SET
+        items_sold = r.items_sold + EXCLUDED.items_sold,
+        revenue = r.revenue + EXCLUDED.revenue,
+        profit = r.profit + EXCLUDED.profit,
+        transactions = r.transactions + EXCLUDED.transactions;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+-- Remove deleted sales from the rollup
+CREATE OR REPLACE FUNCTION rollup_sales_delete()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE sales_daily_rollup r
+    SET items_sold = r.items_sold - d.items_sold,
+        revenue = r.revenue - d.revenue,
+        profit = r.profit - d.profit,
+        transactions = r.transactions - d.transactions
+    FROM (
+        SELECT
+            o.sale_date,
+            o.product_id,
+            COALESCE(p.category, 'Other') AS category,
+            SUM(o.quantity) AS items_sold,
+            SUM(o.total_price) AS revenue,
+            COALESCE(SUM(o.profit), 0) AS profit,
+            COUNT(*) AS transactions
+        FROM old_sales o
+        LEFT JOIN products p ON p.id = o.product_id
+        WHERE o.product_id IS NOT NULL AND o.sale_date IS NOT NULL
+        GROUP BY o.sale_date, o.product_id, COALESCE(p.category, 'Other')
+    ) d
+    WHERE r.sale_date = d.sale_date
+      AND r.product_id = d.product_id
+      AND r.category = d.category;
+
+    DELETE FROM sales_daily_rollup WHERE transactions <= 0;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+-- Block sale writes while the triggers are swapped in and the rollup is rebuilt
+LOCK TABLE sales IN SHARE MODE;
+
+DROP TRIGGER IF EXISTS after_sale_rollup_insert ON sales;
+CREATE TRIGGER after_sale_rollup_insert
+    AFTER INSERT ON sales
+    REFERENCING NEW TABLE AS new_sales
+    FOR EACH STATEMENT EXECUTE FUNCTION rollup_sales_insert();
+
+DROP TRIGGER IF EXISTS after_sale_rollup_delete ON sales;
+CREATE TRIGGER after_sale_rollup_delete
+    AFTER DELETE ON sales
+    REFERENCING OLD TABLE AS old_sales
+    FOR EACH STATEMENT EXECUTE FUNCTION rollup_sales_delete();
+
+TRUNCATE sales_daily_rollup;
+
+INSERT INTO sales_daily_rollup
+    (sale_date, product_id, category, items_sold, revenue, profit, transactions)
+SELECT
+    s.sale_date,
+    s.product_id,
+    COALESCE(p.category, 'Other'),
+    SUM(s.quantity),
+    SUM(s.total_price),
+    COALESCE(SUM(s.profit), 0),
+    COUNT(*)
+FROM sales s
+LEFT JOIN products p ON p.id = s.product_id
+WHERE s.product_id IS NOT NULL AND s.sale_date IS NOT NULL
+GROUP BY s.sale_date, s.product_id, COALESCE(p.category, 'Other');
+
+COMMIT;
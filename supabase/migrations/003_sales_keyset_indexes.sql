@@ -0,0 +1,11 @@
+-- Indexes backing keyset pagination of GET /api/sales/
+-- Pages are read newest first on (created_at, id), optionally for one product.
+-- CONCURRENTLY keeps checkout writing while the indexes build, so run this
+-- file with psql (outside a transaction block), not inside BEGIN/COMMIT.
+-- Safe to run more than once.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_sales_created_at_id
+    ON sales (created_at DESC, id DESC);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_sales_product_created_at_id
+    ON sales (product_id, created_at DESC, id DESC);
@@ -0,0 +1,8 @@
+-- Case-insensitive name lookup for the bulk product import
+-- The import matches rows to existing products on lower(name); this index
+-- keeps that join an index lookup instead of a scan per staged row.
+-- Run with psql (outside a transaction block) because of CONCURRENTLY.
+-- Safe to run more than once.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_products_lower_name
+    ON products (lower(name));
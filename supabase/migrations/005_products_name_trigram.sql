@@ -0,0 +1,11 @@
+-- Trigram index for product search
+-- Lets GET /api/inventory/products/?search= answer both its substring
+-- match (name ILIKE '%term%') and its fuzzy word match (term <% name)
+-- from the index instead of scanning products on every keystroke.
+-- Run with psql (outside a transaction block) because of CONCURRENTLY.
+-- Safe to run more than once.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_products_name_trgm
+    ON products USING gin (name gin_trgm_ops);
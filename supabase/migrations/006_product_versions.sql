@@ -0,0 +1,28 @@
+-- Per-row product versions for conditional GETs on the catalog
+-- Every insert or update of a product, including stock deducted by sales,
+-- stamps the row with the id of the writing transaction. The API derives
+-- catalog ETags from count/sum/max of these versions, so any committed change
+-- (deletes included) yields a new ETag.
+-- Safe to run more than once.
+
+BEGIN;
+
+ALTER TABLE products ADD COLUMN IF NOT EXISTS version BIGINT NOT NULL DEFAULT 0;
+
+CREATE OR REPLACE FUNCTION stamp_product_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.version = pg_current_xact_id()::text::bigint;
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+DROP TRIGGER IF EXISTS stamp_products_version ON products;
+CREATE TRIGGER stamp_products_version
+    BEFORE INSERT OR UPDATE ON products
+    FOR EACH ROW EXECUTE FUNCTION stamp_product_version();
+
+-- Backfill fires the trigger, which stamps this transaction's id
+UPDATE products SET version = 0 WHERE version = 0;
+
+COMMIT;
@@ -0,0 +1,62 @@
+-- Tombstones for product delta sync
+-- GET /api/inventory/products/changes/?since= returns active products whose
+-- version moved past the client's watermark, plus the ids recorded here for
+-- products deleted or deactivated since then. Rows are written by triggers,
+-- so deletes made directly in Supabase are synced too.
+-- Requires 006_product_versions.sql. Safe to run more than once.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS product_tombstones (
+    product_id INTEGER PRIMARY KEY,
+    version BIGINT NOT NULL,
+    reason TEXT NOT NULL CHECK (reason IN ('deleted', 'deactivated')),
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_product_tombstones_version ON product_tombstones(version);
+CREATE INDEX IF NOT EXISTS idx_products_version ON products(version);
+
+ALTER TABLE product_tombstones ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Authenticated users can read product tombstones" ON product_tombstones;
+CREATE POLICY "Authenticated users can read product tombstones" ON product_tombstones
+    FOR SELECT TO authenticated USING (true);
+
+CREATE OR REPLACE FUNCTION record_product_tombstone()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        INSERT INTO product_tombstones (product_id, version, reason)
+        VALUES (OLD.id, pg_current_xact_id()::text::bigint, 'deleted')
+        ON CONFLICT (product_id) DO UPDATE
+        SET version = EXCLUDED.version, reason = EXCLUDED.reason, created_at = NOW();
+        RETURN OLD;
+    END IF;
+
+    IF OLD.is_active IS TRUE AND NEW.is_active IS NOT TRUE THEN
+        INSERT INTO product_tombstones (product_id, version, reason)
+        VALUES (NEW.id, NEW.version, 'deactivated')
+        ON CONFLICT (product_id) DO UPDATE
+        SET version = EXCLUDED.version, reason = EXCLUDED.reason, created_at = NOW();
+    ELSIF NEW.is_active IS TRUE AND OLD.is_active IS NOT TRUE THEN
+        -- Reactivated: the product itself shows up as changed again
+        DELETE FROM product_tombstones WHERE product_id = NEW.id;
+    END IF;
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+DROP TRIGGER IF EXISTS record_products_tombstone ON products;
+CREATE TRIGGER record_products_tombstone
+    AFTER DELETE OR UPDATE OF is_active ON products
+    FOR EACH ROW EXECUTE FUNCTION record_product_tombstone();
+
+-- Products already inactive are tombstoned as of this migration
+INSERT INTO product_tombstones (product_id, version, reason)
+SELECT id, pg_current_xact_id()::text::bigint, 'deactivated'
+FROM products
+WHERE is_active IS NOT TRUE
+ON CONFLICT (product_id) DO NOTHING;
+
+COMMIT;
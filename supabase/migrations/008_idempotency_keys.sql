@@ -0,0 +1,26 @@
+-- Stored responses for Idempotency-Key on the sale creation endpoints
+-- A retried POST /api/sales/create/ or /api/sales/bulk/ with the same key
+-- replays the stored response instead of recording the sale again. The
+-- primary key is the only lookup; expires_at drives the purge task.
+-- Safe to run more than once.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    user_id UUID NOT NULL,
+    key TEXT NOT NULL,
+    request_hash TEXT NOT NULL,
+    status_code INTEGER,
+    -- json rather than jsonb keeps the original key order on replay
+    response JSON,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    expires_at TIMESTAMPTZ NOT NULL,
+    PRIMARY KEY (user_id, key)
+);
+
+CREATE INDEX IF NOT EXISTS idx_idempotency_keys_expires_at ON idempotency_keys(expires_at);
+
+-- Only the backend (service role) reads or writes stored responses
+ALTER TABLE idempotency_keys ENABLE ROW LEVEL SECURITY;
+
+COMMIT;
@@ -0,0 +1,11 @@
+-- Dedupe key for sales pushed by edge POS nodes
+-- Sales recorded offline carry the id the edge gave them; the unique index
+-- lets POST /api/sales/ingest/ accept a resent batch without duplicating it.
+-- Sales made through the central API leave edge_id NULL.
+-- Run with psql (outside a transaction block) because of CONCURRENTLY.
+-- Safe to run more than once.
+
+ALTER TABLE sales ADD COLUMN IF NOT EXISTS edge_id TEXT;
+
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS idx_sales_edge_id
+    ON sales (edge_id);
@@ -0,0 +1,11 @@
+-- Edge dedupe key that includes the partition key
+-- A unique index on a partitioned table has to contain the partition key,
+-- so once sales is partitioned by sale_date (migrations 011 and 012) edge
+-- sales are deduplicated on (edge_id, sale_date); an edge sale never changes
+-- its date, so that is the same guarantee. Build it now, before the switch,
+-- so the ingest endpoint can use the new key on either table.
+-- Run with psql (outside a transaction block) because of CONCURRENTLY.
+-- Safe to run more than once.
+
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS idx_sales_edge_id_sale_date
+    ON sales (edge_id, sale_date);
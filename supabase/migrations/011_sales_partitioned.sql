@@ -0,0 +1,152 @@
+-- Monthly partitioned copy of sales, kept in step with the live table
+-- First half of moving sales onto monthly range partitions by sale_date
+-- without taking checkout offline:
+--   1. this file creates sales_partitioned with one partition per month of
+--      existing sales and the next three months, and a trigger that
+--      mirrors every new, changed or deleted sale into it;
+--   2. python manage.py sales_partitions backfill copies the existing sales
+--      over in small batches, while the shop keeps selling;
+--   3. 012_sales_partition_swap.sql swaps the two tables in one short
+--      transaction.
+-- Also defines create_sales_partition() and ensure_sales_partitions(), which
+-- the sales.tasks.ensure_sales_partitions beat task runs daily afterwards.
+-- Safe to run more than once; does nothing once 012 has run.
+
+BEGIN;
+
+-- Create and attach the partition of `parent` for the month of `sale_month`.
+-- Returns its name, or NULL if it already exists.
+CREATE OR REPLACE FUNCTION create_sales_partition(sale_month DATE, parent TEXT DEFAULT 'sales')
+RETURNS TEXT AS $$
+DECLARE
+    first_day DATE := date_trunc('month', sale_month)::date;
+    next_month DATE := (date_trunc('month', sale_month) + INTERVAL '1 month')::date;
+    partition_name TEXT := 'sales_' || to_char(sale_month, 'YYYY_MM');
+    default_partition TEXT;
+BEGIN
+    IF to_regclass(partition_name) IS NOT NULL THEN
+        RETURN NULL;
+    END IF;
+
+    -- Created on its own and attached afterwards: CREATE TABLE ... PARTITION OF
+    -- locks out every reader of the parent, ATTACH PARTITION doesn't
+    EXECUTE format(
+        'CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+        partition_name, parent
+    );
+    -- Only ever read through the parent, whose policies apply
+    EXECUTE format('ALTER TABLE %I ENABLE ROW LEVEL SECURITY', partition_name);
+
+    -- Sales of that month that landed in the default partition move over,
+    -- e.g. late edge sales for a month that was archived and restored
+    SELECT c.relname INTO default_partition
+    FROM pg_partitioned_table pt
+    JOIN pg_class c ON c.oid = pt.partdefid
+    WHERE pt.partrelid = parent::regclass;
+
+    IF default_partition IS NOT NULL THEN
+        EXECUTE format(
+            'WITH moved AS (DELETE FROM %I WHERE sale_date >= %L AND sale_date < %L RETURNING *)
+             INSERT INTO %I SELECT * FROM moved',
+            default_partition, first_day, next_month, partition_name
+        );
+    END IF;
+
+    EXECUTE format(
+        'ALTER TABLE %I ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+        parent, partition_name, first_day, next_month
+    );
+    RETURN partition_name;
+END;
+$$ language 'plpgsql';
+
+-- Make sure `parent` has partitions from the month of `first_month` through
+-- `months_ahead` months past the current one. Returns how many it created.
+CREATE OR REPLACE FUNCTION ensure_sales_partitions(
+    months_ahead INTEGER DEFAULT 3,
+    parent TEXT DEFAULT 'sales',
+    first_month DATE DEFAULT CURRENT_DATE
+)
+RETURNS INTEGER AS $$
+DECLARE
+    sale_month DATE;
+    created INTEGER := 0;
+BEGIN
+    FOR sale_month IN
+        SELECT generate_series(
+            date_trunc('month', first_month),
+            date_trunc('month', CURRENT_DATE) + make_interval(months => months_ahead),
+            INTERVAL '1 month'
+        )::date
+    LOOP
+        IF create_sales_partition(sale_month, parent) IS NOT NULL THEN
+            created := created + 1;
+        END IF;
+    END LOOP;
+    RETURN created;
+END;
+$$ language 'plpgsql';
+
+-- Keep sales_partitioned in step with sales until the swap
+CREATE OR REPLACE FUNCTION mirror_sales_to_partitioned()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        DELETE FROM sales_partitioned WHERE id = OLD.id;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'INSERT') THEN
+        INSERT INTO sales_partitioned SELECT NEW.* ON CONFLICT DO NOTHING;
+    END IF;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+DO $$
+BEGIN
+    -- Already partitioned by 012
+    IF (SELECT relkind FROM pg_class WHERE oid = 'sales'::regclass) = 'p'
+       OR to_regclass('sales_partitioned') IS NOT NULL THEN
+        RETURN;
+    END IF;
+
+    -- The partition key can't be NULL; no sale should have gone without a
+    -- date (it defaults to CURRENT_DATE), so hold new ones to that without
+    -- scanning the table and date any old ones by when they were recorded
+    ALTER TABLE sales ADD CONSTRAINT sales_sale_date_not_null
+        CHECK (sale_date IS NOT NULL) NOT VALID;
+    UPDATE sales SET sale_date = created_at::date WHERE sale_date IS NULL;
+
+    -- Shares sales_id_seq with sales, so ids stay unique across the switch
+    CREATE TABLE sales_partitioned (
+        LIKE sales INCLUDING DEFAULTS INCLUDING CONSTRAINTS,
+        CONSTRAINT sales_partitioned_pkey PRIMARY KEY (id, sale_date),
+        CONSTRAINT sales_partitioned_product_id_fkey
+            FOREIGN KEY (product_id) REFERENCES products(id) ON DELETE SET NULL
+    ) PARTITION BY RANGE (sale_date);
+
+    ALTER TABLE sales_partitioned DROP CONSTRAINT IF EXISTS sales_sale_date_not_null;
+    ALTER TABLE sales_partitioned ENABLE ROW LEVEL SECURITY;
+
+    CREATE INDEX idx_sales_partitioned_product_id ON sales_partitioned (product_id);
+    CREATE INDEX idx_sales_partitioned_sale_date ON sales_partitioned (sale_date);
+    CREATE INDEX idx_sales_partitioned_created_at_id ON sales_partitioned (created_at DESC, id DESC);
+    CREATE INDEX idx_sales_partitioned_product_created_at_id
+        ON sales_partitioned (product_id, created_at DESC, id DESC);
+    CREATE UNIQUE INDEX idx_sales_partitioned_edge_id_sale_date ON sales_partitioned (edge_id, sale_date);
+
+    PERFORM ensure_sales_partitions(
+        3, 'sales_partitioned', COALESCE((SELECT min(sale_date) FROM sales), CURRENT_DATE)
+    );
+
+    -- Catches sales dated outside every partition, e.g. beyond the months
+    -- created ahead if the daily task stops running
+    CREATE TABLE sales_default PARTITION OF sales_partitioned DEFAULT;
+    ALTER TABLE sales_default ENABLE ROW LEVEL SECURITY;
+
+    CREATE TRIGGER mirror_sales_to_partitioned
+        AFTER INSERT OR UPDATE OR DELETE ON sales
+        FOR EACH ROW EXECUTE FUNCTION mirror_sales_to_partitioned();
+END;
+$$;
+
+COMMIT;
@@ -0,0 +1,99 @@
+-- Switch sales over to the monthly partitioned table
+-- Second half of the move started in 011_sales_partitioned.sql. Run
+-- python manage.py sales_partitions backfill first: this file copies
+-- whatever sales are still missing while it holds the lock on sales, so the
+-- less is missing, the shorter checkout waits.
+-- The old table is kept as sales_unpartitioned, without its triggers; drop
+-- it once the numbers check out:
+--     DROP TABLE sales_unpartitioned;
+-- Safe to run more than once; does nothing once sales is partitioned.
+
+BEGIN;
+
+DO $$
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = 'sales'::regclass) = 'p' THEN
+        RETURN;
+    END IF;
+    IF to_regclass('sales_partitioned') IS NULL THEN
+        RAISE EXCEPTION 'sales_partitioned is missing; run 011_sales_partitioned.sql first';
+    END IF;
+
+    -- Sales wait for the rest of this transaction
+    LOCK TABLE sales IN ACCESS EXCLUSIVE MODE;
+
+    INSERT INTO sales_partitioned
+    SELECT s.*
+    FROM sales s
+    WHERE NOT EXISTS (SELECT 1 FROM sales_partitioned p WHERE p.id = s.id)
+    ON CONFLICT DO NOTHING;
+
+    DROP TRIGGER mirror_sales_to_partitioned ON sales;
+    DROP TRIGGER IF EXISTS after_sale_deduct_stock ON sales;
+    DROP TRIGGER IF EXISTS after_sale_rollup_insert ON sales;
+    DROP TRIGGER IF EXISTS after_sale_rollup_delete ON sales;
+
+    -- Out of the way, names and all
+    ALTER TABLE sales RENAME TO sales_unpartitioned;
+    ALTER TABLE sales_unpartitioned RENAME CONSTRAINT sales_pkey TO sales_unpartitioned_pkey;
+    ALTER TABLE sales_unpartitioned
+        RENAME CONSTRAINT sales_product_id_fkey TO sales_unpartitioned_product_id_fkey;
+    ALTER INDEX IF EXISTS idx_sales_product_id RENAME TO idx_sales_unpartitioned_product_id;
+    ALTER INDEX IF EXISTS idx_sales_sale_date RENAME TO idx_sales_unpartitioned_sale_date;
+    ALTER INDEX IF EXISTS idx_sales_created_at_id RENAME TO idx_sales_unpartitioned_created_at_id;
+    ALTER INDEX IF EXISTS idx_sales_product_created_at_id
+        RENAME TO idx_sales_unpartitioned_product_created_at_id;
+    ALTER INDEX IF EXISTS idx_sales_edge_id RENAME TO idx_sales_unpartitioned_edge_id;
+    ALTER INDEX IF EXISTS idx_sales_edge_id_sale_date RENAME TO idx_sales_unpartitioned_edge_id_sale_date;
+
+    ALTER TABLE sales_partitioned RENAME TO sales;
+    ALTER TABLE sales RENAME CONSTRAINT sales_partitioned_pkey TO sales_pkey;
+    ALTER TABLE sales RENAME CONSTRAINT sales_partitioned_product_id_fkey TO sales_product_id_fkey;
+    ALTER INDEX idx_sales_partitioned_product_id RENAME TO idx_sales_product_id;
+    ALTER INDEX idx_sales_partitioned_sale_date RENAME TO idx_sales_sale_date;
+    ALTER INDEX idx_sales_partitioned_created_at_id RENAME TO idx_sales_created_at_id;
+    ALTER INDEX idx_sales_partitioned_product_created_at_id RENAME TO idx_sales_product_created_at_id;
+    ALTER INDEX idx_sales_partitioned_edge_id_sale_date RENAME TO idx_sales_edge_id_sale_date;
+
+    -- So dropping sales_unpartitioned leaves the sequence alone
+    ALTER SEQUENCE sales_id_seq OWNED BY sales.id;
+
+    -- Statement-level, as in 001 and 002; the transition tables hold the
+    -- rows of every partition the statement touched
+    CREATE TRIGGER after_sale_deduct_stock
+        AFTER INSERT ON sales
+        REFERENCING NEW TABLE AS new_sales
+        FOR EACH STATEMENT EXECUTE FUNCTION deduct_stock_after_sale();
+
+    CREATE TRIGGER after_sale_rollup_insert
+        AFTER INSERT ON sales
+        REFERENCING NEW TABLE AS new_sales
+        FOR EACH STATEMENT EXECUTE FUNCTION rollup_sales_insert();
+
+    CREATE TRIGGER after_sale_rollup_delete
+        AFTER DELETE ON sales
+        REFERENCING OLD TABLE AS old_sales
+        FOR EACH STATEMENT EXECUTE FUNCTION rollup_sales_delete();
+
+    CREATE POLICY "Authenticated users can read sales" ON sales
+        FOR SELECT TO authenticated USING (true);
+
+    CREATE POLICY "Authenticated users can insert sales" ON sales
+        FOR INSERT TO authenticated WITH CHECK (true);
+
+    -- Realtime subscribers keep getting changes as table "sales", not as
+    -- whichever partition the row went to
+    IF EXISTS (SELECT 1 FROM pg_publication WHERE pubname = 'supabase_realtime') THEN
+        IF EXISTS (
+            SELECT 1 FROM pg_publication_tables
+            WHERE pubname = 'supabase_realtime' AND tablename = 'sales_unpartitioned'
+        ) THEN
+            ALTER PUBLICATION supabase_realtime DROP TABLE sales_unpartitioned;
+        END IF;
+        ALTER PUBLICATION supabase_realtime SET (publish_via_partition_root = true);
+        ALTER PUBLICATION supabase_realtime ADD TABLE sales;
+    END IF;
+END;
+$$;
+
+COMMIT;
@@ -0,0 +1,39 @@
+-- Precomputed best-seller rankings for the standard report windows
+-- GET /api/sales/best-sellers/ and the dashboard read the ranking for 1, 7,
+-- 30 or 90 days from here instead of aggregating every active product's
+-- sales on each request. Built from sales_daily_rollup, so archived months
+-- still count. The sales.tasks.refresh_best_sellers beat task refreshes it
+-- CONCURRENTLY (readers never wait) every BEST_SELLERS_REFRESH_INTERVAL
+-- seconds; other windows are still computed live.
+-- Safe to run more than once.
+
+BEGIN;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS best_sellers_windows AS
+SELECT
+    w.days AS window_days,
+    p.id AS product_id,
+    p.name AS product_name,
+    p.category,
+    COALESCE(SUM(r.items_sold), 0)::bigint AS total_sold,
+    COALESCE(SUM(r.revenue), 0) AS total_revenue,
+    NOW() AS refreshed_at
+FROM (VALUES (1), (7), (30), (90)) AS w(days)
+CROSS JOIN products p
+LEFT JOIN sales_daily_rollup r ON r.product_id = p.id
+    AND r.sale_date >= CURRENT_DATE - w.days
+WHERE p.is_active = true
+GROUP BY w.days, p.id, p.name, p.category;
+
+-- REFRESH ... CONCURRENTLY needs a unique index
+CREATE UNIQUE INDEX IF NOT EXISTS idx_best_sellers_windows_product
+    ON best_sellers_windows (window_days, product_id);
+
+CREATE INDEX IF NOT EXISTS idx_best_sellers_windows_rank
+    ON best_sellers_windows (window_days, total_sold DESC, product_id);
+
+-- Materialized views have no row level security; readable like sales
+REVOKE ALL ON best_sellers_windows FROM PUBLIC, anon;
+GRANT SELECT ON best_sellers_windows TO authenticated;
+
+COMMIT;
@@ -0,0 +1,35 @@
+-- Precomputed reorder parameters per product
+-- The inventory.tasks.refresh_reorder_suggestions beat task works out each
+-- product's sales velocity from the daily rollup and stores the stock level
+-- to reorder at and the level to order up to; GET /api/inventory/reorder/
+-- compares them with live stock. Only products with sales since the last
+-- run (reorder_state.last_sale_id) are recomputed, plus any not recomputed
+-- for a day, so velocity also decays for products that stopped selling.
+-- Safe to run more than once.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS reorder_suggestions (
+    product_id INTEGER PRIMARY KEY REFERENCES products(id) ON DELETE CASCADE,
+    units_per_day DECIMAL(12,3) NOT NULL,
+    reorder_point INTEGER NOT NULL,
+    order_up_to INTEGER NOT NULL,
+    computed_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_reorder_suggestions_computed_at ON reorder_suggestions(computed_at);
+
+-- Single row: how far through sales the task has got
+CREATE TABLE IF NOT EXISTS reorder_state (
+    id BOOLEAN PRIMARY KEY DEFAULT true CHECK (id),
+    last_sale_id BIGINT NOT NULL DEFAULT 0,
+    refreshed_at TIMESTAMPTZ
+);
+
+INSERT INTO reorder_state (id) VALUES (true) ON CONFLICT DO NOTHING;
+
+-- Only the backend (service role) reads or writes them
+ALTER TABLE reorder_suggestions ENABLE ROW LEVEL SECURITY;
+ALTER TABLE reorder_state ENABLE ROW LEVEL SECURITY;
+
+COMMIT;
@@ -0,0 +1,38 @@
+-- Months of sales moved out of the database to archive files
+-- sales/partitions.py records a month here in the same transaction that
+-- detaches and drops its partition, and removes it when the month is
+-- restored. rebuild_sales_rollup never touches these months' rollup rows,
+-- which are all that's left of them in the database, whether or not the
+-- archive files can be seen from where it runs.
+-- Months archived before this table existed are the rollup's months with
+-- no sales left in a partitioned sales table; they're recorded here too.
+-- Safe to run more than once.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS sales_archived_months (
+    month DATE PRIMARY KEY CHECK (month = date_trunc('month', month)::date),
+    sales BIGINT NOT NULL,
+    -- File name in SALES_ARCHIVE_DIR
+    archive_file TEXT NOT NULL,
+    archived_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Only the backend (service role) reads or writes it
+ALTER TABLE sales_archived_months ENABLE ROW LEVEL SECURITY;
+
+INSERT INTO sales_archived_months (month, sales, archive_file)
+SELECT r.month, r.transactions, 'sales_' || to_char(r.month, 'YYYY_MM') || '.csv.gz'
+FROM (
+    SELECT date_trunc('month', sale_date)::date AS month, SUM(transactions) AS transactions
+    FROM sales_daily_rollup
+    GROUP BY 1
+) r
+WHERE EXISTS (SELECT 1 FROM pg_class WHERE oid = 'sales'::regclass AND relkind = 'p')
+  AND NOT EXISTS (
+      SELECT 1 FROM sales s
+      WHERE s.sale_date >= r.month AND s.sale_date < r.month + INTERVAL '1 month'
+  )
+ON CONFLICT (month) DO NOTHING;
+
+COMMIT;
@@ -0,0 +1,50 @@
+-- Only clean up the rollup rows a DELETE on sales touched
+-- rollup_sales_delete (002) removed emptied rows with a DELETE over the
+-- whole rollup after every statement that deleted sales. It now only looks
+-- at the (sale_date, product_id, category) keys of the deleted sales.
+-- Safe to run more than once.
+
+BEGIN;
+
+CREATE OR REPLACE FUNCTION rollup_sales_delete()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE sales_daily_rollup r
+    SET items_sold = r.items_sold - d.items_sold,
+        revenue = r.revenue - d.revenue,
+        profit = r.profit - d.profit,
+        transactions = r.transactions - d.transactions
+    FROM (
+        SELECT
+            o.sale_date,
+            o.product_id,
+            COALESCE(p.category, 'Other') AS category,
+            SUM(o.quantity) AS items_sold,
+            SUM(o.total_price) AS revenue,
+            COALESCE(SUM(o.profit), 0) AS profit,
+            COUNT(*) AS transactions
+        FROM old_sales o
+        LEFT JOIN products p ON p.id = o.product_id
+        WHERE o.product_id IS NOT NULL AND o.sale_date IS NOT NULL
+        GROUP BY o.sale_date, o.product_id, COALESCE(p.category, 'Other')
+    ) d
+    WHERE r.sale_date = d.sale_date
+      AND r.product_id = d.product_id
+      AND r.category = d.category;
+
+    DELETE FROM sales_daily_rollup r
+    USING (
+        SELECT DISTINCT o.sale_date, o.product_id, COALESCE(p.category, 'Other') AS category
+        FROM old_sales o
+        LEFT JOIN products p ON p.id = o.product_id
+        WHERE o.product_id IS NOT NULL AND o.sale_date IS NOT NULL
+    ) d
+    WHERE r.sale_date = d.sale_date
+      AND r.product_id = d.product_id
+      AND r.category = d.category
+      AND r.transactions <= 0;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+COMMIT;
@@ -0,0 +1,162 @@
+-- Keep each sale's category with the sale, and roll up sales of deleted products
+-- The rollup triggers (002, 016) looked up the category of a sale's product
+-- when the sale was inserted and again when it was deleted, so recategorising
+-- a product left the deletes of its older sales subtracting from the wrong
+-- rollup row. A sale now stores its category when it is recorded (filled in
+-- from the product unless given), and the triggers key the rollup on that.
+-- Sales without a product (never set, or the product was deleted and
+-- ON DELETE SET NULL cleared it) are rolled up under product_id 0, by the
+-- triggers and by rebuild_sales_rollup alike, so the daily and category
+-- totals still count them. Clearing product_id moves a sale's totals to
+-- product 0 through the new UPDATE triggers.
+-- Existing sales get their product's current category and the rollup is
+-- rebuilt from sales, except for archived months (sales_archived_months).
+-- Sales writes wait for this file; it rewrites every sale once.
+-- Safe to run more than once.
+
+BEGIN;
+
+DO $$
+BEGIN
+    IF to_regclass('sales_partitioned') IS NOT NULL THEN
+        RAISE EXCEPTION 'sales is half-way through partitioning; run 012_sales_partition_swap.sql first';
+    END IF;
+END;
+$$;
+
+-- Also holds off sales writes until COMMIT
+ALTER TABLE sales ADD COLUMN IF NOT EXISTS category TEXT;
+
+CREATE OR REPLACE FUNCTION sales_set_category()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.category IS NULL THEN
+        NEW.category := COALESCE((SELECT category FROM products WHERE id = NEW.product_id), 'Other');
+    END IF;
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+DROP TRIGGER IF EXISTS before_sale_set_category ON sales;
+CREATE TRIGGER before_sale_set_category
+    BEFORE INSERT ON sales
+    FOR EACH ROW EXECUTE FUNCTION sales_set_category();
+
+UPDATE sales s
+SET category = COALESCE((SELECT p.category FROM products p WHERE p.id = s.product_id), 'Other')
+WHERE s.category IS NULL;
+
+ALTER TABLE sales ALTER COLUMN category SET NOT NULL;
+
+-- Add newly inserted sales to the rollup
+CREATE OR REPLACE FUNCTION rollup_sales_insert()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO sales_daily_rollup AS r
+        (sale_date, product_id, category, items_sold, revenue, profit, transactions)
+    SELECT
+        n.sale_date,
+        COALESCE(n.product_id, 0),
+        n.category,
+        SUM(n.quantity),
+        SUM(n.total_price),
+        COALESCE(SUM(n.profit), 0),
+        COUNT(*)
+    FROM new_sales n
+    WHERE n.sale_date IS NOT NULL
+    GROUP BY n.sale_date, COALESCE(n.product_id, 0), n.category
+    ORDER BY n.sale_date, COALESCE(n.product_id, 0)
+    ON CONFLICT (sale_date, product_id, category) DO UPDATE SET
+        items_sold = r.items_sold + EXCLUDED.items_sold,
+        revenue = r.revenue + EXCLUDED.revenue,
+        profit = r.profit + EXCLUDED.profit,
+        transactions = r.transactions + EXCLUDED.transactions;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+-- Remove deleted sales from the rollup
+CREATE OR REPLACE FUNCTION rollup_sales_delete()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE sales_daily_rollup r
+    SET items_sold = r.items_sold - d.items_sold,
+        revenue = r.revenue - d.revenue,
+        profit = r.profit - d.profit,
+        transactions = r.transactions - d.transactions
+    FROM (
+        SELECT
+            o.sale_date,
+            COALESCE(o.product_id, 0) AS product_id,
+            o.category,
+            SUM(o.quantity) AS items_sold,
+            SUM(o.total_price) AS revenue,
+            COALESCE(SUM(o.profit), 0) AS profit,
+            COUNT(*) AS transactions
+        FROM old_sales o
+        WHERE o.sale_date IS NOT NULL
+        GROUP BY o.sale_date, COALESCE(o.product_id, 0), o.category
+    ) d
+    WHERE r.sale_date = d.sale_date
+      AND r.product_id = d.product_id
+      AND r.category = d.category;
+
+    DELETE FROM sales_daily_rollup r
+    USING (
+        SELECT DISTINCT o.sale_date, COALESCE(o.product_id, 0) AS product_id, o.category
+        FROM old_sales o
+        WHERE o.sale_date IS NOT NULL
+    ) d
+    WHERE r.sale_date = d.sale_date
+      AND r.product_id = d.product_id
+      AND r.category = d.category
+      AND r.transactions <= 0;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+DROP TRIGGER IF EXISTS after_sale_rollup_insert ON sales;
+CREATE TRIGGER after_sale_rollup_insert
+    AFTER INSERT ON sales
+    REFERENCING NEW TABLE AS new_sales
+    FOR EACH STATEMENT EXECUTE FUNCTION rollup_sales_insert();
+
+DROP TRIGGER IF EXISTS after_sale_rollup_delete ON sales;
+CREATE TRIGGER after_sale_rollup_delete
+    AFTER DELETE ON sales
+    REFERENCING OLD TABLE AS old_sales
+    FOR EACH STATEMENT EXECUTE FUNCTION rollup_sales_delete();
+
+-- An updated sale comes out of the rollup as it was and goes back in as it
+-- is, one trigger for each half. Triggers with transition tables can't be
+-- limited to some columns (UPDATE OF), so these run on every update
+DROP TRIGGER IF EXISTS after_sale_rollup_update_old ON sales;
+CREATE TRIGGER after_sale_rollup_update_old
+    AFTER UPDATE ON sales
+    REFERENCING OLD TABLE AS old_sales
+    FOR EACH STATEMENT EXECUTE FUNCTION rollup_sales_delete();
+
+DROP TRIGGER IF EXISTS after_sale_rollup_update_new ON sales;
+CREATE TRIGGER after_sale_rollup_update_new
+    AFTER UPDATE ON sales
+    REFERENCING NEW TABLE AS new_sales
+    FOR EACH STATEMENT EXECUTE FUNCTION rollup_sales_insert();
+
+DELETE FROM sales_daily_rollup
+WHERE date_trunc('month', sale_date)::date NOT IN (SELECT month FROM sales_archived_months);
+
+INSERT INTO sales_daily_rollup
+    (sale_date, product_id, category, items_sold, revenue, profit, transactions)
+SELECT
+    s.sale_date,
+    COALESCE(s.product_id, 0),
+    s.category,
+    SUM(s.quantity),
+    SUM(s.total_price),
+    COALESCE(SUM(s.profit), 0),
+    COUNT(*)
+FROM sales s
+WHERE s.sale_date IS NOT NULL
+GROUP BY s.sale_date, COALESCE(s.product_id, 0), s.category;
+
+COMMIT;
@@ -0,0 +1,17 @@
+-- Track reorder refreshes by product version instead of sale id
+-- A sale gets its id when it is inserted but is only visible once it
+-- commits, so a sale still committing when the refresh read MAX(id) fell
+-- below the next run's last_sale_id and its product was skipped. Every sale
+-- deducts its product's stock, which stamps the product's version (006) with
+-- the sale's transaction id, so the refresh now recomputes products whose
+-- version is at or above the snapshot xmin recorded by the previous run, as
+-- GET /api/inventory/products/changes/ does: every transaction below it had
+-- finished, so no sale committing late can be missed.
+-- Safe to run more than once.
+
+BEGIN;
+
+ALTER TABLE reorder_state ADD COLUMN IF NOT EXISTS last_version BIGINT NOT NULL DEFAULT 0;
+ALTER TABLE reorder_state DROP COLUMN IF EXISTS last_sale_id;
+
+COMMIT;
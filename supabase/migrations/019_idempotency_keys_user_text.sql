@@ -0,0 +1,11 @@
+-- Idempotency keys for every kind of user id
+-- Supabase users have UUIDs, but session-authenticated Django users have
+-- integer ids, and storing those in a UUID column failed their requests.
+-- The key's owner is now stored as text, as on edge nodes (edge/schema.sql).
+-- Safe to run more than once.
+
+BEGIN;
+
+ALTER TABLE idempotency_keys ALTER COLUMN user_id TYPE TEXT USING user_id::text;
+
+COMMIT;
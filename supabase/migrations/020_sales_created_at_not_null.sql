@@ -0,0 +1,17 @@
+-- Every sale has a created_at
+-- GET /api/sales/ pages through sales on (created_at, id) (003), and the
+-- cursor it hands out carries the created_at of a page's last sale. The
+-- column defaults to NOW() but allowed NULL, and a sale without one broke
+-- its page's cursor, so sales without one are dated at the start of their
+-- sale_date and the column is made NOT NULL.
+-- Safe to run more than once.
+
+BEGIN;
+
+UPDATE sales
+SET created_at = COALESCE(sale_date::timestamptz, NOW())
+WHERE created_at IS NULL;
+
+ALTER TABLE sales ALTER COLUMN created_at SET NOT NULL;
+
+COMMIT;